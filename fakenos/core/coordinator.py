@@ -0,0 +1,372 @@
+"""
+This module allows to distribute one FakeNOS inventory across several
+FakeNOS agents, each of them running in its own process and possibly
+in a different node. The coordinator partitions the inventory, assigns
+a bind address and a port range to every agent and exposes a single
+aggregated hosts table and control API.
+
+Agents are controlled using ``multiprocessing.connection`` listeners,
+authenticated with a shared ``authkey``, which is mandatory as the
+listeners unpickle the requests they receive. Agents bind to 127.0.0.1
+unless told otherwise. An agent can be started in a remote node with
+the FakeNOS CLI tool:
+
+```bash
+FAKENOS_AUTHKEY=secret fakenos --agent 10.0.0.2:6500
+```
+"""
+
+import copy
+import logging
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import yaml
+
+from fakenos.core.fakenos import FakeNOS, default_inventory
+from fakenos.core.pydantic_models import ModelFakenosInventory
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CONTROL_PORT: int = 6500
+DEFAULT_AGENT_ADDRESS: str = "127.0.0.1"
+DEFAULT_PORTS: List[int] = [6000, 65000]
+
+
+class FakeNOSAgent:
+    """
+    FakeNOSAgent class serves the control API of a single
+    FakeNOS instance which runs a partition of the inventory.
+
+    :param address: IP address to bind the control listener to,
+        the hosts of the agent are bound to the same address.
+    :param control_port: port of the control listener.
+    :param authkey: shared secret used to authenticate the coordinator,
+        raises ValueError if it is empty.
+    """
+
+    def __init__(
+        self, address: str = DEFAULT_AGENT_ADDRESS, control_port: int = DEFAULT_CONTROL_PORT, authkey: bytes = None
+    ) -> None:
+        if not authkey:
+            raise ValueError("FakeNOS agent requires a non empty authkey")
+        self.address: str = address
+        self.control_port: int = control_port
+        self.authkey: bytes = authkey
+        self.net: FakeNOS = None
+
+    def serve(self) -> None:
+        """
+        Method to serve control requests until the
+        coordinator asks the agent to shutdown.
+        """
+        with Listener((self.address, self.control_port), authkey=self.authkey) as listener:
+            log.info("FakeNOS agent listening on %s:%s", self.address, self.control_port)
+            running = True
+            while running:
+                with listener.accept() as connection:
+                    running = self._serve_connection(connection)
+        log.info("FakeNOS agent %s:%s stopped", self.address, self.control_port)
+
+    def _serve_connection(self, connection) -> bool:
+        """
+        Helper method to serve requests of a single coordinator
+        connection. Returns False if the agent must shutdown.
+        """
+        while True:
+            try:
+                command, payload = connection.recv()
+            except EOFError:
+                return True
+            try:
+                result = getattr(self, f"do_{command}")(payload)
+                connection.send(("ok", result))
+            # pylint: disable=broad-except
+            except (Exception,) as e:
+                log.error("FakeNOS agent failed running '%s': %s", command, e)
+                connection.send(("error", f"{type(e).__name__}: {e}"))
+            if command == "shutdown":
+                return False
+
+    def do_load(self, inventory: dict) -> List[str]:
+        """Create the FakeNOS object for the given inventory partition"""
+        if self.net:
+            self.net.stop()
+        self.net = FakeNOS(inventory=inventory)
+        return list(self.net.hosts)
+
+    def do_start(self, hosts: List[str] = None) -> None:
+        """Start the hosts of this agent"""
+        self.net.start(hosts)
+
+    def do_stop(self, hosts: List[str] = None) -> None:
+        """Stop the hosts of this agent"""
+        self.net.stop(hosts)
+
+    def do_drain(self, payload: dict) -> None:
+        """Start draining the hosts of this agent, without waiting for them"""
+        self.net.drain(payload["hosts"], grace_period=payload["grace_period"], wait=False)
+
+    # pylint: disable=unused-argument
+    def do_hosts(self, payload: Any = None) -> Dict[str, dict]:
+        """Return the hosts table of this agent"""
+        if not self.net:
+            return {}
+        return {
+            name: {
+                "address": host.server_inventory["configuration"].get("address", self.address),
+                "port": host.port,
+                "platform": host.nos_inventory["plugin"],
+                "running": host.running,
+                **host.status,
+            }
+            for name, host in self.net.hosts.items()
+        }
+
+    # pylint: disable=unused-argument
+    def do_shutdown(self, payload: Any = None) -> None:
+        """Stop all the hosts before the agent exits"""
+        if self.net and any(host.running for host in self.net.hosts.values()):
+            self.net.stop()
+
+
+def run_agent(
+    address: str = DEFAULT_AGENT_ADDRESS, control_port: int = DEFAULT_CONTROL_PORT, authkey: bytes = None
+) -> None:
+    """
+    Function to run a FakeNOS agent, it blocks until the coordinator
+    asks the agent to shutdown. Raises ValueError if authkey is empty.
+    """
+    FakeNOSAgent(address=address, control_port=control_port, authkey=authkey).serve()
+
+
+class FakeNOSCoordinator:
+    """
+    FakeNOSCoordinator class splits one inventory across several
+    FakeNOS agents and controls them as a single lab.
+
+    :param inventory: FakeNOS inventory dictionary or
+        OS path to .yaml file with inventory data
+    :param agents: list of agents definition dictionaries with keys:
+
+        * ``address`` - IP address the agent and its hosts bind to
+        * ``control_port`` - agent control port, default 6500
+        * ``ports`` - list of two integers, range of ports for the hosts
+        * ``spawn`` - if True (default), run the agent as a local process
+
+    :param authkey: shared secret to authenticate with the agents,
+        a random one is used if not provided.
+
+    Sample usage:
+
+    ```python
+    from fakenos.core.coordinator import FakeNOSCoordinator
+
+    inventory = {"hosts": {"R": {"replicas": 1000, "port": [6000, 6999], "platform": "cisco_ios"}}}
+    agents = [{"address": "127.0.0.2"}, {"address": "127.0.0.3"}]
+
+    with FakeNOSCoordinator(inventory, agents) as lab:
+        print(lab.hosts)
+    ```
+    """
+
+    def __init__(
+        self,
+        inventory: Union[dict, str],
+        agents: List[dict],
+        authkey: bytes = None,
+        timeout: int = 10,
+    ) -> None:
+        if not agents:
+            raise ValueError("At least one agent must be defined.")
+        self.inventory: dict = self._load_inventory(inventory)
+        self.agents: List[dict] = [
+            {"control_port": DEFAULT_CONTROL_PORT, "ports": DEFAULT_PORTS, "spawn": True, **agent} for agent in agents
+        ]
+        self.authkey: bytes = authkey or os.urandom(16)
+        self.timeout: int = timeout
+        self.partitions: List[Dict[str, dict]] = self._partition()
+        self._processes: List[multiprocessing.Process] = []
+        self._connections: list = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def _load_inventory(self, inventory: Union[dict, str]) -> dict:
+        """
+        Helper method to load and validate the inventory, raises
+        ValueError if it has a gateway, as gateways serve the hosts
+        of a single FakeNOS instance and agents are not given one.
+        """
+        if isinstance(inventory, str):
+            with open(inventory, "r", encoding="utf-8") as f:
+                inventory = yaml.safe_load(f.read())
+        if inventory.get("gateway"):
+            raise ValueError("FakeNOS coordinator does not support the inventory gateway section.")
+        inventory = copy.deepcopy(inventory)
+        inventory["default"] = {**default_inventory["default"], **inventory.get("default", {})}
+        ModelFakenosInventory(**inventory)
+        return inventory
+
+    def _expand_hosts(self) -> List[Tuple[str, dict, Optional[str]]]:
+        """
+        Helper method to expand hosts replicas into single hosts,
+        naming them the same way as FakeNOS does. Returns the name,
+        the inventory and the address of the hosts, which is the
+        address of the replica if the host has an address range.
+        """
+        hosts: List[Tuple[str, dict, Optional[str]]] = []
+        for host_name, host_config in self.inventory["hosts"].items():
+            host_config = copy.deepcopy(host_config)
+            host_config.pop("port", None)
+            replicas: int = host_config.pop("replicas", None)
+            address_range: str = host_config.pop("address_range", None)
+            if replicas:
+                addresses = (
+                    FakeNOS._get_replicas_addresses(address_range, replicas) if address_range else [None] * replicas
+                )
+                hosts.extend(
+                    (f"{host_name}{i}", copy.deepcopy(host_config), address) for i, address in enumerate(addresses)
+                )
+            else:
+                hosts.append((host_name, host_config, None))
+        return hosts
+
+    def _partition(self) -> List[Dict[str, dict]]:
+        """
+        Helper method to split the hosts in contiguous balanced chunks,
+        one per agent, assigning the bind address and a port from the
+        agent's ports range to each of the hosts. Replicas of hosts with
+        an address range are bound to their own address instead.
+        """
+        hosts = self._expand_hosts()
+        chunk, extra = divmod(len(hosts), len(self.agents))
+        partitions: List[Dict[str, dict]] = []
+        start = 0
+        for index, agent in enumerate(self.agents):
+            end = start + chunk + (1 if index < extra else 0)
+            first_port, last_port = agent["ports"]
+            if end - start > last_port - first_port + 1:
+                raise ValueError(f"Agent {agent['address']} ports range {agent['ports']} is too small")
+            partition: Dict[str, dict] = {}
+            for port, (host_name, host_config, address) in zip(range(first_port, last_port + 1), hosts[start:end]):
+                server = copy.deepcopy(host_config.get("server", self.inventory["default"]["server"]))
+                server.setdefault("configuration", {})["address"] = address or agent["address"]
+                partition[host_name] = {**host_config, "port": port, "server": server}
+            partitions.append(partition)
+            start = end
+        return partitions
+
+    def _connect(self, agent: dict):
+        """Helper method to connect to the agent control listener"""
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                return Client((agent["address"], agent["control_port"]), authkey=self.authkey)
+            except ConnectionRefusedError:
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _request(self, connection, command: str, payload: Any = None) -> Any:
+        """Helper method to run a request against an agent"""
+        connection.send((command, payload))
+        status, result = connection.recv()
+        if status != "ok":
+            raise RuntimeError(f"FakeNOS agent failed running '{command}': {result}")
+        return result
+
+    def _group_by_agent(self, hosts: Union[str, List[str]] = None) -> List[Tuple[Any, List[str]]]:
+        """Helper method to group the hosts names by the agent running them"""
+        if hosts is None:
+            return [(connection, None) for connection in self._connections]
+        if isinstance(hosts, str):
+            hosts = [hosts]
+        groups = []
+        for connection, partition in zip(self._connections, self.partitions):
+            names = [host for host in hosts if host in partition]
+            if names:
+                groups.append((connection, names))
+        unknown = set(hosts) - {host for partition in self.partitions for host in partition}
+        if unknown:
+            raise ValueError(f"Hosts {sorted(unknown)} not found")
+        return groups
+
+    def start(self, hosts: Union[str, List[str]] = None) -> None:
+        """
+        Function to start the agents, if not started yet, and the hosts.
+
+        :param hosts: single or list of hosts to start by their name.
+        """
+        if not self._connections:
+            self._start_agents()
+        for connection, names in self._group_by_agent(hosts):
+            self._request(connection, "start", names)
+
+    def _start_agents(self) -> None:
+        """Helper method to spawn local agents and load their inventory partition"""
+        for agent in self.agents:
+            if agent["spawn"]:
+                process = multiprocessing.Process(
+                    target=run_agent,
+                    args=(agent["address"], agent["control_port"], self.authkey),
+                    daemon=True,
+                )
+                process.start()
+                self._processes.append(process)
+        for agent, partition in zip(self.agents, self.partitions):
+            connection = self._connect(agent)
+            self._connections.append(connection)
+            self._request(connection, "load", {"default": self.inventory["default"], "hosts": partition})
+            log.info("FakeNOS agent %s loaded %s hosts", agent["address"], len(partition))
+
+    def stop(self, hosts: Union[str, List[str]] = None) -> None:
+        """
+        Function to stop the hosts, agents are kept running.
+
+        :param hosts: single or list of hosts to stop by their name.
+        """
+        for connection, names in self._group_by_agent(hosts):
+            self._request(connection, "stop", names)
+
+    def drain(self, hosts: Union[str, List[str]] = None, grace_period: float = None) -> None:
+        """
+        Function to start draining the hosts, it does not wait for
+        them, the ``hosts`` table shows the progress of the drain.
+
+        :param hosts: single or list of hosts to drain by their name.
+        :param grace_period: seconds to let the sessions finish,
+            waits for as long as needed if None
+        """
+        for connection, names in self._group_by_agent(hosts):
+            self._request(connection, "drain", {"hosts": names, "grace_period": grace_period})
+
+    def shutdown(self) -> None:
+        """
+        Function to stop all the hosts and the agents.
+        """
+        for connection in self._connections:
+            self._request(connection, "shutdown")
+            connection.close()
+        for process in self._processes:
+            process.join(self.timeout)
+        self._connections, self._processes = [], []
+
+    @property
+    def hosts(self) -> Dict[str, dict]:
+        """
+        Aggregated hosts table keyed by host name, with the agent
+        running the host, its address, port, platform and state.
+        """
+        table: Dict[str, dict] = {}
+        for agent, connection in zip(self.agents, self._connections):
+            for name, host in self._request(connection, "hosts").items():
+                table[name] = {"agent": f"{agent['address']}:{agent['control_port']}", **host}
+        return table
@@ -3,13 +3,16 @@ Main module to interact with FakeNOS servers.
 It is the entry point to start, stop and list FakeNOS servers.
 """
 
+import asyncio
 import logging
 import copy
+import ipaddress
+import os
 import socket
 import threading
 import time
 import platform
-from typing import Union, List, Dict, Set
+from typing import Union, List, Dict, Optional, Set, Tuple
 
 import yaml
 import detect
@@ -72,6 +75,15 @@ class FakeNOS:
     net = FakeNOS()
     net.start()
     ```
+
+    The same lifecycle is available to asyncio applications. The
+    servers are threaded, the coroutines run the blocking steps in
+    the event loop default executor so the loop is not blocked:
+
+    ```python
+    async with FakeNOS() as net:
+        await net.async_stop("router_cisco_ios")
+    ```
     """
 
     def __init__(
@@ -83,7 +95,11 @@ class FakeNOS:
         self.plugins: list = plugins or []
 
         self.hosts: Dict[str, Host] = {}
+        self.gateway = None
         self.allocated_ports: Set[str] = set()
+        self.allocated_addresses: Set[Tuple[str, int]] = set()
+        self.allocated_unix_sockets: Set[str] = set()
+        self.endpoints: Dict[Tuple[str, int], Host] = {}
 
         self.shell_plugins = shell_plugins
         self.nos_plugins = nos_plugins
@@ -91,6 +107,7 @@ class FakeNOS:
 
         self._load_inventory()
         self._init()
+        self._init_gateway()
         self._register_nos_plugins()
 
     def __enter__(self):
@@ -108,6 +125,21 @@ class FakeNOS:
         """
         self.stop()
 
+    async def __aenter__(self):
+        """
+        Coroutine to start the FakeNOS servers when entering the async context manager.
+        It is meant to be used with the `async with` statement.
+        """
+        await self.async_start()
+        return self
+
+    async def __aexit__(self, *args):
+        """
+        Coroutine to stop the FakeNOS servers when exiting the async context manager.
+        It is meant to be used with the `async with` statement.
+        """
+        await self.async_stop()
+
     def _is_inventory_in_yaml(self) -> bool:
         """method that checks if the inventory is a yaml file."""
         return isinstance(self.inventory, str) and self.inventory.endswith(".yaml")
@@ -137,22 +169,76 @@ class FakeNOS:
         method called automatically on FakeNOS object instantiation.
         """
         for host_name, host_config in self.inventory["hosts"].items():
-            params = {
-                **copy.deepcopy(self.inventory["default"]),
-                **copy.deepcopy(host_config),
-            }
-            port: Union[int, list] = params.pop("port")
-            replicas: int = params.pop("replicas", None)
-            self._check_ports_and_replicas_are_okey(port, replicas)
-            self._instantiate_host_object(host_name, port, replicas, params)
+            self._init_host(host_name, host_config)
 
-    def _check_ports_and_replicas_are_okey(self, port, replicas):
+    def _init_gateway(self) -> None:
+        """
+        Helper method to instantiate the gateway server, if defined
+        in the inventory, which routes sessions to the hosts by name.
+        """
+        gateway_inventory: dict = self.inventory.get("gateway")
+        if not gateway_inventory:
+            return
+        self._allocate_port(gateway_inventory["port"])
+        self.gateway = self.servers_plugins[gateway_inventory["plugin"]](
+            resolve_host=self.hosts.get,
+            resolve_endpoint=self.resolve_endpoint,
+            port=gateway_inventory["port"],
+            **gateway_inventory.get("configuration", {}),
+        )
+
+    def _init_host(self, host_name: str, host_config: dict) -> None:
+        """
+        Helper method to initiate the host objects of a
+        single inventory host entry merging it with the
+        default section.
+
+        :param host_name: string - name of the host in the inventory
+        :param host_config: dictionary - host inventory data
+        """
+        params = {
+            **copy.deepcopy(self.inventory["default"]),
+            **copy.deepcopy(host_config),
+        }
+        port: Union[int, list] = params.pop("port")
+        replicas: int = params.pop("replicas", None)
+        address_range: str = params.pop("address_range", None)
+        if self._get_unix_socket(params):
+            # hosts served on a Unix socket do not use TCP ports
+            if address_range:
+                raise ValueError("If unix_socket is set, address_range must not be set.")
+            if replicas is not None and replicas < 1:
+                raise ValueError("If replicas is set, replicas must be greater than 0.")
+            port = port if isinstance(port, int) else 0
+        else:
+            self._check_ports_and_replicas_are_okey(port, replicas, address_range)
+        self._instantiate_host_object(host_name, port, replicas, params, address_range)
+
+    @staticmethod
+    def _get_unix_socket(params: dict) -> Optional[str]:
+        """
+        Helper method to get the Unix-domain socket the host is
+        served on instead of a TCP port, None if there is none.
+
+        :param params: dictionary - host parameters
+        """
+        return ((params.get("server") or {}).get("configuration") or {}).get("unix_socket")
+
+    def _check_ports_and_replicas_are_okey(self, port, replicas, address_range=None):
         """
         Method to check if the port and replicas are okey
 
         :param port: integer or list of two integers - port to allocate
         :param replicas: integer - number of hosts to create
+        :param address_range: string - IP address range to allocate
+            replicas addresses from, if set port can be an integer
         """
+        if address_range and not replicas:
+            raise ValueError("If address_range is set, replicas must be set.")
+        if address_range and isinstance(port, int):
+            if replicas < 1:
+                raise ValueError("If replicas is set, replicas must be greater than 0.")
+            return
         if not replicas and isinstance(port, list):
             raise ValueError("If replicas is not set, port must be an integer.")
         if replicas and not isinstance(port, list):
@@ -169,7 +255,15 @@ class FakeNOS:
                     must be equal to the number of replicas."
             )
 
-    def _instantiate_host_object(self, host_name: str, port: Union[int, List[int]], replicas: int, params: dict):
+    # pylint: disable=too-many-arguments
+    def _instantiate_host_object(
+        self,
+        host_name: str,
+        port: Union[int, List[int]],
+        replicas: int,
+        params: dict,
+        address_range: str = None,
+    ):
         """
         Method that instantiate the host objects. It initializes the hosts
         with the corresponding name, port and network operating system
@@ -179,8 +273,18 @@ class FakeNOS:
         :param count: integer - number of hosts to create
         :param params: dictionary - parameters to pass to
                                     the host like configurations
+        :param address_range: string - IP address range to give each
+                                       replica its own address from
         """
         hosts_name, ports = self._get_hosts_and_ports(host_name, port, replicas)
+        if address_range:
+            addresses = self._get_replicas_addresses(address_range, replicas)
+            for i, (h_name, address) in enumerate(zip(hosts_name, addresses)):
+                host_params = copy.deepcopy(params)
+                host_params["server"].setdefault("configuration", {})["address"] = address
+                p = port if isinstance(port, int) else ports[i]
+                self._instantiate_single_host_object(h_name, p, host_params, address)
+            return
         for h_name, p in zip(hosts_name, ports):
             self._instantiate_single_host_object(h_name, p, params)
 
@@ -193,18 +297,34 @@ class FakeNOS:
         :param port: integer or list of two integers - port to allocate
         :param replicas: integer - number of hosts to create
         """
-        hosts_name: Set[str] = {}
-        ports: Set[int] = {}
+        hosts_name: List[str] = []
+        ports: List[int] = []
 
         if replicas:
-            hosts_name = {f"{host_name}{i}" for i in range(replicas)}
-            ports = set(range(port[0], port[1] + 1))
+            hosts_name = [f"{host_name}{i}" for i in range(replicas)]
+            ports = list(range(port[0], port[1] + 1)) if isinstance(port, list) else [port] * replicas
         else:
-            hosts_name = {host_name}
-            ports = {port}
+            hosts_name = [host_name]
+            ports = [port]
         return hosts_name, ports
 
-    def _instantiate_single_host_object(self, host, port, params):
+    @staticmethod
+    def _get_replicas_addresses(address_range: str, replicas: int) -> List[str]:
+        """
+        Method to get consecutive addresses for the replicas, starting
+        from the address of the range, e.g. ``127.0.1.0/16`` gives
+        ``127.0.1.0``, ``127.0.1.1`` and so on. IPv6 ranges are
+        supported as well, e.g. ``fd00::1/64``.
+
+        :param address_range: string - IP address with prefix length
+        :param replicas: integer - number of addresses to get
+        """
+        interface = ipaddress.ip_interface(address_range)
+        if int(interface.ip) + replicas - 1 > int(interface.network.broadcast_address):
+            raise ValueError(f"Address range {address_range} is too small for {replicas} replicas.")
+        return [str(interface.ip + i) for i in range(replicas)]
+
+    def _instantiate_single_host_object(self, host, port, params, address=None):
         """
         Method that instantiate the host objects. It initializes the hosts
 
@@ -212,9 +332,47 @@ class FakeNOS:
         :param port: integer or list of two integers - port to allocate
         :param params: dictionary - parameters to pass to
                                     the host like configurations
+        :param address: string - address the host has for its own
+        """
+        unix_socket = self._get_unix_socket(params)
+        if address:
+            self._allocate_address(address, port)
+        elif params.get("listen", True) and not unix_socket:
+            self._allocate_port(port)
+        host_object = Host(name=host, port=port, fakenos=self, **params)
+        if unix_socket and host_object.listen:
+            self._allocate_unix_socket(host_object.unix_socket)
+        self.hosts[host] = host_object
+        if self.hosts[host].listen and not unix_socket:
+            self.endpoints[(self._get_host_address(self.hosts[host]), port)] = self.hosts[host]
+
+    def _get_host_address(self, host: Host) -> str:
+        """
+        Helper method to get the address the host listens on,
+        `localhost` is normalized to the loopback address.
+
+        :param host: Host object
         """
-        self._allocate_port(port)
-        self.hosts[host] = Host(name=host, port=port, fakenos=self, **params)
+        address = str(host.server_inventory.get("configuration", {}).get("address") or "127.0.0.1")
+        return "127.0.0.1" if address == "localhost" else address
+
+    def resolve_endpoint(self, address: str, port: int) -> Union[Host, None]:
+        """
+        Function to get the host reachable on the given address and port,
+        hosts listening on the unspecified address match any address.
+        The address can be a host name as well, in which case the port
+        is ignored and hosts without a listener are matched too.
+
+        :param address: string - IP address or host name
+        :param port: integer - port the host listens on
+        """
+        if address in self.hosts:
+            return self.hosts[address]
+        address = "127.0.0.1" if address == "localhost" else address
+        for candidate in (address, "0.0.0.0", "::"):
+            if (candidate, port) in self.endpoints:
+                return self.endpoints[(candidate, port)]
+        return None
 
     def _allocate_port(self, port: Union[int, List[int]]) -> None:
         """
@@ -241,6 +399,30 @@ class FakeNOS:
         self.allocated_ports.add(port)
         return port
 
+    def _allocate_address(self, address: str, port: int) -> None:
+        """
+        Method to allocate address and port pair for
+        hosts which have an address on their own.
+
+        :param address: string - IP address to allocate
+        :param port: integer - port to allocate
+        """
+        if (address, port) in self.allocated_addresses:
+            raise ValueError(f"Address {address} port {port} already in use")
+        self.allocated_addresses.add((address, port))
+
+    def _allocate_unix_socket(self, unix_socket: str) -> None:
+        """
+        Method to allocate the Unix-domain socket path of a host,
+        so hosts do not replace the sockets of each other.
+
+        :param unix_socket: string - path of the socket
+        """
+        unix_socket = os.path.abspath(unix_socket)
+        if unix_socket in self.allocated_unix_sockets:
+            raise ValueError(f"Unix socket {unix_socket} already in use")
+        self.allocated_unix_sockets.add(unix_socket)
+
     def _get_hosts_as_list(self, hosts: Union[str, List[str]] = None) -> List[Host]:
         """
         Helper method to get hosts as list
@@ -264,6 +446,8 @@ class FakeNOS:
         """
         hosts: List[str] = self._get_hosts_as_list(hosts)
         self._execute_function_over_hosts(hosts, "start", host_running=False)
+        if self.gateway:
+            self.gateway.start()
         log.info("The following devices has been initiated: %s", [host.name for host in hosts])
         for host in hosts:
             log.info("Device %s is running on port %s", host.name, host.port)
@@ -278,8 +462,149 @@ class FakeNOS:
         hosts: List[str] = self._get_hosts_as_list(hosts)
         self._execute_function_over_hosts(hosts, "stop", host_running=True)
         if hosts == list(self.hosts.values()):
+            if self.gateway:
+                self.gateway.stop()
+            self._join_threads()
+
+    def drain(self, hosts: Union[str, List[str]] = None, grace_period: float = None, wait: bool = True) -> None:
+        """
+        Function to drain NOS servers instances: they refuse new
+        connections right away and stop once their sessions are done
+        or the grace period expires, see `status` for the progress.
+
+        :param hosts: single or list of hosts to drain by their name.
+        :param grace_period: seconds to let the sessions finish,
+            waits for as long as needed if None
+        :param wait: if True, block until all the hosts are drained
+        """
+        hosts: List[Host] = self._get_hosts_as_list(hosts)
+        for host in hosts:
+            if host.running:
+                host.drain(grace_period)
+        if not wait:
+            return
+        for host in hosts:
+            host.wait_drained()
+        if hosts == list(self.hosts.values()):
+            if self.gateway:
+                self.gateway.stop()
             self._join_threads()
 
+    def status(self, hosts: Union[str, List[str]] = None) -> Dict[str, dict]:
+        """
+        Function to get the state of the hosts, keyed by host name,
+        see `Host.status` for the details.
+
+        :param hosts: single or list of hosts by their name.
+        """
+        return {host.name: host.status for host in self._get_hosts_as_list(hosts)}
+
+    def render_cache_stats(self, hosts: Union[str, List[str]] = None) -> Dict[str, Optional[dict]]:
+        """
+        Function to get the hits, misses and size of the render cache
+        of the hosts devices, keyed by host name, see
+        `Host.render_cache_stats` for the details.
+
+        :param hosts: single or list of hosts by their name.
+        """
+        return {host.name: host.render_cache_stats for host in self._get_hosts_as_list(hosts)}
+
+    def add(self, hosts: Dict[str, dict]) -> None:
+        """
+        Function to add hosts to the FakeNOS inventory. Added hosts
+        are not started, use `start` method for that.
+
+        :param hosts: dictionary keyed by hosts' names with hosts
+            definition, same as the inventory `hosts` section.
+        """
+        ModelFakenosInventory(default=self.inventory["default"], hosts=hosts)
+        for host_name in hosts:
+            if host_name in self.inventory["hosts"]:
+                raise ValueError(f"Host {host_name} already exists")
+        for host_name, host_config in hosts.items():
+            self.inventory["hosts"][host_name] = host_config
+            self._init_host(host_name, host_config)
+
+    def remove(self, hosts: Union[str, List[str]]) -> None:
+        """
+        Function to remove hosts from FakeNOS, running
+        hosts are stopped before being removed.
+
+        :param hosts: single or list of hosts to remove by their name.
+        """
+        hosts: List[Host] = self._get_hosts_as_list(hosts)
+        self._execute_function_over_hosts(hosts, "stop", host_running=True)
+        for host in hosts:
+            self._release_host(host)
+
+    def _release_host(self, host: Host) -> None:
+        """
+        Helper method to forget a stopped host and
+        release its allocated port.
+
+        :param host: Host object to release
+        """
+        self.hosts.pop(host.name)
+        self.inventory["hosts"].pop(host.name, None)
+        self.endpoints.pop((self._get_host_address(host), host.port), None)
+        address = host.server_inventory["configuration"].get("address")
+        if host.unix_socket:
+            self.allocated_unix_sockets.discard(os.path.abspath(host.unix_socket))
+        elif (address, host.port) in self.allocated_addresses:
+            self.allocated_addresses.discard((address, host.port))
+        elif host.listen:
+            self.allocated_ports.discard(host.port)
+
+    async def async_start(self, hosts: Union[str, List[str]] = None) -> None:
+        """
+        Coroutine to start NOS servers instances concurrently
+        without blocking the event loop. It wraps the blocking start
+        of the threaded servers, run in the event loop default executor.
+
+        :param hosts: single or list of hosts to start by their name.
+        """
+        hosts: List[Host] = self._get_hosts_as_list(hosts)
+        await self._async_execute_function_over_hosts(hosts, "async_start", host_running=False)
+        if self.gateway:
+            await asyncio.get_running_loop().run_in_executor(None, self.gateway.start)
+        log.info("The following devices has been initiated: %s", [host.name for host in hosts])
+
+    async def async_stop(self, hosts: Union[str, List[str]] = None) -> None:
+        """
+        Coroutine to stop NOS servers instances concurrently without
+        blocking the event loop, running the blocking stop of the
+        servers in the event loop default executor. Each server joins
+        its own threads while stopping, so there is no need to poll
+        the threads of the whole process as `stop` does.
+
+        :param hosts: single or list of hosts to stop by their name.
+        """
+        hosts: List[Host] = self._get_hosts_as_list(hosts)
+        await self._async_execute_function_over_hosts(hosts, "async_stop", host_running=True)
+        if self.gateway and hosts == list(self.hosts.values()):
+            await asyncio.get_running_loop().run_in_executor(None, self.gateway.stop)
+
+    async def async_add(self, hosts: Dict[str, dict]) -> None:
+        """
+        Coroutine version of `add` method. It is a wrapper running
+        `add`, inventory validation and host instantiation included,
+        in the event loop default executor.
+
+        :param hosts: dictionary keyed by hosts' names with hosts definition.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.add, hosts)
+
+    async def async_remove(self, hosts: Union[str, List[str]]) -> None:
+        """
+        Coroutine version of `remove` method.
+
+        :param hosts: single or list of hosts to remove by their name.
+        """
+        hosts: List[Host] = self._get_hosts_as_list(hosts)
+        await self._async_execute_function_over_hosts(hosts, "async_stop", host_running=True)
+        for host in hosts:
+            self._release_host(host)
+
     def _join_threads(self) -> None:
         """
         Method to join threads in case that all hosts are stopped.
@@ -306,6 +631,21 @@ class FakeNOS:
             if host.running == host_running:
                 getattr(host, func)()
 
+    async def _async_execute_function_over_hosts(
+        self, hosts: List[Host], func: str, host_running: bool = True
+    ) -> None:
+        """
+        Coroutine that awaits a coroutine method like async_start
+        or async_stop over the selected hosts concurrently.
+
+        :param hosts: list of Hosts objects in which the coroutine will
+        be awaited.
+        """
+        for host in hosts:
+            if host not in self.hosts.values():
+                raise ValueError(f"Host {host} not found")
+        await asyncio.gather(*[getattr(host, func)() for host in hosts if host.running == host_running])
+
     def _register_nos_plugins(self) -> None:
         """
         Method to register NOS plugin with FakeNOS object, all plugins
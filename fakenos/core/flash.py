@@ -0,0 +1,125 @@
+"""
+This module implements the virtual flash filesystem of the FakeNOS
+hosts. Every host stores its files in its own directory on disk, so
+files transferred with SFTP or SCP can be listed and verified from
+the device CLI, e.g. with ``dir flash:`` or ``verify /md5``.
+
+Files are read using memory maps, so they are served and hashed
+without being copied in memory, and written in chunks as they
+arrive, so uploads are never buffered whole. Flash directories are
+private to the user running FakeNOS.
+"""
+
+import hashlib
+import mmap
+import os
+from typing import BinaryIO, Iterator, List, Tuple
+
+from fakenos.core.utils import DEFAULT_DIRECTORY, private_directory
+
+DEFAULT_FLASH_DIRECTORY: str = os.path.join(DEFAULT_DIRECTORY, "flash")
+DEFAULT_FLASH_SIZE: int = 7741616128
+CHUNK_SIZE: int = 32768
+
+
+class VirtualFlash:
+    """
+    VirtualFlash class maps the flash filesystem of a host
+    to a directory on disk.
+
+    :param directory: OS path to the directory to store the files in
+    :param size: flash size in bytes, used to report the free space
+    :param name: filesystem name as used in the device CLI
+    """
+
+    def __init__(self, directory: str, size: int = DEFAULT_FLASH_SIZE, name: str = "flash:") -> None:
+        self.directory: str = os.path.realpath(directory)
+        self._private_directory: str = os.path.abspath(directory)  # checked before symbolic links are followed
+        self.size: int = size
+        self.name: str = name
+        self._checked: bool = False  # True once the directory is known to be private
+
+    def path(self, filename: str = "") -> str:
+        """
+        Method to get the OS path of a file in the flash, the filesystem
+        name prefix is optional, e.g. ``flash:/image.bin`` or ``image.bin``.
+        Raises PermissionError if the path is outside of the flash.
+
+        :param filename: name of the file in the flash
+        """
+        if not self._checked:
+            private_directory(self._private_directory)
+            self._checked = True
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+        if filename.startswith(self.name):
+            filename = filename[len(self.name) :]
+        path = os.path.realpath(os.path.join(self.directory, filename.lstrip("/")))
+        if path != self.directory and not path.startswith(self.directory + os.sep):
+            raise PermissionError(f"{filename} is outside of {self.name}")
+        return path
+
+    def listdir(self, filename: str = "") -> List[Tuple[str, bool, os.stat_result]]:
+        """
+        Method to list the files of a flash directory, or a single
+        file, as tuples of name, directory flag and stat. Raises
+        FileNotFoundError if there is no such file or directory.
+
+        :param filename: name of the directory or the file in the flash
+        """
+        path = self.path(filename)
+        if not os.path.isdir(path):
+            return [(os.path.basename(path), False, os.stat(path))]
+        with os.scandir(path) as entries:
+            return sorted((entry.name, entry.is_dir(), entry.stat()) for entry in entries)
+
+    def stat(self, filename: str) -> os.stat_result:
+        """Method to get the stat of a file in the flash"""
+        return os.stat(self.path(filename))
+
+    def used(self) -> int:
+        """Method to get the number of bytes used by the files in the flash"""
+        return sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(self.path()) for name in names
+        )
+
+    def free(self) -> int:
+        """Method to get the number of bytes free in the flash"""
+        return max(self.size - self.used(), 0)
+
+    def chunks(self, filename: str) -> Iterator[memoryview]:
+        """
+        Method to iterate over the content of a file as memoryview
+        slices of a memory map, without copying the file content.
+
+        :param filename: name of the file in the flash
+        """
+        with open(self.path(filename), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    for offset in range(0, len(view), CHUNK_SIZE):
+                        chunk = view[offset : offset + CHUNK_SIZE]
+                        try:
+                            yield chunk
+                        finally:
+                            chunk.release()
+
+    def md5(self, filename: str) -> str:
+        """Method to compute the MD5 checksum of a file in the flash"""
+        digest = hashlib.md5()
+        for chunk in self.chunks(filename):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def open(self, filename: str, mode: str = "rb") -> BinaryIO:
+        """
+        Method to open a file in the flash, creating its
+        directory if the file is opened for writing.
+        """
+        path = self.path(filename)
+        if "r" not in mode:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, mode)  # pylint: disable=unspecified-encoding,consider-using-with
+
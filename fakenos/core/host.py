@@ -4,14 +4,39 @@ It provides the methods to start and stop the server instance for the host.
 It also validates the host object using pydantic.
 """
 
+import asyncio
+import inspect
 import logging
+import os
+import time
+from typing import Optional
 
+from fakenos.core.flash import DEFAULT_FLASH_DIRECTORY, VirtualFlash
 from fakenos.core.pydantic_models import ModelHost
 from fakenos.core.nos import Nos, available_platforms
 
 log = logging.getLogger(__name__)
 
 
+def _accepted_arguments(plugin: type, arguments: dict) -> dict:
+    """
+    Helper function to keep only the keyword arguments the plugin
+    accepts, so plugins written before these arguments were added
+    are still instantiated. All of them are kept if the plugin takes
+    any keyword arguments or its signature cannot be inspected.
+
+    :param plugin: server plugin class
+    :param arguments: optional keyword arguments of the plugin
+    """
+    try:
+        parameters = inspect.signature(plugin).parameters
+    except (TypeError, ValueError):
+        return arguments
+    if any(parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()):
+        return arguments
+    return {name: value for name, value in arguments.items() if name in parameters}
+
+
 class Host:
     """
     Host class to build host instances to use with FakeNOS.
@@ -31,6 +56,8 @@ class Host:
         fakenos,
         platform: str = None,
         configuration_file: str = None,
+        listen: bool = True,
+        flash_directory: str = None,
     ) -> None:
         self.name: str = name
         self.server_inventory: dict = server
@@ -49,6 +76,8 @@ class Host:
         self.nos = None
         self.platform: str = platform
         self.configuration_file: str = configuration_file
+        self.listen: bool = listen
+        self.flash: VirtualFlash = VirtualFlash(os.path.join(flash_directory or DEFAULT_FLASH_DIRECTORY, name))
 
         if self.platform:
             self.nos_inventory["plugin"] = self.platform
@@ -56,7 +85,124 @@ class Host:
         self._validate()
 
     def start(self):
-        """Method to start server instance for this hosts"""
+        """
+        Method to start server instance for this hosts. Hosts
+        which do not listen only load their NOS, so they can
+        be reached through a gateway.
+        """
+        self._init_server()
+        if self.server:
+            self.server.start()
+        self.running = True
+
+    def stop(self):
+        """Method to stop server instance of this host"""
+        if self.server:
+            self.server.stop()
+        self.server = None
+        self.running = False
+
+    def drain(self, grace_period: float = None):
+        """
+        Method to drain the server instance of this host: new
+        connections are refused right away while the sessions in
+        progress carry on, the host stops once they are all done or
+        the grace period expires. It does not block, ``status``
+        shows the progress and ``wait_drained`` waits for the end.
+
+        :param grace_period: seconds to let the sessions finish,
+            waits for as long as needed if None
+        """
+        server = self.server
+        if server is not None and hasattr(server, "drain"):
+            server.drain(grace_period, on_drained=lambda: self._drained(server))
+        else:
+            self.stop()
+
+    def _drained(self, server):
+        """Helper method called once the server is drained"""
+        if self.server is server:
+            self.server = None
+            self.running = False
+        log.info("Host %s drained", self.name)
+
+    def wait_drained(self, timeout: float = None) -> bool:
+        """
+        Method to wait for the host to be drained, returns
+        True if it is drained, False on timeout.
+
+        :param timeout: seconds to wait, waits forever if None
+        """
+        server = self.server
+        if server is not None and hasattr(server, "wait_drained"):
+            server.wait_drained(timeout)
+        return not self.running
+
+    @property
+    def status(self) -> dict:
+        """
+        State of the host, ``running``, ``draining`` or ``stopped``,
+        with the number of sessions in progress and, while draining,
+        the seconds left of the grace period.
+        """
+        server = self.server
+        draining = bool(server is not None and getattr(server, "draining", False))
+        deadline = getattr(server, "drain_deadline", None) if draining else None
+        if draining:
+            state = "draining"
+        else:
+            state = "running" if self.running else "stopped"
+        return {
+            "state": state,
+            "sessions": getattr(server, "active_connections", 0) if server is not None else 0,
+            "grace_remaining": None if deadline is None else max(deadline - time.monotonic(), 0),
+        }
+
+    @property
+    def unix_socket(self) -> Optional[str]:
+        """
+        Path of the Unix-domain socket the host is served on, with
+        ``{name}`` replaced by the host name, None if there is none.
+        """
+        unix_socket = (self.server_inventory.get("configuration") or {}).get("unix_socket")
+        return unix_socket.replace("{name}", self.name) if unix_socket else None
+
+    @property
+    def render_cache_stats(self) -> Optional[dict]:
+        """
+        Statistics of the render cache of the host device, see
+        `RenderCache.stats`, None if the host has no such device.
+        """
+        device = getattr(self.nos, "device", None)
+        render_cache = getattr(device, "render_cache", None)
+        return None if render_cache is None else render_cache.stats()
+
+    async def async_start(self):
+        """
+        Coroutine to start server instance for this host without
+        blocking the event loop. Servers are threaded, so this is a
+        wrapper running ``start`` in the event loop default executor,
+        not an asyncio server.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._init_server)
+        if self.server:
+            await loop.run_in_executor(None, self.server.start)
+        self.running = True
+
+    async def async_stop(self):
+        """
+        Coroutine to stop server instance of this host without
+        blocking the event loop, running ``stop`` of the server
+        in the event loop default executor.
+        """
+        if self.server:
+            await asyncio.get_running_loop().run_in_executor(None, self.server.stop)
+        self.server = None
+        self.running = False
+
+    def _init_server(self):
+        """Helper method to load the plugins and instantiate the server of this host"""
         self.server_plugin = self.fakenos.servers_plugins[self.server_inventory["plugin"]]
         self.shell_plugin = self.fakenos.shell_plugins[self.shell_inventory["plugin"]]
         if self.platform:
@@ -67,6 +213,13 @@ class Host:
             if not isinstance(self.nos_plugin, Nos)
             else self.nos_plugin
         )
+        if self.nos.device is not None:
+            self.nos.device.flash = self.flash
+        if not self.listen:
+            return
+        server_configuration = dict(self.server_inventory["configuration"])
+        if self.unix_socket:
+            server_configuration["unix_socket"] = self.unix_socket
         self.server = self.server_plugin(
             shell=self.shell_plugin,
             shell_configuration=self.shell_inventory["configuration"],
@@ -75,16 +228,12 @@ class Host:
             port=self.port,
             username=self.username,
             password=self.password,
-            **self.server_inventory["configuration"],
+            **_accepted_arguments(
+                self.server_plugin,
+                {"resolve_endpoint": self.fakenos.resolve_endpoint, "flash": self.flash, "name": self.name},
+            ),
+            **server_configuration,
         )
-        self.server.start()
-        self.running = True
-
-    def stop(self):
-        """Method to stop server instance of this host"""
-        self.server.stop()
-        self.server = None
-        self.running = False
 
     def _validate(self):
         """Validate that the host has the required attributes using pydantic"""
@@ -7,13 +7,25 @@ import sys
 
 from typing import Union, Optional, List, Dict, Callable
 
-from pydantic import StrictBool, model_validator, BaseModel, StrictStr, StrictInt, IPvAnyAddress
+from pydantic import (
+    StrictBool,
+    model_validator,
+    BaseModel,
+    StrictStr,
+    StrictInt,
+    IPvAnyAddress,
+    IPvAnyInterface,
+    conint,
+)
 
 if sys.version_info >= (3, 8):
     from typing import Literal  # works with >=py3.8
 else:
     from typing_extensions import Literal  # works with <py3.8I
 
+# stack size of the server threads in bytes, 32 KiB at least as threading requires
+ThreadStackSize = conint(strict=True, ge=32768)
+
 # ---------------------------------------------------------------------------------------
 # NOS plugin commands model
 # ---------------------------------------------------------------------------------------
@@ -29,6 +41,8 @@ class ModelNosCommand(BaseModel):
     prompt: Optional[Union[StrictStr, List[StrictStr]]] = None
     new_prompt: Optional[StrictStr] = None
     alias: Optional[StrictStr] = None
+    arguments: Optional[StrictBool] = None
+    cache: Optional[StrictBool] = None
 
 
 class ModelNosAttributes(BaseModel):
@@ -51,6 +65,7 @@ class ModelHost(BaseModel):
     password: StrictStr
     port: StrictInt
     platform: Optional[StrictStr] = None
+    listen: Optional[StrictBool] = True
 
 
 # ---------------------------------------------------------------------------------------
@@ -82,10 +97,16 @@ class ParamikoSshServerConfig(BaseModel):
 
     ssh_key_file: Optional[StrictStr] = None
     ssh_key_file_password: Optional[StrictStr] = None
+    ssh_key_type: Optional[Literal["ed25519", "ecdsa"]] = None
+    ssh_profile: Optional[Literal["default", "fast", "compressed"]] = "default"
     ssh_banner: Optional[StrictStr] = "FakeNOS Paramiko SSH Server"
     timeout: Optional[StrictInt] = 1
     address: Optional[Union[Literal["localhost"], IPvAnyAddress]] = None
     watchdog_interval: Optional[StrictInt] = 1
+    idle_timeout: Optional[StrictInt] = None
+    absolute_timeout: Optional[StrictInt] = None
+    unix_socket: Optional[StrictStr] = None
+    thread_stack_size: Optional[Union[Literal[0], ThreadStackSize]] = None
 
 
 class ParamikoSshServerPlugin(BaseModel):
@@ -97,6 +118,63 @@ class ParamikoSshServerPlugin(BaseModel):
     configuration: Optional[ParamikoSshServerConfig] = None
 
 
+class TelnetServerConfig(BaseModel):
+    """
+    Pydantic model for Telnet server configuration.
+    """
+
+    telnet_banner: Optional[StrictStr] = "FakeNOS Telnet Server"
+    timeout: Optional[StrictInt] = 1
+    address: Optional[Union[Literal["localhost"], IPvAnyAddress]] = None
+    login_attempts: Optional[StrictInt] = 3
+    idle_timeout: Optional[StrictInt] = None
+    absolute_timeout: Optional[StrictInt] = None
+    unix_socket: Optional[StrictStr] = None
+    thread_stack_size: Optional[Union[Literal[0], ThreadStackSize]] = None
+
+
+class TelnetServerPlugin(BaseModel):
+    """
+    Pydantic model for Telnet server plugin.
+    """
+
+    plugin: Literal["TelnetServer"]
+    configuration: Optional[TelnetServerConfig] = None
+
+
+class ParamikoSshGatewayConfig(BaseModel):
+    """
+    Pydantic model for Paramiko SSH gateway configuration.
+    """
+
+    username: Optional[StrictStr] = None
+    password: Optional[StrictStr] = None
+    ssh_key_file: Optional[StrictStr] = None
+    ssh_key_file_password: Optional[StrictStr] = None
+    ssh_key_type: Optional[Literal["ed25519", "ecdsa"]] = None
+    ssh_profile: Optional[Literal["default", "fast", "compressed"]] = "default"
+    ssh_banner: Optional[StrictStr] = "FakeNOS Paramiko SSH Gateway"
+    timeout: Optional[StrictInt] = 1
+    address: Optional[Union[Literal["localhost"], IPvAnyAddress]] = None
+    watchdog_interval: Optional[StrictInt] = 1
+    idle_timeout: Optional[StrictInt] = None
+    absolute_timeout: Optional[StrictInt] = None
+    separator: Optional[StrictStr] = "@"
+    environment_variable: Optional[StrictStr] = "FAKENOS_HOST"
+    unix_socket: Optional[StrictStr] = None
+    thread_stack_size: Optional[Union[Literal[0], ThreadStackSize]] = None
+
+
+class ParamikoSshGatewayPlugin(BaseModel):
+    """
+    Pydantic model for Paramiko SSH gateway plugin.
+    """
+
+    plugin: Literal["ParamikoSshGateway"]
+    port: StrictInt
+    configuration: Optional[ParamikoSshGatewayConfig] = None
+
+
 class CMDShellConfig(BaseModel):
     """
     Pydantic model for CMD shell configuration.
@@ -106,6 +184,8 @@ class CMDShellConfig(BaseModel):
     ruler: Optional[StrictStr] = ""
     completekey: Optional[StrictStr] = "tab"
     newline: Optional[StrictStr] = "\r\n"
+    terminal_length: Optional[StrictInt] = 0
+    terminal_width: Optional[StrictInt] = 0
 
 
 class CMDShellPlugin(BaseModel):
@@ -131,7 +211,9 @@ class InventoryDefaultSection(BaseModel):
     # https://github.com/mkdocstrings/griffe/issues/66
     port: Optional[Union[StrictInt, List[StrictInt]]] = None
     configuration_file: Optional[StrictStr] = None
-    server: Optional[Union[ParamikoSshServerPlugin]] = None
+    listen: Optional[StrictBool] = None
+    flash_directory: Optional[StrictStr] = None
+    server: Optional[Union[ParamikoSshServerPlugin, TelnetServerPlugin]] = None
     shell: Optional[Union[CMDShellPlugin]] = None
     nos: Optional[NosPlugin] = None
 
@@ -145,6 +227,7 @@ class HostConfig(InventoryDefaultSection):
     # use this for now, mkdocstring having issue with pydantic
     # https://github.com/mkdocstrings/griffe/issues/66
     replicas: Optional[StrictInt] = None
+    address_range: Optional[IPvAnyInterface] = None
 
     @model_validator(mode="before")
     @classmethod
@@ -155,7 +238,7 @@ class HostConfig(InventoryDefaultSection):
         port = values.get("port")
         if "replicas" not in values and port:
             assert isinstance(port, int), "If no host 'replicas' given, port must be an integer"
-        elif "replicas" in values and port:
+        elif "replicas" in values and port and "address_range" not in values:
             assert isinstance(port, list), "If host 'replicas' given, port must be a list"
         return values
 
@@ -165,6 +248,7 @@ class ModelFakenosInventory(BaseModel):
 
     default: Optional[InventoryDefaultSection] = None
     hosts: Dict[StrictStr, HostConfig]
+    gateway: Optional[ParamikoSshGatewayPlugin] = None
 
     # pylint: disable=too-few-public-methods
     class ConfigDict:
@@ -0,0 +1,125 @@
+"""
+This module implements the cache of the outputs rendered by the
+devices, like the running configuration rendered from a template,
+so polling the same commands over and over renders them only once
+per state of the device.
+
+Entries are keyed by the command, its parameters and the version of
+the device state, which the device bumps whenever its state changes,
+so outdated entries are never returned and age out of the cache. The
+least recently used entries are evicted once the cache holds too many
+entries or too many characters.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, Iterator, Optional
+
+DEFAULT_MAX_ENTRIES: int = 256
+DEFAULT_MAX_SIZE: int = 16 * 1024 * 1024
+
+
+class StreamedOutput(str):
+    """
+    Output cached from a stream of chunks, it must be written back
+    as it was streamed, not processed as the string outputs are.
+    """
+
+
+class RenderCache:
+    """
+    RenderCache class is a thread safe LRU cache of rendered outputs,
+    bounded by the number of entries and by their total size in characters.
+
+    :param max_entries: maximum number of entries
+    :param max_size: maximum total size of the entries in characters,
+        outputs larger than that are not cached
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.max_entries: int = max_entries
+        self.max_size: int = max_size
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        Method to get the output cached for the key, None if there is none.
+
+        :param key: key of the output
+        """
+        with self._lock:
+            output = self._entries.get(key)
+            if output is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return output
+
+    def put(self, key: Hashable, output: str) -> None:
+        """
+        Method to cache the output for the key, evicting the least
+        recently used outputs if needed.
+
+        :param key: key of the output
+        :param output: rendered output
+        """
+        if len(output) > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = output
+            self.size += len(output)
+            while len(self._entries) > self.max_entries or self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def tee(self, key: Hashable, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Method to pass the chunks of a streamed output through, caching
+        the output as a ``StreamedOutput`` once all the chunks are produced.
+        Chunks are only kept while they fit in the cache, so larger outputs
+        are streamed as they are and not cached.
+
+        :param key: key of the output
+        :param chunks: chunks of the output
+        """
+        kept = []
+        size = 0
+        for chunk in chunks:
+            if kept is not None:
+                size += len(chunk)
+                if size > self.max_size:
+                    kept = None
+                else:
+                    kept.append(chunk)
+            yield chunk
+        if kept is not None:
+            self.put(key, StreamedOutput("".join(kept)))
+
+    def clear(self) -> None:
+        """Method to drop all the cached outputs"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Method to get the number of hits, misses and evictions and the entries and size held"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_entries": self.max_entries,
+                "max_size": self.max_size,
+            }
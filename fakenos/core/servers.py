@@ -6,13 +6,51 @@ look for fakenos/plugins/servers/ssh_server_paramiko.py
 
 # pylint: disable=no-name-in-module
 from abc import ABC, abstractmethod
+import ipaddress
+import os
+import stat
 import sys
 import socket
 import threading
+import time
 import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
 
 log = logging.getLogger(__name__)
 
+_stack_size_lock = threading.Lock()
+
+# smallest stack size threading accepts, in bytes
+MIN_THREAD_STACK_SIZE: int = 32768
+
+# Linux options to bind addresses not configured on any interface,
+# not exported by the socket module of every Python version
+IP_FREEBIND: int = getattr(socket, "IP_FREEBIND", 15)
+IPV6_FREEBIND: int = getattr(socket, "IPV6_FREEBIND", 78)
+
+
+@contextmanager
+def thread_stack(size: Optional[int] = None) -> Iterator[None]:
+    """
+    Context manager to start threads with the given stack size
+    instead of the default of the platform, usually 8 MiB. The
+    stack size is process wide, so it is restored on exit and
+    changes are serialized between the servers.
+
+    :param size: stack size in bytes, at least 32 KiB, the default
+        is kept if None or 0
+    """
+    if not size:
+        yield
+        return
+    with _stack_size_lock:
+        previous = threading.stack_size(size)
+        try:
+            yield
+        finally:
+            threading.stack_size(previous)
+
 
 # pylint: disable=too-many-instance-attributes
 class TCPServerBase(ABC):
@@ -24,19 +62,35 @@ class TCPServerBase(ABC):
     the standard library in python.
     """
 
-    def __init__(self, address="localhost", port=6000, timeout=1):
+    # pylint: disable=too-many-arguments
+    def __init__(self, address="localhost", port=6000, timeout=1, unix_socket=None, thread_stack_size=None):
         """
         Initialize the server with the address and port
-        and the timeout for the socket.
+        and the timeout for the socket. If ``unix_socket`` is
+        given, the server listens on that Unix-domain socket
+        path instead of the address and port. Connection threads
+        are started with ``thread_stack_size`` bytes of stack,
+        at least 32 KiB, or the default of the platform if None or 0.
         """
+        if thread_stack_size and thread_stack_size < MIN_THREAD_STACK_SIZE:
+            raise ValueError(
+                f"thread_stack_size must be at least {MIN_THREAD_STACK_SIZE} bytes, got {thread_stack_size}"
+            )
         self.address = address
         self.port = port
         self.timeout = timeout
+        self.unix_socket = unix_socket
+        self.thread_stack_size = thread_stack_size
         self._is_running = threading.Event()
         self._socket = None
         self.client_shell = None
         self._listen_thread = None
         self._connection_threads = []
+        # held to change the list of connection threads
+        self._connection_threads_lock = threading.Lock()
+        self._drain_thread = None
+        self.draining = False
+        self.drain_deadline = None
 
     def start(self):
         """
@@ -49,7 +103,13 @@ class TCPServerBase(ABC):
 
         self._is_running.set()
 
-        self._bind_sockets()
+        try:
+            self._bind_sockets()
+        except Exception:
+            self._is_running.clear()
+            if self._socket is not None:
+                self._socket.close()
+            raise
 
         self._listen_thread = threading.Thread(target=self._listen)
         self._listen_thread.start()
@@ -58,16 +118,62 @@ class TCPServerBase(ABC):
         """
         It binds the sockets to the corresponding IPs and Ports.
         In Linux and OSX it reuses the port if needed but
-        not in Windows
+        not in Windows. IPv6 addresses are bound using IPv6 sockets,
+        the unspecified address ``::`` accepts IPv4 clients as well.
+        The socket starts listening right after binding, so
+        the accept loop does not need to do it on every iteration.
+        In Linux addresses not configured on any interface, like the
+        addresses of an IPv6 ``address_range``, are bound as well,
+        clients reach them once they are routed to the host.
         """
-        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.unix_socket:
+            self._bind_unix_socket()
+            return
+
+        family = socket.AF_INET6 if ":" in str(self.address) else socket.AF_INET
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
         self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
 
         if sys.platform in ["linux"]:
             self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, True)
 
+        if family == socket.AF_INET6 and ipaddress.ip_address(str(self.address)).is_unspecified:
+            self._socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, False)
+
+        if sys.platform in ["linux"]:
+            self._set_freebind(family)
+
         self._socket.settimeout(self.timeout)
-        self._socket.bind((self.address, self.port))
+        self._socket.bind((str(self.address), self.port))
+        self._socket.listen()
+
+    def _set_freebind(self, family: int):
+        """
+        It allows the socket to bind addresses not configured on
+        any interface, kernels older than 4.15 only have the IPv4
+        option, which applies to IPv6 sockets as well.
+        """
+        if family == socket.AF_INET6:
+            try:
+                self._socket.setsockopt(socket.IPPROTO_IPV6, IPV6_FREEBIND, True)
+                return
+            except OSError:
+                pass
+        self._socket.setsockopt(socket.IPPROTO_IP, IP_FREEBIND, True)
+
+    def _bind_unix_socket(self):
+        """
+        It binds the Unix-domain socket, replacing any stale socket
+        left at the same path. Raises FileExistsError if there is a
+        file other than a socket at the path, it is not removed.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.unix_socket)), exist_ok=True)
+        self._unlink_unix_socket()
+        # pylint: disable=no-member
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.bind(self.unix_socket)
+        self._socket.listen()
 
     def stop(self):
         """
@@ -78,11 +184,96 @@ class TCPServerBase(ABC):
             return
 
         self._is_running.clear()
+        self._close_listener()
+
+        for connection_thread in self._get_connection_threads():
+            connection_thread.join()
+        self.draining = False
+
+    def _close_listener(self):
+        """
+        It stops accepting connections and closes the listening
+        socket. TCP sockets are shut down first, so the listening
+        thread wakes up right away instead of on the next timeout.
+        """
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
         self._listen_thread.join()
         self._socket.close()
+        if self.unix_socket:
+            self._unlink_unix_socket()
 
-        for connection_thread in self._connection_threads:
-            connection_thread.join()
+    def _unlink_unix_socket(self):
+        """
+        It removes the Unix-domain socket file, if any, raising
+        FileExistsError if the path is not a socket.
+        """
+        try:
+            path_stat = os.lstat(self.unix_socket)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(path_stat.st_mode):
+            raise FileExistsError(f"{self.unix_socket} exists and is not a socket")
+        os.unlink(self.unix_socket)
+
+    def _get_connection_threads(self) -> list:
+        """Helper method to get a copy of the list of connection threads"""
+        with self._connection_threads_lock:
+            return list(self._connection_threads)
+
+    @property
+    def active_connections(self) -> int:
+        """Number of connections still being served"""
+        return sum(1 for thread in self._get_connection_threads() if thread.is_alive())
+
+    def drain(self, grace_period: Optional[float] = None, on_drained: Callable = None):
+        """
+        It stops accepting new connections right away and lets the
+        connections being served finish on their own. Once they are
+        all done, or the grace period expires, the server is stopped,
+        ending the remaining sessions, and ``on_drained`` is called.
+        It does not block, use ``wait_drained`` to wait for the end.
+
+        :param grace_period: seconds to wait for the connections to
+            finish, waits for as long as needed if None
+        :param on_drained: callable to call once the server is stopped
+        """
+        if not self._is_running.is_set() or self.draining:
+            return
+        self.draining = True
+        self.drain_deadline = None if grace_period is None else time.monotonic() + grace_period
+        self._close_listener()
+        self._drain_thread = threading.Thread(target=self._drain, args=(on_drained,))
+        self._drain_thread.start()
+
+    def _drain(self, on_drained: Callable = None):
+        """
+        It waits for the connections to finish until the grace
+        period expires and stops the server.
+        """
+        for connection_thread in self._get_connection_threads():
+            if self.drain_deadline is None:
+                connection_thread.join()
+            else:
+                connection_thread.join(max(self.drain_deadline - time.monotonic(), 0))
+        if self.active_connections:
+            log.info("Grace period expired, closing %s connections on port %s", self.active_connections, self.port)
+        self.stop()
+        if on_drained is not None:
+            on_drained()
+
+    def wait_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        It waits for the server to be drained, returns
+        True if it is drained, False on timeout.
+
+        :param timeout: seconds to wait, waits forever if None
+        """
+        if self._drain_thread is not None:
+            self._drain_thread.join(timeout)
+        return not self._is_running.is_set()
 
     def _listen(self):
         """
@@ -90,10 +281,13 @@ class TCPServerBase(ABC):
         It waits for a connection, and if a connection is made, it will
         call the connection function.
         """
-        while self._is_running.is_set():
+        while self._is_running.is_set() and not self.draining:
             try:
-                self._socket.listen()
                 client, _ = self._socket.accept()
+                # prompts and echoes are small writes waiting for the
+                # client, they must not be delayed by Nagle's algorithm
+                if client.family in (socket.AF_INET, socket.AF_INET6):
+                    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
                 connection_thread = threading.Thread(
                     target=self.connection_function,
                     args=(
@@ -101,10 +295,19 @@ class TCPServerBase(ABC):
                         self._is_running,
                     ),
                 )
-                connection_thread.start()
-                self._connection_threads.append(connection_thread)
+                with thread_stack(self.thread_stack_size):
+                    connection_thread.start()
+                with self._connection_threads_lock:
+                    # threads of the connections closed already are not kept
+                    self._connection_threads = [thread for thread in self._connection_threads if thread.is_alive()]
+                    self._connection_threads.append(connection_thread)
             except socket.timeout:
                 pass
+            except OSError as e:
+                # the listening socket is shut down when the server stops
+                if self._is_running.is_set() and not self.draining:
+                    log.error("Server on port %s failed to accept a connection: %s", self.port, e)
+                    time.sleep(0.1)
 
     @abstractmethod
     def connection_function(self, client, is_running):
@@ -0,0 +1,60 @@
+"""
+This module implements helpers shared by the core and the plugins
+of FakeNOS to keep their files on disk.
+
+Files are kept by default in the system temporary directory, which
+every user can write to, so FakeNOS keeps them in a directory of its
+own per user that only that user can access, and checks that nobody
+else created or changed the directories on the way.
+"""
+
+import os
+import stat
+import tempfile
+
+_getuid = getattr(os, "getuid", None)  # not available on Windows
+
+DEFAULT_DIRECTORY: str = os.path.join(
+    tempfile.gettempdir(), f"fakenos-{_getuid()}" if _getuid is not None else "fakenos"
+)
+
+
+def check_owner(path_stat: os.stat_result, path: str) -> None:
+    """
+    Function to check that a file or directory belongs to the current
+    user, raises PermissionError otherwise.
+
+    :param path_stat: stat of the file, not following symbolic links
+    :param path: OS path of the file, for the error message
+    """
+    if _getuid is not None and path_stat.st_uid != _getuid():
+        raise PermissionError(f"{path} is not owned by the current user")
+
+
+def private_directory(path: str) -> str:
+    """
+    Function to create a directory only the current user can access,
+    missing parent directories included. Existing directories must be
+    owned by the current user and not be symbolic links, they are made
+    private if they are not. Directories inside the system temporary
+    directory are all checked up to it, as other users can create them.
+    Raises PermissionError if a directory fails the checks.
+
+    :param path: OS path to the directory
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    temp_directory = os.path.abspath(tempfile.gettempdir())
+    if parent != path and (not os.path.isdir(parent) or parent.startswith(temp_directory + os.sep)):
+        private_directory(parent)
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    path_stat = os.lstat(path)
+    if not stat.S_ISDIR(path_stat.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    check_owner(path_stat, path)
+    if _getuid is not None and stat.S_IMODE(path_stat.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
@@ -0,0 +1,207 @@
+"""
+This module implements the watchdog supervising the sessions of all
+the servers of the process. Instead of one polling thread per session,
+a single thread drives a hashed timer wheel: every session is placed
+in the slot of its next deadline, so each tick only looks at the
+sessions due at that time. The thread only runs while there are
+sessions to supervise.
+
+On every check the session is closed if it is dead, if it has been
+idle for longer than its idle timeout, or if it has been open for
+longer than its absolute timeout, like the ``exec-timeout`` and
+``absolute-timeout`` line settings of real devices.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TICK: float = 0.1
+DEFAULT_SLOTS: int = 512
+
+
+class WatchedSession:
+    """
+    WatchedSession class holds the state of a session supervised by
+    the watchdog. Servers call ``touch`` on client activity and
+    ``cancel`` once the session ends on its own.
+
+    :param name: name of the session used in the logs
+    :param is_alive: callable returning False once the session is dead
+    :param close: callable closing the session, it must not block
+    :param interval: seconds between the liveness checks
+    :param idle_timeout: seconds without activity before the session
+        is closed, disabled if None or 0
+    :param absolute_timeout: seconds before the session is closed
+        regardless of activity, disabled if None or 0
+    :param on_cancel: callable called with the session once cancelled
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        name: str,
+        is_alive: Callable[[], bool],
+        close: Callable[[], None],
+        interval: float = 1,
+        idle_timeout: Optional[float] = None,
+        absolute_timeout: Optional[float] = None,
+        on_cancel: Callable = None,
+    ) -> None:
+        self.name: str = name
+        self.is_alive: Callable[[], bool] = is_alive
+        self.close: Callable[[], None] = close
+        self.interval: float = interval
+        self.idle_timeout: Optional[float] = idle_timeout
+        self.absolute_timeout: Optional[float] = absolute_timeout
+        self.started: float = time.monotonic()
+        self.last_activity: float = self.started
+        self.on_cancel: Callable = on_cancel
+        self.cancelled: bool = False
+        self.closed_reason: Optional[str] = None
+        self.deadline_tick: int = 0
+
+    def touch(self) -> None:
+        """Method to record client activity, resetting the idle timeout"""
+        self.last_activity = time.monotonic()
+
+    def cancel(self) -> None:
+        """Method to stop supervising the session"""
+        self.cancelled = True
+        if self.on_cancel is not None:
+            self.on_cancel(self)
+
+    def check(self, now: float) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Method to check the session, returns the reason to close it
+        or None and the number of seconds until the next check.
+
+        :param now: current monotonic time
+        """
+        if not self.is_alive():
+            return "dead", None
+        if self.absolute_timeout and now - self.started >= self.absolute_timeout:
+            return "absolute timeout", None
+        if self.idle_timeout and now - self.last_activity >= self.idle_timeout:
+            return "idle timeout", None
+        delay = self.interval
+        if self.absolute_timeout:
+            delay = min(delay, self.started + self.absolute_timeout - now)
+        if self.idle_timeout:
+            delay = min(delay, self.last_activity + self.idle_timeout - now)
+        return None, delay
+
+
+class Watchdog:
+    """
+    Watchdog class supervises sessions with a single thread driving
+    a hashed timer wheel, the thread starts with the first session.
+
+    :param tick: seconds between the timer wheel ticks
+    :param slots: number of slots of the timer wheel
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK, slots: int = DEFAULT_SLOTS) -> None:
+        self.tick: float = tick
+        self.slots: List[List[WatchedSession]] = [[] for _ in range(slots)]
+        self.sessions: Set[WatchedSession] = set()
+        self._current_tick: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # pylint: disable=too-many-arguments
+    def watch(
+        self,
+        name: str,
+        is_alive: Callable[[], bool],
+        close: Callable[[], None],
+        interval: float = 1,
+        idle_timeout: Optional[float] = None,
+        absolute_timeout: Optional[float] = None,
+    ) -> WatchedSession:
+        """
+        Method to start supervising a session, see WatchedSession
+        for the parameters. Returns the WatchedSession object, which
+        is not supervised if the interval and the timeouts are all
+        disabled.
+        """
+        session = WatchedSession(name, is_alive, close, interval, idle_timeout, absolute_timeout, self._cancel)
+        delay = min((timeout for timeout in (interval, idle_timeout, absolute_timeout) if timeout), default=None)
+        if delay is None:
+            return session
+        with self._condition:
+            self._schedule(session, delay)
+            self.sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fakenos-watchdog", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return session
+
+    def _cancel(self, session: WatchedSession) -> None:
+        """Helper method to forget a cancelled session right away"""
+        with self._condition:
+            self.sessions.discard(session)
+            self._condition.notify()
+
+    def _schedule(self, session: WatchedSession, delay: float) -> None:
+        """Helper method to place the session in the slot of its next check"""
+        session.deadline_tick = self._current_tick + max(1, math.ceil(delay / self.tick))
+        self.slots[session.deadline_tick % len(self.slots)].append(session)
+
+    def _run(self) -> None:
+        """Helper method running the timer wheel"""
+        next_tick = time.monotonic() + self.tick
+        while True:
+            with self._condition:
+                # the thread ends with the last session, so it is not
+                # left running once all the servers are stopped
+                if not self.sessions:
+                    self._thread = None
+                    return
+                timeout = next_tick - time.monotonic()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                self._current_tick += 1
+                next_tick += self.tick
+                due = self._take_due()
+            self._check_due(due)
+
+    def _take_due(self) -> List[WatchedSession]:
+        """Helper method to take the sessions due at the current tick out of the wheel"""
+        slot = self.slots[self._current_tick % len(self.slots)]
+        due = [
+            session for session in slot if session.deadline_tick <= self._current_tick and session in self.sessions
+        ]
+        slot[:] = [session for session in slot if session.deadline_tick > self._current_tick and session in self.sessions]
+        return due
+
+    def _check_due(self, due: List[WatchedSession]) -> None:
+        """Helper method to check the due sessions, closing or rescheduling them"""
+        now = time.monotonic()
+        for session in due:
+            try:
+                reason, delay = session.check(now)
+            except Exception as e:  # pylint: disable=broad-except
+                log.error("Watchdog failed to check session %s: %s", session.name, e)
+                reason, delay = "check failed", None
+            if reason:
+                session.closed_reason = reason
+                log.info("Watchdog closing session %s: %s", session.name, reason)
+                try:
+                    session.close()
+                except Exception as e:  # pylint: disable=broad-except
+                    log.error("Watchdog failed to close session %s: %s", session.name, e)
+            with self._condition:
+                if delay is None:
+                    self.sessions.discard(session)
+                elif session in self.sessions:
+                    self._schedule(session, delay)
+
+
+watchdog: Watchdog = Watchdog()
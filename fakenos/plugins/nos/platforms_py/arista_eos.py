@@ -38,7 +38,7 @@ class AristaEOS(BaseDevice):
 
     def make_running_configuration(self, base_prompt, current_prompt, command):
         """Return the running configuration."""
-        return self.render("arista_eos/show_running-config.j2", base_prompt=base_prompt)
+        return self.render_stream("arista_eos/show_running-config.j2", base_prompt=base_prompt)
 
     def make_show_ip_int_br(self, base_prompt, current_prompt, command):
         """Return the IP interface brief output."""
@@ -46,7 +46,7 @@ class AristaEOS(BaseDevice):
 
     def make_show_running_config(self, base_prompt, current_prompt, command):
         """Return the running configuration."""
-        return self.render("arista_eos/show_running-config.j2", base_prompt=base_prompt)
+        return self.render_stream("arista_eos/show_running-config.j2", base_prompt=base_prompt)
 
     def make_show_version(self, base_prompt, current_prompt, command):
         """Return the system version."""
@@ -69,11 +69,13 @@ commands = {
         "output": AristaEOS.make_show_running_config,
         "help": "System running configuration",
         "prompt": ENABLE_PROMPT,
+        "cache": True,
     },
     "show version": {
         "output": AristaEOS.make_show_version,
         "help": "Software and hardware versions",
         "prompt": ENABLE_PROMPT,
+        "cache": True,
     },
     "_default_": {
         "output": "% Invalid input",
@@ -98,11 +100,13 @@ commands = {
         "output": AristaEOS.make_show_ip_int_br,
         "help": "Condensed output",
         "prompt": [ENABLE_PROMPT, INITIAL_PROMPT],
+        "cache": True,
     },
     "show ip interface brief": {
         "output": AristaEOS.make_show_ip_int_br,
         "help": "Condensed output",
         "prompt": [ENABLE_PROMPT, INITIAL_PROMPT],
+        "cache": True,
     },
     "conf t": {
         "prompt": ENABLE_PROMPT,
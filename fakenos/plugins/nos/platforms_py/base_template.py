@@ -6,21 +6,46 @@ generally common to all devices.
 """
 
 from abc import ABC
+from typing import Iterator
 
 from jinja2 import Environment, PackageLoader, Template, select_autoescape
 import yaml
 
+from fakenos.core.render_cache import RenderCache
+
 
 class BaseDevice(ABC):
     """Interface for all devices."""
 
     def __init__(self, configuration_file: str) -> None:
+        self.flash = None  # VirtualFlash of the host, set by the host
+        self.state_version: int = 0
+        self.render_cache: RenderCache = RenderCache()
         self.configurations = self.load_configurations(configuration_file)
         self.env = Environment(
             loader=PackageLoader("fakenos.plugins.nos.platforms_py", "templates"),
             autoescape=select_autoescape(["j2"]),
         )
 
+    @property
+    def configurations(self) -> dict:
+        """Configurations of the device."""
+        return self._configurations
+
+    @configurations.setter
+    def configurations(self, value: dict) -> None:
+        self._configurations = value
+        self.bump_state_version()
+
+    def bump_state_version(self) -> None:
+        """
+        Bump the version of the device state, so the outputs cached for
+        the previous state are not used anymore. Replacing the
+        configurations bumps it, methods changing the device state
+        in place must call it.
+        """
+        self.state_version += 1
+
     def load_configurations(self, configuration_file: str) -> dict:
         """
         Load configurations from a file.
@@ -46,3 +71,12 @@ class BaseDevice(ABC):
         """Render a template."""
         template = self.env.get_template(template)
         return template.render(**kwargs)
+
+    def render_stream(self, template: str, **kwargs) -> Iterator[str]:
+        """
+        Render a template chunk by chunk, for large outputs. Commands
+        can return the chunks and the shell writes them as they are
+        rendered, so the whole output is never held in memory.
+        """
+        template = self.env.get_template(template)
+        return template.generate(**kwargs)
@@ -2,6 +2,7 @@
 NOS module for Cisco IOS
 """
 
+import os
 import time
 
 from fakenos.plugins.nos.platforms_py.base_template import BaseDevice
@@ -28,13 +29,43 @@ class CiscoIOS(BaseDevice):
         return time.strftime("*%H:%M:%S.000 %Z %a %b %d %Y")
 
     def make_show_running_config(self, base_prompt, current_prompt, command):
-        "Return String of running configuration"
-        return self.render("cisco_ios/show_running-config.j2", base_prompt=base_prompt)
+        "Return chunks of running configuration"
+        return self.render_stream("cisco_ios/show_running-config.j2", base_prompt=base_prompt)
 
     def make_show_version(self, base_prompt, current_prompt, command):
         "Return String of system hardware and software status"
         return self.render("cisco_ios/show_version.j2", base_prompt=base_prompt)
 
+    def make_dir(self, base_prompt, current_prompt, command):
+        "Return String of the flash directory or file listing"
+        args = command.split()[1:]
+        filename = args[0] if args else "flash:"
+        try:
+            entries = self.flash.listdir(filename)
+        except (AttributeError, OSError):
+            return f"%Error opening {filename} (No such file or directory)"
+        rows = [
+            f"{index:>6}  {'d' if is_dir else '-'}rw-  {stat.st_size:>12}  "
+            f"{time.strftime('%b %d %Y %H:%M:%S +00:00', time.gmtime(stat.st_mtime))}  {name}"
+            for index, (name, is_dir, stat) in enumerate(entries, start=1)
+        ]
+        if os.path.isdir(self.flash.path(filename)):
+            filename = filename.rstrip("/") + "/"
+        return self.render(
+            "cisco_ios/dir.j2", directory=filename, rows=rows, size=self.flash.size, free=self.flash.free()
+        )
+
+    def make_verify_md5(self, base_prompt, current_prompt, command):
+        "Return String of the MD5 checksum of a flash file"
+        args = command.split()[2:]
+        if not args:
+            return "% Incomplete command."
+        try:
+            checksum = self.flash.md5(args[0])
+        except (AttributeError, OSError):
+            return f"%Error opening {args[0]} (No such file or directory)"
+        return self.render("cisco_ios/verify_md5.j2", filename=args[0], checksum=checksum)
+
 
 commands = {
     "enable": {
@@ -52,11 +83,25 @@ commands = {
         "output": CiscoIOS.make_show_running_config,
         "help": "Current operating configuration",
         "prompt": ENABLE_PROMPT,
+        "cache": True,
     },
     "show version": {
         "output": CiscoIOS.make_show_version,
         "help": "System hardware and software status",
         "prompt": ENABLE_PROMPT,
+        "cache": True,
+    },
+    "dir": {
+        "output": CiscoIOS.make_dir,
+        "help": "List files on a filesystem",
+        "prompt": [INITIAL_PROMPT, ENABLE_PROMPT],
+        "arguments": True,
+    },
+    "verify /md5": {
+        "output": CiscoIOS.make_verify_md5,
+        "help": "Compute the MD5 checksum of a file",
+        "prompt": ENABLE_PROMPT,
+        "arguments": True,
     },
     "_default_": {
         "output": "% Invalid input detected at '^' marker.",
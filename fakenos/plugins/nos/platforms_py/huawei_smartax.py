@@ -67,5 +67,6 @@ commands = {
         "output": HuaweiSmartAX.make_display_board,
         "help": "display board information",
         "prompt": [INITIAL_PROMPT, ENABLE_PROMPT],
+        "cache": True,
     },
 }
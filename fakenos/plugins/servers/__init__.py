@@ -4,5 +4,11 @@ This module is the point of entry for server plugins in FakeNOS.
 """
 
 from .ssh_server_paramiko import ParamikoSshServer
+from .ssh_gateway_paramiko import ParamikoSshGateway
+from .telnet_server import TelnetServer
 
-servers_plugins = {"ParamikoSshServer": ParamikoSshServer}
+servers_plugins = {
+    "ParamikoSshServer": ParamikoSshServer,
+    "ParamikoSshGateway": ParamikoSshGateway,
+    "TelnetServer": TelnetServer,
+}
@@ -0,0 +1,245 @@
+"""
+This module implements the SFTP subsystem and the SCP command of
+the paramiko SSH server, both backed by the virtual flash of the host.
+
+Downloads are served from memory maps of the files, so file content
+is handed to the SSH channel without intermediate copies. True
+sendfile is not possible as the SSH transport encrypts every packet.
+Uploads are streamed to disk in chunks as they arrive.
+"""
+
+import logging
+import mmap
+import os
+import shlex
+
+import paramiko
+
+from fakenos.core.flash import CHUNK_SIZE, VirtualFlash
+
+log = logging.getLogger(__name__)
+
+
+def _sftp_error(e: OSError) -> int:
+    """Helper function to convert exceptions to SFTP error codes"""
+    if e.errno is None:
+        return paramiko.SFTP_PERMISSION_DENIED
+    return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class FlashSFTPHandle(paramiko.SFTPHandle):
+    """
+    Class to implement the SFTP file handle, files opened
+    for reading are served from a memory map of the file.
+    """
+
+    def __init__(self, f, flags: int = 0):
+        super().__init__(flags)
+        self.mmap = None
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            self.writefile = f
+            self.readfile = f if flags & os.O_RDWR else None
+        else:
+            self.readfile = f
+            if os.fstat(f.fileno()).st_size:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, offset, length):
+        if self.mmap is None:
+            return super().read(offset, length)
+        return self.mmap[offset : offset + length]
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat((self.readfile or self.writefile).fileno()))
+        except OSError as e:
+            return _sftp_error(e)
+
+    def chattr(self, attr):
+        return paramiko.SFTP_OK
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+        super().close()
+
+
+class FlashSFTPServerInterface(paramiko.SFTPServerInterface):
+    """
+    Class to implement the SFTP server interface on top of the
+    virtual flash, the root of the SFTP tree is the flash root.
+
+    :param server: paramiko server interface of the session
+    :param flash: virtual flash of the host
+    """
+
+    def __init__(self, server, flash: VirtualFlash, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.flash: VirtualFlash = flash
+
+    def canonicalize(self, path):
+        try:
+            relative = os.path.relpath(self.flash.path(path), self.flash.directory)
+        except OSError:
+            return "/"
+        return "/" if relative == "." else "/" + relative.replace(os.sep, "/")
+
+    def list_folder(self, path):
+        try:
+            return [
+                paramiko.SFTPAttributes.from_stat(stat, name) for name, _, stat in self.flash.listdir(path)
+            ]
+        except OSError as e:
+            return _sftp_error(e)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(self.flash.stat(path))
+        except OSError as e:
+            return _sftp_error(e)
+
+    def lstat(self, path):
+        return self.stat(path)
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self.flash.path(path), flags | getattr(os, "O_BINARY", 0), 0o644)
+        except OSError as e:
+            return _sftp_error(e)
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+        return FlashSFTPHandle(os.fdopen(fd, mode), flags)
+
+    def remove(self, path):
+        try:
+            os.remove(self.flash.path(path))
+        except OSError as e:
+            return _sftp_error(e)
+        return paramiko.SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            os.rename(self.flash.path(oldpath), self.flash.path(newpath))
+        except OSError as e:
+            return _sftp_error(e)
+        return paramiko.SFTP_OK
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self.flash.path(path))
+        except OSError as e:
+            return _sftp_error(e)
+        return paramiko.SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(self.flash.path(path))
+        except OSError as e:
+            return _sftp_error(e)
+        return paramiko.SFTP_OK
+
+    def chattr(self, path, attr):
+        return paramiko.SFTP_OK
+
+
+def serve_scp(channel: paramiko.Channel, flash: VirtualFlash, command: str) -> int:
+    """
+    Function to serve the remote end of an ``scp -t`` (upload) or
+    ``scp -f`` (download) command of a single file. Returns the
+    exit status of the command.
+
+    :param channel: exec channel of the command
+    :param flash: virtual flash of the host
+    :param command: scp command line sent by the client
+    """
+    args = shlex.split(command)[1:]
+    options = "".join(arg[1:] for arg in args if arg.startswith("-"))
+    paths = [arg for arg in args if not arg.startswith("-")]
+    stdin = channel.makefile("rb")
+    if "r" in options or len(paths) != 1:
+        channel.sendall(b"\x01scp: only single file transfers are supported\n")
+        return 1
+    try:
+        if "t" in options:
+            return _scp_sink(channel, stdin, flash, paths[0])
+        if "f" in options:
+            return _scp_source(channel, stdin, flash, paths[0])
+    except (EOFError, paramiko.SSHException) as e:
+        log.debug("SCP transfer of %s aborted by the client: %s", paths[0], e)
+        return 1
+    except OSError as e:
+        log.error("SCP transfer of %s failed: %s", paths[0], e)
+        try:
+            channel.sendall(f"\x01scp: {paths[0]}: {e.strerror or e}\n".encode())
+        except (OSError, EOFError, paramiko.SSHException):
+            # the client is gone
+            pass
+        return 1
+    channel.sendall(b"\x01scp: unsupported command\n")
+    return 1
+
+
+def _scp_sink(channel: paramiko.Channel, stdin, flash: VirtualFlash, target: str) -> int:
+    """Helper function to receive files streaming them to the flash"""
+    channel.sendall(b"\x00")
+    while True:
+        line = stdin.readline()
+        if not line:
+            return 0
+        if line.startswith(b"T"):
+            channel.sendall(b"\x00")
+            continue
+        if not line.startswith(b"C"):
+            channel.sendall(b"\x01scp: protocol error\n")
+            return 1
+        _, size, name = line[1:].decode(encoding="utf-8").rstrip("\n").split(" ", 2)
+        path = f"{target.rstrip('/')}/{name}" if os.path.isdir(flash.path(target)) else target
+        remaining = int(size)
+        try:
+            with flash.open(path, "wb") as f:
+                channel.sendall(b"\x00")
+                while remaining:
+                    data = stdin.read(min(remaining, CHUNK_SIZE))
+                    if not data:
+                        raise EOFError("client disconnected during the transfer")
+                    f.write(data)
+                    remaining -= len(data)
+        except (OSError, EOFError, paramiko.SSHException):
+            # partially written files are not left in the flash
+            _remove_partial_file(flash, path)
+            raise
+        stdin.read(1)
+        channel.sendall(b"\x00")
+        log.debug("SCP received %s bytes to %s", size, path)
+
+
+def _remove_partial_file(flash: VirtualFlash, path: str) -> None:
+    """Helper function to remove a file whose transfer was aborted"""
+    try:
+        os.remove(flash.path(path))
+    except OSError as e:
+        log.error("SCP failed to remove partial file %s: %s", path, e)
+
+
+def _scp_source(channel: paramiko.Channel, stdin, flash: VirtualFlash, source: str) -> int:
+    """Helper function to send a file from the flash"""
+    if stdin.read(1) != b"\x00":
+        return 1
+    if os.path.isdir(flash.path(source)):
+        channel.sendall(f"\x01scp: {source}: not a regular file\n".encode(encoding="utf-8"))
+        return 1
+    stat = flash.stat(source)
+    channel.sendall(f"C0644 {stat.st_size} {os.path.basename(flash.path(source))}\n".encode(encoding="utf-8"))
+    if stdin.read(1) != b"\x00":
+        return 1
+    for chunk in flash.chunks(source):
+        channel.sendall(chunk)
+    channel.sendall(b"\x00")
+    stdin.read(1)
+    log.debug("SCP sent %s bytes from %s", stat.st_size, source)
+    return 0
@@ -0,0 +1,184 @@
+"""
+This module implements the line discipline shared by the stdin and
+stdout the servers give to the shells: input is read in indefinite
+block mode into lines, echoed, edited with backspace and completed
+with tab, and output is coalesced in a buffer sent once full or
+before waiting for input. Servers only implement the transport,
+that is sending data and receiving it into the input buffer.
+"""
+
+import threading
+from typing import Callable, Optional
+
+
+class LineIO:
+    """
+    Base class of the stdin and stdout of the shell over a client
+    connection. Subclasses implement ``_send`` to send data to the client
+    and ``_recv`` to receive the next data, passing it to ``_received``.
+
+    Input bytes are read by index from the buffer of the data received,
+    the bytes read are dropped once more data is received, so reading
+    is linear in the size of the input.
+
+    :param is_running: server running event
+    :param session_running: session running event, cleared once
+        the client disconnects or the server stops
+    :param activity: callable called whenever data is received
+    :param buffer_size: bytes of output coalesced before sending them
+    """
+
+    def __init__(
+        self,
+        is_running: threading.Event,
+        session_running: threading.Event,
+        activity: Callable = None,
+        buffer_size: int = 65536,
+    ):
+        self.is_running: threading.Event = is_running
+        self.session_running: threading.Event = session_running
+        self.activity: Callable = activity
+        self.buffer_size: int = buffer_size
+        self.echo: bool = True
+        self._buffer: bytearray = bytearray()
+        # index of the next byte of the buffer to read
+        self._position: int = 0
+        self._line: bytearray = bytearray()
+        self._output: bytearray = bytearray()
+        self._skip_lf: bool = False
+        # set by shells completing the commands, called on tab with the line entered so far
+        self.completer: Optional[Callable[[str], str]] = None
+
+    def _send(self, data: bytes) -> None:
+        """Helper method to send data to the client, implemented by the transports"""
+        raise NotImplementedError
+
+    def _recv(self) -> bool:
+        """
+        Helper method to receive the next data from the client, passing it
+        to ``_received``, implemented by the transports. Returns False if
+        the client disconnected or the server stopped.
+        """
+        raise NotImplementedError
+
+    def _running(self) -> bool:
+        """Helper method to check if both the session and the server are running"""
+        if self.session_running.is_set() and self.is_running.is_set():
+            return True
+        self.session_running.clear()
+        return False
+
+    def _received(self, data: bytes) -> None:
+        """Helper method to add the data received to the input buffer"""
+        if self.activity is not None:
+            self.activity()
+        del self._buffer[: self._position]
+        self._position = 0
+        self._buffer += data
+
+    def _buffered(self) -> bool:
+        """Helper method to check if there are received bytes left to read"""
+        return self._position < len(self._buffer)
+
+    def _read_byte(self) -> Optional[int]:
+        """Helper method to read the next received byte, None if the client disconnected"""
+        if not self._buffered() and not self._recv():
+            return None
+        byte = self._buffer[self._position]
+        self._position += 1
+        return byte
+
+    def _next_byte(self) -> Optional[int]:
+        """Helper method to get the next data byte, transports with in-band commands handle them here"""
+        return self._read_byte()
+
+    def _write(self, data: bytes) -> None:
+        """Helper method to add data to the output buffer, sending it once full"""
+        if len(self._output) + len(data) < self.buffer_size:
+            self._output += data
+            return
+        self.flush()
+        if len(data) < self.buffer_size:
+            self._output += data
+        else:
+            self._send(data)
+
+    def write(self, value: str) -> None:
+        """Method to write to the client"""
+        self._write(value.encode(encoding="utf-8"))
+
+    def write_bytes(self, data: bytes) -> None:
+        """Method to write encoded data to the client"""
+        self._write(data)
+
+    def flush(self) -> None:
+        """Method to send the buffered output to the client"""
+        if self._output:
+            data = bytes(self._output)
+            self._output.clear()
+            self._send(data)
+
+    def readline(self) -> str:
+        """
+        Method to read a line, returns an empty string if the client
+        disconnected or the server stopped. The echo of the data
+        received at once is sent in one go.
+        """
+        while True:
+            if not self._buffered():
+                self.flush()
+            byte = self._next_byte()
+            if byte is None:
+                return ""
+            if self._skip_lf:
+                self._skip_lf = False
+                if byte in (0, 10):
+                    continue
+            if byte in (13, 10):
+                self._skip_lf = byte == 13
+                line = self._line.decode(encoding="utf-8", errors="replace")
+                self._line.clear()
+                if self.echo:
+                    self._write(b"\r\n")
+                self.flush()
+                return line + "\n"
+            if byte in (8, 127):
+                if self._line:
+                    del self._line[-1]
+                    if self.echo:
+                        self._write(b"\b \b")
+                continue
+            if byte == 9 and self.completer is not None:
+                self._complete()
+                continue
+            if byte != 0:
+                self._line.append(byte)
+                if self.echo:
+                    self._write(bytes([byte]))
+
+    def read_key(self) -> str:
+        """
+        Method to read a single key without echoing it, as done by the
+        shell to page the outputs, returns an empty string if the client
+        disconnected or the server stopped.
+        """
+        while True:
+            if not self._buffered():
+                self.flush()
+            byte = self._next_byte()
+            if byte is None:
+                return ""
+            if self._skip_lf:
+                self._skip_lf = False
+                if byte in (0, 10):
+                    continue
+            self._skip_lf = byte == 13
+            return chr(byte)
+
+    def _complete(self) -> None:
+        """Helper method to append the completion of the line entered so far"""
+        completion = self.completer(self._line.decode(encoding="utf-8", errors="replace"))
+        data = completion.encode(encoding="utf-8")
+        self._line += data
+        if self.echo:
+            self._write(data)
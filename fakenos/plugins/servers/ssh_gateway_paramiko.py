@@ -0,0 +1,190 @@
+"""
+This module implements an SSH gateway done using paramiko
+as the SSH connection library. The gateway listens on a single
+port and routes every session to the shell of one of the FakeNOS
+hosts, so hosts do not need a listener of their own.
+
+The target host is selected either by the username, e.g.
+``ssh user@R1@127.0.0.1 -p 2222``, authenticating with the host
+credentials, or by the ``FAKENOS_HOST`` environment variable sent by
+the client, authenticating with the gateway credentials.
+"""
+
+import logging
+from typing import Callable, Dict, Optional
+
+import paramiko
+
+from fakenos.plugins.servers.ssh_server_paramiko import (
+    ParamikoSshServer,
+    ParamikoSshServerInterface,
+    get_host_shell_target,
+)
+
+log = logging.getLogger(__name__)
+
+
+class ParamikoSshGatewayInterface(ParamikoSshServerInterface):
+    """
+    Class to implement the SSH gateway interface, it authenticates
+    the session and records the hosts its channels are routed to.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        resolve_host: Callable,
+        ssh_banner: str = "FakeNOS Paramiko SSH Gateway",
+        username: str = None,
+        password: str = None,
+        separator: str = "@",
+        environment_variable: str = "FAKENOS_HOST",
+        resolve_endpoint: Callable = None,
+    ):
+        super().__init__(
+            ssh_banner=ssh_banner,
+            username=username,
+            password=password,
+            resolve_endpoint=resolve_endpoint,
+        )
+        self.resolve_host: Callable = resolve_host
+        self.separator: str = separator
+        self.environment_variable: str = environment_variable
+        # host of the username, the default of the channels of the transport
+        self.target = None
+        # channel id to the host selected by the environment variable
+        self.env_targets: Dict[int, object] = {}
+
+    def _get_running_host(self, host_name: str):
+        """Helper method to get the host by name if it is running"""
+        host = self.resolve_host(host_name)
+        if host is None or not host.running:
+            log.warning("ParamikoSshGateway host '%s' not found or not running", host_name)
+            return None
+        return host
+
+    def check_auth_password(self, username, password):
+        """
+        Authenticate with the host credentials if the username has
+        the ``<username><separator><host>`` form, otherwise with the
+        gateway credentials.
+        """
+        if self.separator in username:
+            host_username, host_name = username.rsplit(self.separator, 1)
+            host = self._get_running_host(host_name)
+            if host and host_username == host.username and password == host.password:
+                self.target = host
+                self.credentials = (host_username, password)
+                return paramiko.AUTH_SUCCESSFUL
+            return paramiko.AUTH_FAILED
+        if self.username is not None:
+            return super().check_auth_password(username, password)
+        return paramiko.AUTH_FAILED
+
+    def check_channel_env_request(self, channel, name, value):
+        """
+        Route the channel to the host named by the environment variable,
+        other channels of the transport keep their own host.
+        """
+        if isinstance(name, bytes):
+            name, value = name.decode(), value.decode()
+        if name != self.environment_variable:
+            return False
+        host = self._get_running_host(value)
+        if host is None:
+            return False
+        self.env_targets[channel.get_id()] = host
+        return True
+
+
+class ParamikoSshGateway(ParamikoSshServer):
+    """
+    Class to implement an SSH gateway which serves the
+    shells of several FakeNOS hosts over a single port.
+
+    :param resolve_host: callable that returns the host object given
+        its name, or None if there is no such host
+    :param separator: separator between the username and the host
+        name in the login username
+    :param environment_variable: name of the environment variable
+        clients can set to select the host
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        resolve_host: Callable,
+        port: int,
+        username: str = None,
+        password: str = None,
+        ssh_key_file: str = None,
+        ssh_key_file_password: str = None,
+        ssh_key_type: str = None,
+        ssh_profile: str = "default",
+        ssh_banner: str = "FakeNOS Paramiko SSH Gateway",
+        address: str = "127.0.0.1",
+        timeout: int = 1,
+        watchdog_interval: int = 1,
+        idle_timeout: int = None,
+        absolute_timeout: int = None,
+        separator: str = "@",
+        environment_variable: str = "FAKENOS_HOST",
+        resolve_endpoint: Callable = None,
+        unix_socket: str = None,
+        thread_stack_size: int = None,
+    ):
+        super().__init__(
+            shell=None,
+            nos=None,
+            nos_inventory_config={},
+            port=port,
+            username=username,
+            password=password,
+            ssh_key_file=ssh_key_file,
+            ssh_key_file_password=ssh_key_file_password,
+            ssh_key_type=ssh_key_type,
+            ssh_profile=ssh_profile,
+            ssh_banner=ssh_banner,
+            address=address,
+            timeout=timeout,
+            watchdog_interval=watchdog_interval,
+            idle_timeout=idle_timeout,
+            absolute_timeout=absolute_timeout,
+            resolve_endpoint=resolve_endpoint,
+            unix_socket=unix_socket,
+            name="gateway",
+            thread_stack_size=thread_stack_size,
+        )
+        self.resolve_host: Callable = resolve_host
+        self.separator: str = separator
+        self.environment_variable: str = environment_variable
+
+    def _make_server_interface(self) -> ParamikoSshGatewayInterface:
+        return ParamikoSshGatewayInterface(
+            resolve_host=self.resolve_host,
+            ssh_banner=self.ssh_banner,
+            username=self.username,
+            password=self.password,
+            separator=self.separator,
+            environment_variable=self.environment_variable,
+            resolve_endpoint=self.resolve_endpoint,
+        )
+
+    def _get_shell_target(self, server: ParamikoSshGatewayInterface, channel: paramiko.Channel) -> Optional[Dict]:
+        """
+        Wait for the shell or exec request, the environment variables
+        are sent before it, and return the shell of the host the channel is
+        routed to, by default the host of the username.
+        """
+        if channel.get_id() in server.channel_targets:
+            return super()._get_shell_target(server, channel)
+        requested = server.get_channel_request(channel).wait(self.timeout * 10)
+        host = server.env_targets.pop(channel.get_id(), server.target)
+        if not requested:
+            log.warning("ParamikoSshGateway no shell requested, closing session")
+            return None
+        if host is None:
+            channel.sendall(f"% No host selected, login as <username>{self.separator}<host>\r\n".encode())
+            return None
+        log.debug("ParamikoSshGateway routing session to host '%s'", host.name)
+        return get_host_shell_target(host)
@@ -0,0 +1,244 @@
+"""
+This module implements a lightweight Telnet server. Sessions are
+served by the connection thread itself, reading lines straight from
+the socket, so there is no encryption, no key exchange and no
+intermediate threads, which makes Telnet sessions much cheaper
+than SSH ones.
+"""
+
+import logging
+import socket
+import threading
+from typing import Callable, Dict, Optional
+
+from fakenos.core.flash import VirtualFlash
+from fakenos.core.nos import Nos
+from fakenos.core.servers import TCPServerBase
+from fakenos.core.watchdog import watchdog
+from fakenos.plugins.servers.line_io import LineIO
+
+log = logging.getLogger(__name__)
+
+# Telnet commands and options, RFC 854, RFC 857 and RFC 858
+IAC: int = 255
+DONT: int = 254
+DO: int = 253
+WONT: int = 252
+WILL: int = 251
+SB: int = 250
+SE: int = 240
+ECHO: int = 1
+SGA: int = 3
+
+# bytes of output coalesced before sending them to the client
+OUTPUT_BUFFER_SIZE: int = 65536
+
+
+class TelnetIO(LineIO):
+    """
+    Class to implement the stdin and stdout of the shell over a Telnet
+    connection. It strips and answers Telnet commands, echoes the input
+    if needed and reads lines in indefinite block mode until the client
+    disconnects or the server stops. Writes are buffered and sent once
+    the buffer is full, when the shell flushes it after the prompt and
+    before waiting for input. Tab completes the line if the shell set
+    a completer.
+
+    :param client: client socket
+    :param is_running: server running event
+    :param session_running: session running event, cleared once
+        the client disconnects or the server stops
+    :param activity: callable called whenever data is received
+    """
+
+    def __init__(
+        self,
+        client: socket.socket,
+        is_running: threading.Event,
+        session_running: threading.Event,
+        activity: Callable = None,
+    ):
+        super().__init__(is_running, session_running, activity=activity, buffer_size=OUTPUT_BUFFER_SIZE)
+        self.client: socket.socket = client
+
+    def _send(self, data: bytes) -> None:
+        """Helper method to send data to the client"""
+        if not self.session_running.is_set():
+            return
+        try:
+            self.client.sendall(data)
+        except OSError as e:
+            log.debug("TelnetServer client write error: %s", e)
+            self.session_running.clear()
+
+    def _write(self, data: bytes) -> None:
+        """
+        Helper method to add data to the output buffer, sending it once
+        full. Data bytes equal to IAC are doubled as RFC 854 requires.
+        """
+        super()._write(data.replace(b"\xff", b"\xff\xff"))
+
+    def negotiate(self) -> None:
+        """Method to offer the server side echo and go-ahead suppression"""
+        self._send(bytes([IAC, WILL, ECHO, IAC, WILL, SGA]))
+
+    def _recv(self) -> bool:
+        """
+        Helper method to receive the next data from the client,
+        returns False if the client disconnected or the server stopped.
+        """
+        while self._running():
+            try:
+                data = self.client.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError as e:
+                log.debug("TelnetServer client read error: %s", e)
+                break
+            if not data:
+                break
+            self._received(data)
+            return True
+        self.session_running.clear()
+        return False
+
+    def _next_byte(self) -> Optional[int]:
+        """Helper method to get the next data byte, handling the Telnet commands"""
+        while True:
+            byte = self._read_byte()
+            if byte != IAC:
+                return byte
+            command = self._read_byte()
+            if command is None:
+                return None
+            if command == IAC:
+                return IAC
+            if command in (DO, DONT, WILL, WONT):
+                option = self._read_byte()
+                if option is None:
+                    return None
+                self._answer(command, option)
+            elif command == SB:
+                while self._buffer.find(SE, self._position) == -1:
+                    if not self._recv():
+                        return None
+                self._position = self._buffer.find(SE, self._position) + 1
+
+    def _answer(self, command: int, option: int) -> None:
+        """Helper method to refuse the options the server does not support"""
+        if command == DO and option not in (ECHO, SGA):
+            self._send(bytes([IAC, WONT, option]))
+        elif command == WILL and option != SGA:
+            self._send(bytes([IAC, DONT, option]))
+
+
+class TelnetServer(TCPServerBase):
+    """
+    Class to implement a Telnet server with username
+    and password login driving the shell and the NOS.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        shell: type,
+        nos: Nos,
+        nos_inventory_config: Dict,
+        port: int,
+        username: str,
+        password: str,
+        telnet_banner: str = "FakeNOS Telnet Server",
+        shell_configuration: Dict = None,
+        address: str = "127.0.0.1",
+        timeout: int = 1,
+        login_attempts: int = 3,
+        idle_timeout: int = None,
+        absolute_timeout: int = None,
+        resolve_endpoint: Callable = None,
+        flash: VirtualFlash = None,
+        unix_socket: str = None,
+        name: str = None,
+        thread_stack_size: int = None,
+    ):
+        super().__init__(thread_stack_size=thread_stack_size)
+
+        self.nos: Nos = nos
+        self.nos_inventory_config: Dict = nos_inventory_config
+        self.shell: type = shell
+        self.shell_configuration: Dict = shell_configuration or {}
+        self.telnet_banner: str = telnet_banner
+        self.username: str = username
+        self.password: str = password
+        self.port: int = port
+        self.address: str = address
+        self.timeout: int = timeout
+        self.login_attempts: int = login_attempts
+        self.idle_timeout: int = idle_timeout
+        self.absolute_timeout: int = absolute_timeout
+        self.resolve_endpoint: Callable = resolve_endpoint
+        self.flash: VirtualFlash = flash
+        self.unix_socket: str = unix_socket
+        self.name: str = name
+
+    def login(self, telnet_io: TelnetIO) -> bool:
+        """
+        Method to prompt for the username and the password,
+        returns True if the client authenticated.
+        """
+        for _ in range(self.login_attempts):
+            telnet_io.write("Username: ")
+            username = telnet_io.readline().strip()
+            telnet_io.write("Password: ")
+            telnet_io.echo = False
+            password = telnet_io.readline().strip()
+            telnet_io.echo = True
+            telnet_io.write("\r\n")
+            if not telnet_io.session_running.is_set():
+                return False
+            if username == self.username and password == self.password:
+                return True
+            telnet_io.write("% Authentication failed\r\n\r\n")
+        return False
+
+    def connection_function(self, client: socket.socket, is_running: threading.Event):
+        client.settimeout(self.timeout)
+        session_running = threading.Event()
+        session_running.set()
+
+        def close():
+            session_running.clear()
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        # the watchdog ends the session once idle or connected for too long
+        watched = watchdog.watch(
+            name=f"{self.name} telnet",
+            is_alive=lambda: session_running.is_set() and is_running.is_set(),
+            close=close,
+            idle_timeout=self.idle_timeout,
+            absolute_timeout=self.absolute_timeout,
+        )
+        telnet_io = TelnetIO(client, is_running, session_running, watched.touch)
+        telnet_io.negotiate()
+        telnet_io.write(self.telnet_banner + "\r\n\r\n")
+
+        if self.login(telnet_io):
+            # the shell stops once the session is not running anymore
+            client_shell = self.shell(
+                stdin=telnet_io,
+                stdout=telnet_io,
+                nos=self.nos,
+                nos_inventory_config=self.nos_inventory_config,
+                is_running=session_running,
+                **self.shell_configuration,
+            )
+            client_shell.start()
+            log.debug("TelnetServer.connection_function stopped shell")
+
+        telnet_io.flush()
+        watched.cancel()
+        close()
+        client.close()
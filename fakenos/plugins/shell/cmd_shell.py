@@ -6,12 +6,19 @@ from cmd import Cmd
 import logging
 import traceback
 import copy
+import hashlib
+import json
 import os
-from typing import List, Union
+import weakref
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
 
 from fakenos.core.nos import Nos
+from fakenos.core.render_cache import StreamedOutput
 from fakenos.plugins import nos
 
+from fakenos.plugins.shell.command_trie import CommandTrie
+from fakenos.plugins.shell.output_template import OutputTemplate, compile_output
+from fakenos.plugins.shell.pipe_filters import apply_filters, iter_lines, parse_pipes
 from fakenos.plugins.shell.utils import get_files_changed
 
 log = logging.getLogger(__name__)
@@ -22,7 +29,65 @@ BASIC_COMMANDS: dict = {
         "output": "Unknown command",
         "help": "Output to print for unknown commands",
     },
+    "_ambiguous_": {
+        "output": '% Ambiguous command:  "{command}"',
+        "help": "Output to print for ambiguous abbreviated commands",
+    },
+}
+
+# commands of the platforms changing the terminal settings, to the setting
+# and its value, either the name of the parameter or a fixed value
+TERMINAL_SETTINGS: Dict[str, Tuple[str, Union[str, int]]] = {
+    "terminal length {lines:int}": ("terminal_length", "lines"),
+    "terminal width {columns:int}": ("terminal_width", "columns"),
+    "screen-length {lines:int} temporary": ("terminal_length", "lines"),
+    "screen-length disable": ("terminal_length", 0),
+    "set cli screen-length {lines:int}": ("terminal_length", "lines"),
+    "set cli screen-width {columns:int}": ("terminal_width", "columns"),
 }
+_terminal_settings = CommandTrie({command: {} for command in TERMINAL_SETTINGS})
+
+MORE_PROMPT: str = " --More-- "
+
+# compiled outputs of the commands of every NOS instance, keyed by the raw output
+_output_templates: "weakref.WeakKeyDictionary[Nos, Dict[str, OutputTemplate]]" = weakref.WeakKeyDictionary()
+
+# static outputs of every NOS instance, that is of every host, keyed
+# by the base prompt and the newline of the shell and the raw output
+_static_outputs: "weakref.WeakKeyDictionary[Nos, Dict]" = weakref.WeakKeyDictionary()
+
+# prompt tables of every NOS instance, keyed by the base prompt, the
+# newline of the shell and the digest of the commands of the host
+# inventory, then by the prompt, shared by the sessions of the host
+_prompt_tables: "weakref.WeakKeyDictionary[Nos, Dict]" = weakref.WeakKeyDictionary()
+
+
+def _commands_digest(commands: Dict) -> str:
+    """
+    Helper function to get a digest of the commands added to a host in
+    the inventory, so hosts sharing a NOS share their prompt tables only
+    if they add the same commands. Callable outputs are taken by identity.
+
+    :param commands: commands of the host inventory
+    """
+    data = json.dumps(commands, sort_keys=True, default=repr)
+    return hashlib.sha256(data.encode(encoding="utf-8")).hexdigest()
+
+
+class StaticOutput(str):
+    """
+    Static command output formatted with the base prompt. It also holds
+    its lines ended with the shell newline and encoded to UTF-8, so
+    sessions write it to the client as is, without any string processing.
+
+    :param value: formatted output
+    :param newline: newline to end the lines with
+    """
+
+    def __new__(cls, value: str, newline: str):
+        output = super().__new__(cls, value)
+        output.data = "".join(line + newline for line in value.splitlines()).encode(encoding="utf-8")
+        return output
 
 
 # pylint: disable=too-many-instance-attributes
@@ -46,6 +111,8 @@ class CMDShell(Cmd):
         ruler="",
         completekey="tab",
         newline="\r\n",
+        terminal_length=0,
+        terminal_width=0,
     ):
         self.nos: Nos = nos
         self.ruler = ruler
@@ -54,6 +121,10 @@ class CMDShell(Cmd):
         self.newline = newline
         self.prompt = nos.initial_prompt.format(base_prompt=base_prompt)
         self.is_running = is_running
+        self.exit_status = 0
+        # lines per page, outputs are not paged if 0, and columns per line
+        self.terminal_length: int = terminal_length
+        self.terminal_width: int = terminal_width
 
         # form commands
         self.commands = {
@@ -61,26 +132,184 @@ class CMDShell(Cmd):
             **copy.deepcopy(nos.commands or {}),
             **copy.deepcopy(nos_inventory_config.get("commands", {})),
         }
+        self.output_templates: Dict[str, OutputTemplate] = self._load_output_templates()
+        self.static_outputs: Dict[str, StaticOutput] = self._load_static_outputs()
+        # commands allowed, help text and command trie of every prompt,
+        # built on first use and shared by the sessions of the host
+        self._prompt_tables: Dict[str, Dict] = _prompt_tables.setdefault(nos, {}).setdefault(
+            (base_prompt, newline, _commands_digest(nos_inventory_config.get("commands", {}))), {}
+        )
+        self._formatted_prompts: Dict[Union[str, tuple], FrozenSet[str]] = {}
         # call the base constructor of cmd.Cmd, with our own stdin and stdout
         super().__init__(
             completekey=completekey,
             stdin=stdin,
             stdout=stdout,
         )
+        # stdins reading the input themselves complete the commands on tab
+        if completekey == "tab" and hasattr(stdin, "completer"):
+            stdin.completer = self.complete_line
 
     def start(self):
         """Method to start the shell"""
         self.cmdloop()
 
+    def execute(self, lines: str) -> int:
+        """
+        Method to run commands without the interactive loop, one
+        per line, as done for SSH exec requests. Returns the exit
+        status, 1 if any of the commands was not found.
+
+        :param lines: commands to run
+        """
+        self.exit_status = 0
+        for line in lines.splitlines():
+            if self.onecmd(self.precmd(line.strip())):
+                break
+        return self.exit_status
+
     def stop(self):
         """Method to stop the shell"""
         self.stdin.write("exit" + self.newline)
 
     def writeline(self, value):
-        """Method to write a line to stdout with newline at the end"""
+        """
+        Method to write a line to stdout with newline at the end, static
+        outputs are written as bytes if stdout supports it
+        """
+        if self._paging():
+            self.writelines(iter_lines(str(value)))
+            return
+        write_bytes = getattr(self.stdout, "write_bytes", None)
+        if write_bytes is not None and isinstance(value, StaticOutput):
+            write_bytes(value.data)
+            return
         for line in str(value).splitlines():
             self.stdout.write(line + self.newline)
 
+    def writelines(self, lines: Iterable[str]):
+        """
+        Method to write lines to stdout with newline at the end, taking
+        them one at a time from the iterable
+
+        :param lines: iterable of lines
+        """
+        if self._paging():
+            self._write_pages(iter(lines))
+            return
+        for line in lines:
+            self.stdout.write(line + self.newline)
+
+    def _paging(self) -> bool:
+        """Helper method to check if outputs are paged, stdin must read single keys"""
+        return self.terminal_length > 0 and hasattr(self.stdin, "read_key")
+
+    def _write_pages(self, lines: Iterator[str]) -> None:
+        """
+        Helper method to write the lines a page at a time, asking the user
+        to continue with the more prompt. Lines are taken from the iterator
+        as they are written, so only the current page is ever produced. Space
+        shows the next page, enter the next line and any other key stops.
+
+        :param lines: iterator of lines
+        """
+        page = max(1, self.terminal_length - 1)  # the last line shows the more prompt
+        rows = 0
+        for line in lines:
+            line_rows = max(1, -(-len(line) // self.terminal_width)) if self.terminal_width else 1
+            if rows and rows + line_rows > page:
+                key = self._more()
+                if key == " ":
+                    rows = 0
+                elif key in ("\r", "\n"):
+                    rows = max(0, page - line_rows)
+                else:
+                    if hasattr(lines, "close"):
+                        lines.close()
+                    return
+            self.stdout.write(line + self.newline)
+            rows += line_rows
+
+    def _more(self) -> str:
+        """Helper method to show the more prompt and return the key pressed, erasing the prompt"""
+        self.stdout.write(MORE_PROMPT)
+        self.stdout.flush()
+        key = self.stdin.read_key()
+        erase = "\b" * len(MORE_PROMPT)
+        self.stdout.write(erase + " " * len(MORE_PROMPT) + erase)
+        return key
+
+    def _apply_terminal_settings(self, line: str) -> bool:
+        """
+        Helper method to update the terminal length or width if the
+        command run changes them, e.g. ``terminal length 0``. Returns
+        True if the line is one of the terminal settings commands.
+
+        :param line: command line run
+        """
+        command, parameters, _ = _terminal_settings.match(line)
+        if command is None:
+            return False
+        setting, value = TERMINAL_SETTINGS[command]
+        setattr(self, setting, parameters[value] if isinstance(value, str) else value)
+        return True
+
+    def _load_output_templates(self) -> Dict[str, OutputTemplate]:
+        """
+        Helper method to get the compiled outputs of the commands, compiled
+        once per NOS instance and shared by all the hosts using it. Outputs
+        of commands added to a host only are compiled when first used.
+        """
+        templates = _output_templates.get(self.nos)
+        if templates is None:
+            templates = {}
+            for cmd_data in self.commands.values():
+                output = cmd_data.get("output")
+                if isinstance(output, str) and output not in templates:
+                    templates[output] = OutputTemplate(output)
+            _output_templates[self.nos] = templates
+        return templates
+
+    def _load_static_outputs(self) -> Dict[str, StaticOutput]:
+        """
+        Helper method to get the static outputs of the commands, that is the
+        outputs with no slots but the base prompt, rendered and encoded once
+        per host and shared by all the sessions of the host.
+        """
+        key = (self.base_prompt, self.newline)
+        outputs = _static_outputs.setdefault(self.nos, {}).get(key)
+        if outputs is None:
+            outputs = {}
+            for cmd_data in self.commands.values():
+                output = cmd_data.get("output")
+                if not isinstance(output, str) or not output or output in outputs:
+                    continue
+                template = self._output_template(output)
+                if template.names <= {"base_prompt"}:
+                    outputs[output] = StaticOutput(template.render(base_prompt=self.base_prompt), self.newline)
+            _static_outputs[self.nos][key] = outputs
+        return outputs
+
+    def _output_template(self, output: str) -> OutputTemplate:
+        """Helper method to get the compiled output, outputs of the callables are compiled on first use"""
+        template = self.output_templates.get(output)
+        return template if template is not None else compile_output(output)
+
+    def _render_output(self, output: Any, parameters: Dict[str, Any]) -> str:
+        """
+        Helper method to fill the slots of the output with the base prompt
+        and the parameters of the command, static outputs are rendered already.
+
+        :param output: command output
+        :param parameters: values of the command parameters
+        """
+        if not isinstance(output, str):
+            return str(output)
+        static_output = self.static_outputs.get(output)
+        if static_output is not None:
+            return static_output
+        return self._output_template(output).render(base_prompt=self.base_prompt, **parameters)
+
     def emptyline(self):
         """This method to do nothing if empty line entered"""
 
@@ -89,6 +318,31 @@ class CMDShell(Cmd):
         for file in changed_files:
             self.nos.from_file(file)
             self.commands.update(self.nos.commands)
+        self.invalidate_command_tables()
+        # outputs cached by the previous callables are outdated
+        if hasattr(self.nos.device, "bump_state_version"):
+            self.nos.device.bump_state_version()
+
+    def invalidate_command_tables(self):
+        """
+        Method to drop the prompt tables and the formatted prompts, it must
+        be called once ``self.commands`` is changed so they are built again.
+        The shell stops sharing the tables of the host as its commands differ,
+        and the shared tables of the NOS are dropped, so the next sessions
+        build them again from the commands of the NOS as they are now.
+        """
+        _prompt_tables.pop(self.nos, None)
+        self._prompt_tables = {}
+        self._formatted_prompts.clear()
+
+    def complete_line(self, line: str) -> str:
+        """
+        Method to complete the last word of the line entered so far,
+        returns the text to append to the line.
+
+        :param line: line entered so far
+        """
+        return self._prompt_table()["trie"].complete(line)
 
     def precmd(self, line):
         """Method to return line before processing the command"""
@@ -107,24 +361,7 @@ class CMDShell(Cmd):
     # pylint: disable=unused-argument
     def do_help(self, arg):
         """Method to return help for commands"""
-        lines = {}  # dict of {cmd: cmd_help}
-        width = 0  # record longest command width for padding
-        # form help for all commands
-        for cmd, cmd_data in self.commands.items():
-            # skip special commands
-            if cmd.startswith("_") and cmd.endswith("_"):
-                continue
-            # skip commands that does not match current prompt
-            if not self._check_prompt(cmd_data.get("prompt")):
-                continue
-            lines[cmd] = cmd_data.get("help", "")
-            width = max(width, len(cmd))
-        # form help lines
-        help_msg = []
-        for k, v in lines.items():
-            padding = " " * (width - len(k)) + "  "
-            help_msg.append(f"{k}{padding}{v}")
-        self.writeline(self.newline.join(help_msg))
+        self.writeline(self._prompt_table()["help"])
 
     def _check_prompt(self, prompt_: Union[str, List[str]]):
         """
@@ -135,36 +372,164 @@ class CMDShell(Cmd):
         # prompt_ is None if no 'prompt' key defined for command
         if prompt_ is None:
             return True
-        if isinstance(prompt_, str):
-            return self.prompt == prompt_.format(base_prompt=self.base_prompt)
-        return any(self.prompt == i.format(base_prompt=self.base_prompt) for i in prompt_)
+        return self.prompt in self._format_prompts(prompt_)
+
+    def _format_prompts(self, prompt_: Union[str, List[str]]) -> FrozenSet[str]:
+        """
+        Helper method to get the prompts of a command formatted with
+        the base prompt, formatted once and cached by the shell.
+
+        :param prompt_: string or list of prompts of the command
+        """
+        key = prompt_ if isinstance(prompt_, str) else tuple(prompt_)
+        prompts = self._formatted_prompts.get(key)
+        if prompts is None:
+            prompts = frozenset(
+                i.format(base_prompt=self.base_prompt) for i in ((prompt_,) if isinstance(prompt_, str) else prompt_)
+            )
+            self._formatted_prompts[key] = prompts
+        return prompts
+
+    def _resolve_alias(self, cmd_data: dict) -> dict:
+        """
+        Helper method to merge the data of an alias command with the data
+        of the command it refers to, raises KeyError if there is no such
+        command.
+
+        :param cmd_data: command data
+        """
+        if "alias" not in cmd_data:
+            return cmd_data
+        return {
+            **self.commands[cmd_data["alias"]],
+            **{key: value for key, value in cmd_data.items() if key != "alias"},
+        }
+
+    def _prompt_table(self) -> Dict:
+        """
+        Helper method to get the table of the current prompt, that is
+        a dictionary with the ``commands`` allowed at this prompt, aliases
+        resolved, and the ``help`` text listing them. Tables are built
+        once per prompt, so running a command is a dictionary lookup, with
+        the ``trie`` of the commands to match abbreviated commands.
+        """
+        table = self._prompt_tables.get(self.prompt)
+        if table is not None:
+            return table
+        commands = {}
+        lines = {}  # dict of {cmd: cmd_help}
+        for cmd, cmd_data in self.commands.items():
+            try:
+                resolved = self._resolve_alias(cmd_data)
+            except KeyError:
+                resolved = None
+            if resolved is not None and self._check_prompt(resolved.get("prompt")):
+                commands[cmd] = resolved
+            # skip special commands and commands that does not match current prompt
+            if cmd.startswith("_") and cmd.endswith("_"):
+                continue
+            if self._check_prompt(cmd_data.get("prompt")):
+                lines[cmd] = cmd_data.get("help", "")
+        # form help lines padded to the longest command
+        width = max((len(cmd) for cmd in lines), default=0)
+        help_msg = self.newline.join(f"{k}{' ' * (width - len(k))}  {v}" for k, v in lines.items())
+        table = {"commands": commands, "help": StaticOutput(help_msg, self.newline), "trie": CommandTrie(commands)}
+        self._prompt_tables[self.prompt] = table
+        return table
+
+    def _match_command(self, line: str) -> Optional[str]:
+        """
+        Helper method to get the command to run for the line, see
+        ``_match_line``, returns None if the line is ambiguous.
+
+        :param line: command line entered
+        """
+        return self._match_line(line)[0]
+
+    def _match_line(self, line: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Helper method to get the command to run for the line and the values
+        of its parameters. Lines can abbreviate the words of the commands
+        allowed at the current prompt as long as they are unique, commands
+        with ``arguments`` set match lines starting with their words and
+        parameters like ``{ifname}`` or ``{ip:ipv4}`` match any word of
+        their type. Returns None if the line is an ambiguous abbreviation.
+
+        :param line: command line entered
+        """
+        if line in self.commands:
+            return line, {}
+        command, parameters, ambiguous = self._prompt_table()["trie"].match(line)
+        if ambiguous:
+            return None, {}
+        if command is not None:
+            return command, parameters
+        words = line.split()
+        for index in range(len(words) - 1, 0, -1):
+            command = " ".join(words[:index])
+            if self.commands.get(command, {}).get("arguments"):
+                return command, {}
+        return line, {}
+
+    def _context_help(self, line: str) -> Optional[str]:
+        """
+        Helper method to get the help of the words that can follow the
+        line, for lines ending with ``?``, returns None if there are none.
+
+        :param line: command line entered without the ``?``
+        """
+        lines = self._prompt_table()["trie"].help(line)
+        if not lines:
+            return None
+        width = max(len(word) for word, _ in lines)
+        return self.newline.join(f"{word}{' ' * (width - len(word))}  {help_}".rstrip() for word, help_ in lines)
 
     # pylint: disable=too-many-branches
     def default(self, line):
         """Method called if no do_xyz methods found"""
         log.debug("shell.default '%s' running command '%s'", self.base_prompt, [line])
+        # the input ended because the session was closed
+        if not self.is_running.is_set():
+            return True
         ret = self.commands["_default_"]["output"]
+        filters = []
+        if "|" in line and line not in self.commands:
+            line, filters = parse_pipes(line)
+        if line.endswith("?") and line not in self.commands:
+            help_ = self._context_help(line[:-1])
+            if help_ is not None:
+                self.writeline(help_)
+                return False
+        parameters = {}
+        # pipes filter the outputs of the commands, not the errors
+        matched = False
         try:
-            cmd_data = self.commands[line]
-            if "alias" in cmd_data:
-                cmd_data = {**self.commands[cmd_data.pop("alias")], **cmd_data}
-            if self._check_prompt(cmd_data.get("prompt")):
+            command, parameters = self._match_line(line)
+            if command is None:
+                self.exit_status = 1
+                ret = self.commands["_ambiguous_"]["output"]
+                self.writeline(self._render_output(ret, {"command": line}))
+                return False
+            cmd_data = self._prompt_table()["commands"].get(command)
+            if cmd_data is not None:
                 ret = cmd_data["output"]
                 if callable(ret):
-                    ret = ret(
-                        self.nos.device,
-                        base_prompt=self.base_prompt,
-                        current_prompt=self.prompt,
-                        command=line,
-                    )
+                    ret = self._call_output(command, cmd_data, line, parameters)
                     if isinstance(ret, dict):
                         if "new_prompt" in ret:
                             self.prompt = ret["new_prompt"].format(base_prompt=self.base_prompt)
                         ret = ret["output"]
                 if "new_prompt" in cmd_data:
                     self.prompt = cmd_data["new_prompt"].format(base_prompt=self.base_prompt)
+                self._apply_terminal_settings(line)
+                matched = True
+            elif self._apply_terminal_settings(line):
+                # terminal settings the platform has no command for are handled by the shell
+                return False
             else:
-
+                # raises KeyError if there is no such command at all
+                cmd_data = self._resolve_alias(self.commands[command])
+                self.exit_status = 1
                 log.warning(
                     "'%s' command prompt '%s' not matching current prompt '%s'",
                     line,
@@ -176,6 +541,7 @@ class CMDShell(Cmd):
                     self.prompt,
                 )
         except KeyError:
+            self.exit_status = 1
             log.error("shell.default '%s' command '%s' not found", self.base_prompt, [line])
             if callable(ret):
                 ret = "An error occurred related to the command function"
@@ -187,13 +553,75 @@ class CMDShell(Cmd):
             log.error("An error occurred: %s", str(e))
             ret = traceback.format_exc()
             ret = ret.replace("\n", self.newline)
+        if not matched:
+            filters = []
         # check if need to exit
         if ret is True or not self.is_running.is_set():
             return True
-        if ret is not None:
-            try:
-                ret = ret.format(base_prompt=self.base_prompt)
-            except KeyError:
-                log.error("Error in formatting output")
-            self.writeline(ret)
+        if isinstance(ret, Iterator):
+            self._write_chunks(ret, filters)
+        elif ret is not None:
+            ret = self._render_output(ret, parameters)
+            if filters:
+                self.writelines(apply_filters(iter_lines(ret), filters))
+            else:
+                self.writeline(ret)
         return False
+
+    def _call_output(self, command: str, cmd_data: dict, line: str, parameters: Dict[str, Any]) -> Any:
+        """
+        Helper method to call the output callable of the command. Outputs
+        of commands marked with ``cache`` are taken from the render cache
+        of the device if they were rendered for the same device state,
+        string and streamed outputs are cached once rendered. Streamed
+        outputs are streamed again from the cache, as a single chunk.
+
+        :param command: command matched
+        :param cmd_data: command data with the output callable
+        :param line: command line entered
+        :param parameters: values of the command parameters
+        """
+        device = self.nos.device
+        cache = getattr(device, "render_cache", None) if cmd_data.get("cache") else None
+        if cache is not None:
+            key = (
+                command,
+                # the callables of commands accepting arguments parse the line
+                " ".join(line.split()) if cmd_data.get("arguments") else None,
+                tuple(sorted(parameters.items())),
+                self.prompt,
+                device.state_version,
+            )
+            output = cache.get(key)
+            if isinstance(output, StreamedOutput):
+                return iter((output,))
+            if output is not None:
+                return output
+        output = cmd_data["output"](
+            device,
+            base_prompt=self.base_prompt,
+            current_prompt=self.prompt,
+            command=line,
+            **parameters,
+        )
+        if cache is not None:
+            if isinstance(output, str):
+                cache.put(key, output)
+            elif isinstance(output, Iterator):
+                output = cache.tee(key, output)
+        return output
+
+    def _write_chunks(self, chunks: Iterator[str], filters: list) -> None:
+        """
+        Helper method to write the output of callables returning chunks
+        of text, like generators, line by line as the chunks are produced.
+
+        :param chunks: iterator of chunks of text
+        :param filters: output modifiers of the command line
+        """
+        try:
+            self.writelines(apply_filters(iter_lines(chunks), filters))
+        # pylint: disable=broad-except
+        except (Exception,) as e:
+            log.error("An error occurred: %s", str(e))
+            self.writeline(traceback.format_exc())
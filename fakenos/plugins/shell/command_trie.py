@@ -0,0 +1,276 @@
+"""
+This module implements the token trie the shell uses to match
+abbreviated commands like real devices do, e.g. ``sh ip int br``
+for ``show ip interface brief``, and to complete and describe the
+commands for the tab key and the ``?`` help.
+
+Every node of the trie holds the unique prefixes of its child tokens,
+computed once when the trie is built, so matching a line takes one
+dictionary lookup per token, whatever the number of commands. Tries
+are not changed once built, so they are shared by all the sessions.
+
+Command words can also be typed parameters, like ``{ifname}`` or
+``{ip:ipv4}``, matching any word of their type. Patterns sharing
+their first words share the nodes of these words, so all the patterns
+of a platform form one trie and their number does not slow down the
+matching. The words of the line matched by the parameters are
+returned with the command.
+"""
+
+import ipaddress
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+PARAMETER_PATTERN = re.compile(r"^\{(\w+)(?::(\w+))?\}$")
+# names the shell passes to the command outputs already
+RESERVED_PARAMETERS = ("base_prompt", "current_prompt", "command")
+
+
+def _ipv4(value: str) -> str:
+    """Function to check that the value is an IPv4 address"""
+    ipaddress.IPv4Address(value)
+    return value
+
+
+def _ipv6(value: str) -> str:
+    """Function to check that the value is an IPv6 address"""
+    ipaddress.IPv6Address(value)
+    return value
+
+
+def _ip(value: str) -> str:
+    """Function to check that the value is an IPv4 or IPv6 address"""
+    ipaddress.ip_address(value)
+    return value
+
+
+# parameter types to the callables converting the words of the line,
+# raising ValueError if the word is not of the type
+PARAMETER_TYPES: Dict[str, Callable[[str], Any]] = {
+    "str": str,
+    "int": int,
+    "ipv4": _ipv4,
+    "ipv6": _ipv6,
+    "ip": _ip,
+}
+
+
+class TrieNode:
+    """
+    TrieNode class holds a token of the commands, its child tokens
+    and parameters and, if a command ends with the token, the command
+    name, its help and whether it accepts arguments.
+    """
+
+    __slots__ = ("children", "prefixes", "longer", "parameters", "command", "arguments", "help")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "TrieNode"] = {}
+        # prefix of a child token to the token, None if several tokens start with it
+        self.prefixes: Dict[str, Optional[str]] = {}
+        # child token to the only longer child token starting with it
+        self.longer: Dict[str, str] = {}
+        # parameter token to its name, type and node
+        self.parameters: Dict[str, Tuple[str, str, "TrieNode"]] = {}
+        self.command: Optional[str] = None
+        self.arguments: bool = False
+        self.help: str = ""
+
+    def index_prefixes(self) -> None:
+        """Method to compute the prefixes of the child tokens"""
+        for token in self.children:
+            for end in range(1, len(token)):
+                prefix = token[:end]
+                self.prefixes[prefix] = None if prefix in self.prefixes else token
+        # whole tokens always match themselves, even if longer tokens start with them
+        for token in self.children:
+            if self.prefixes.get(token):
+                self.longer[token] = self.prefixes[token]
+            self.prefixes[token] = token
+        # parameters of any string are tried once the typed ones do not match
+        self.parameters = dict(sorted(self.parameters.items(), key=lambda item: item[1][1] == "str"))
+
+
+class CommandTrie:
+    """
+    CommandTrie class matches the lines entered to the commands,
+    accepting any unique prefix of each of the command tokens.
+
+    :param commands: dictionary of command names to command data, special
+        commands, named like ``_default_``, are skipped
+    """
+
+    def __init__(self, commands: Dict[str, dict]) -> None:
+        self.root: TrieNode = TrieNode()
+        for command, cmd_data in commands.items():
+            if command.startswith("_") and command.endswith("_"):
+                continue
+            node = self._add(command)
+            if node is None:
+                continue
+            node.command = command
+            node.arguments = bool(cmd_data.get("arguments"))
+            node.help = cmd_data.get("help", "")
+        self._index(self.root)
+
+    def _add(self, command: str) -> Optional[TrieNode]:
+        """
+        Helper method to add the nodes of the command words, returns the
+        node of the last word or None if a parameter name or type is invalid.
+        """
+        node = self.root
+        for token in command.split():
+            parameter = PARAMETER_PATTERN.match(token)
+            if parameter is None:
+                node = node.children.setdefault(token, TrieNode())
+                continue
+            name, type_ = parameter.group(1), parameter.group(2) or "str"
+            if name in RESERVED_PARAMETERS:
+                log.error("Command '%s' parameter name '%s' is reserved", command, name)
+                return None
+            if type_ not in PARAMETER_TYPES:
+                log.error("Command '%s' parameter '%s' type '%s' is not supported", command, name, type_)
+                return None
+            node = node.parameters.setdefault(token, (name, type_, TrieNode()))[2]
+        return node
+
+    def _index(self, node: TrieNode) -> None:
+        """Helper method to compute the prefixes of all the nodes"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            node.index_prefixes()
+            stack.extend(node.children.values())
+            stack.extend(parameter[2] for parameter in node.parameters.values())
+
+    def _walk(self, tokens: Iterable[str]) -> Optional[TrieNode]:
+        """
+        Helper method to follow the tokens down the trie, returns
+        the node reached or None if a token is unknown or ambiguous.
+        """
+        node = self.root
+        for token in tokens:
+            child = node.prefixes.get(token)
+            if child is not None:
+                node = node.children[child]
+                continue
+            for _, type_, parameter_node in node.parameters.values():
+                try:
+                    PARAMETER_TYPES[type_](token)
+                except ValueError:
+                    continue
+                node = parameter_node
+                break
+            else:
+                return None
+        return node
+
+    def match(self, line: str) -> Tuple[Optional[str], Dict[str, Any], bool]:
+        """
+        Method to get the command of the line, returns the command name
+        or None if there is no such command, the values of its parameters
+        and True if the line is ambiguous. The words following a command
+        accepting arguments are its arguments.
+
+        :param line: line entered
+        """
+        return self._match(self.root, line.split(), 0, {})
+
+    def _match(
+        self, node: TrieNode, tokens: List[str], index: int, parameters: Dict[str, Any]
+    ) -> Tuple[Optional[str], Dict[str, Any], bool]:
+        """
+        Helper method to match the tokens from the index onwards, trying
+        the words of the commands first and then their parameters.
+        """
+        if index == len(tokens):
+            return node.command, parameters, False
+        token = tokens[index]
+        child = node.prefixes.get(token, "")
+        ambiguous = child is None
+        # whole tokens are also tried as the prefix of the only longer token
+        for word in (child, node.longer.get(token)):
+            if not word:
+                continue
+            command, values, ambiguous = self._match(node.children[word], tokens, index + 1, parameters)
+            if command is not None:
+                return command, values, False
+        for name, type_, parameter_node in node.parameters.values():
+            # words abbreviating several command words are not taken as any string
+            if type_ == "str" and child is None:
+                continue
+            try:
+                value = PARAMETER_TYPES[type_](token)
+            except ValueError:
+                continue
+            command, values, parameter_ambiguous = self._match(
+                parameter_node, tokens, index + 1, {**parameters, name: value}
+            )
+            if command is not None:
+                return command, values, False
+            ambiguous = ambiguous or parameter_ambiguous
+        if node.command is not None and node.arguments:
+            return node.command, parameters, False
+        return None, {}, ambiguous
+
+    def complete(self, line: str) -> str:
+        """
+        Method to complete the last token of the line, returns the text
+        to append to the line, which is empty if there is nothing to
+        complete or ends with a space once the token is complete.
+
+        :param line: line entered so far
+        """
+        tokens = line.split()
+        if not tokens or line[-1].isspace():
+            return ""
+        node = self._walk(tokens[:-1])
+        if node is None:
+            return ""
+        partial = tokens[-1]
+        candidates = [token for token in node.children if token.startswith(partial)]
+        if not candidates:
+            return ""
+        if len(candidates) == 1 or partial in candidates:
+            token = partial if partial in candidates else candidates[0]
+            return token[len(partial) :] + " "
+        # complete up to the longest common prefix of the candidates
+        common = min(candidates)
+        for candidate in candidates:
+            while not candidate.startswith(common):
+                common = common[:-1]
+        return common[len(partial) :]
+
+    def help(self, line: str) -> List[Tuple[str, str]]:
+        """
+        Method to get the context help of a line ending with ``?``, that
+        is the tokens that can follow the line with the help of the
+        commands they end, parameters shown as ``<name>``, and ``<cr>``
+        if the line is a command already. Tokens starting with the last
+        word are listed if the line does not end with a space.
+
+        :param line: line entered before the ``?``
+        """
+        tokens = line.split()
+        partial = ""
+        if tokens and not line[-1].isspace():
+            partial = tokens.pop()
+        node = self._walk(tokens)
+        if node is None:
+            return []
+        lines = [
+            (token, child.help if child.command is not None else "")
+            for token, child in node.children.items()
+            if token.startswith(partial)
+        ]
+        if not partial:
+            lines += [
+                (f"<{name}>", child.help if child.command is not None else "")
+                for name, _, child in node.parameters.values()
+            ]
+            if node.command is not None:
+                lines.append(("<cr>", ""))
+        return lines
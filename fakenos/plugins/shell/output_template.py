@@ -0,0 +1,122 @@
+"""
+This module implements the templates of the command outputs, like
+``hostname {base_prompt}``, compiled once into sequences of literal
+text and slots so outputs are not parsed by ``str.format`` again on
+every response.
+
+Outputs which are valid format strings, with slots named like
+identifiers, are compiled as ``str.format`` would read them, doubled
+braces included. Other outputs, like JSON documents or Junos
+configurations, are brace heavy text where only the ``{name}`` words
+are slots and any other brace is literal. Outputs without slots are
+static, their text is computed once.
+"""
+
+import functools
+import re
+import string
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple, Union
+
+TEMPLATE_CACHE_SIZE: int = 256
+SLOT_PATTERN: Pattern = re.compile(r"\{([A-Za-z_]\w*)\}")
+
+_formatter = string.Formatter()
+
+# slot name, conversion, format spec and source text of the slot
+Slot = Tuple[str, Optional[str], str, str]
+
+
+class OutputTemplate:
+    """
+    OutputTemplate class is a command output compiled into literal text
+    and slots, filled with the values given to the ``render`` method.
+    Slots with no value are left as they are in the output.
+
+    :param output: command output
+    """
+
+    __slots__ = ("parts", "names", "text")
+
+    def __init__(self, output: str) -> None:
+        parts = _parse_format(output)
+        if parts is None:
+            parts = _parse_slots(output)
+        self.parts: List[Union[str, Slot]] = parts
+        self.names: FrozenSet[str] = frozenset(part[0] for part in parts if isinstance(part, tuple))
+        # text of the outputs without slots
+        self.text: Optional[str] = None if self.names else "".join(parts)
+
+    @property
+    def static(self) -> bool:
+        """True if the output has no slots"""
+        return self.text is not None
+
+    def render(self, **values) -> str:
+        """
+        Method to fill the slots of the output with the values.
+
+        :param values: values of the slots by name
+        """
+        if self.text is not None:
+            return self.text
+        return "".join(part if isinstance(part, str) else _render_slot(part, values) for part in self.parts)
+
+
+def _render_slot(slot: Slot, values: Dict[str, object]) -> str:
+    """Helper function to render a slot, left as is if it has no value or the value does not fit its format"""
+    name, conversion, spec, source = slot
+    if name not in values:
+        return source
+    value = values[name]
+    try:
+        if conversion:
+            value = _formatter.convert_field(value, conversion)
+        return format(value, spec)
+    except (ValueError, TypeError):
+        return source
+
+
+def _parse_format(output: str) -> Optional[List[Union[str, Slot]]]:
+    """
+    Helper function to compile the output as a format string, returns
+    None if it is not one or if any of its fields is not a named slot.
+    """
+    parts: List[Union[str, Slot]] = []
+    try:
+        for literal, name, spec, conversion in _formatter.parse(output):
+            if literal:
+                parts.append(literal)
+            if name is None:
+                continue
+            if not name.isidentifier() or "{" in spec or conversion not in (None, "r", "s", "a"):
+                return None
+            source = "{" + name + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}"
+            parts.append((name, conversion, spec, source))
+    except ValueError:
+        return None
+    return parts
+
+
+def _parse_slots(output: str) -> List[Union[str, Slot]]:
+    """Helper function to compile brace heavy output, only the ``{name}`` words are slots"""
+    parts: List[Union[str, Slot]] = []
+    start = 0
+    for match in SLOT_PATTERN.finditer(output):
+        if match.start() > start:
+            parts.append(output[start : match.start()])
+        parts.append((match.group(1), None, "", match.group(0)))
+        start = match.end()
+    if start < len(output):
+        parts.append(output[start:])
+    return parts
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_output(output: str) -> OutputTemplate:
+    """
+    Function to compile an output, compiled outputs are cached, so
+    strings returned again by the commands are compiled only once.
+
+    :param output: command output
+    """
+    return OutputTemplate(output)
@@ -0,0 +1,181 @@
+"""
+This module implements the output modifiers of the command lines,
+like ``show running-config | section bgp`` or ``show log | include ERR``.
+
+Modifiers are generators filtering the lines of the output one by one,
+so the lines not matching are dropped as the output is produced and
+the filtered output is never held in memory as a whole. Regular
+expressions are compiled once and cached across sessions.
+"""
+
+import functools
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+PATTERN_CACHE_SIZE: int = 256
+NEWLINE_PATTERN: Pattern = re.compile(r"\r\n|\r|\n")
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str) -> Pattern:
+    """
+    Function to compile the regular expression of a modifier, patterns
+    which are not valid regular expressions match as plain text.
+
+    :param pattern: regular expression
+    """
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return re.compile(re.escape(pattern))
+
+
+def iter_lines(output: Union[str, Iterable[str]]) -> Iterator[str]:
+    """
+    Function to iterate over the lines of the output without splitting
+    it into a list of lines first. Outputs can also be iterables of
+    chunks of text, like generators, the lines are then taken from
+    the chunks as they are produced.
+
+    :param output: command output, string or iterable of strings
+    """
+    if not isinstance(output, str):
+        yield from _iter_chunk_lines(output)
+        return
+    start = 0
+    for match in NEWLINE_PATTERN.finditer(output):
+        yield output[start : match.start()]
+        start = match.end()
+    if start < len(output):
+        yield output[start:]
+
+
+def _iter_chunk_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Helper function to get the lines of chunks of text, holding only the
+    parts of the last incomplete line, joined once the line is complete.
+    """
+    pending: List[str] = []
+    # a trailing CR can be the first half of a CRLF, its line is held until the next chunk
+    held_cr = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if held_cr:
+            held_cr = False
+            yield "".join(pending)
+            pending = []
+            if chunk[0] == "\n":
+                chunk = chunk[1:]
+        if chunk.endswith("\r"):
+            held_cr = True
+            chunk = chunk[:-1]
+        lines = NEWLINE_PATTERN.split(chunk)
+        if len(lines) > 1:
+            pending.append(lines[0])
+            yield "".join(pending)
+            pending = []
+            yield from lines[1:-1]
+        if lines[-1]:
+            pending.append(lines[-1])
+    if pending or held_cr:
+        yield "".join(pending)
+
+
+def include(lines: Iterable[str], pattern: Optional[Pattern]) -> Iterator[str]:
+    """Function to keep the lines matching the pattern"""
+    return (line for line in lines if pattern.search(line))
+
+
+def exclude(lines: Iterable[str], pattern: Optional[Pattern]) -> Iterator[str]:
+    """Function to drop the lines matching the pattern"""
+    return (line for line in lines if not pattern.search(line))
+
+
+def begin(lines: Iterable[str], pattern: Optional[Pattern]) -> Iterator[str]:
+    """Function to keep the lines from the first line matching the pattern"""
+    lines = iter(lines)
+    for line in lines:
+        if pattern.search(line):
+            yield line
+            yield from lines
+
+
+def section(lines: Iterable[str], pattern: Optional[Pattern]) -> Iterator[str]:
+    """
+    Function to keep the lines matching the pattern with the lines
+    indented below them, that is the configuration sections they start
+    """
+    indent = None  # indentation of the section being kept
+    for line in lines:
+        line_indent = len(line) - len(line.lstrip())
+        if indent is not None and line_indent > indent and line.strip():
+            yield line
+            continue
+        indent = None
+        if pattern.search(line):
+            indent = line_indent
+            yield line
+
+
+def count(lines: Iterable[str], pattern: Optional[Pattern]) -> Iterator[str]:
+    """Function to count the lines matching the pattern, or all the lines"""
+    total = sum(1 for line in lines if pattern is None or pattern.search(line))
+    yield f"Number of lines which match regexp = {total}"
+
+
+# modifiers by name, with whether they require a pattern
+FILTERS: Dict[str, Tuple[Callable, bool]] = {
+    "include": (include, True),
+    "exclude": (exclude, True),
+    "begin": (begin, True),
+    "section": (section, True),
+    "count": (count, False),
+}
+
+
+def _filter_name(word: str) -> Optional[str]:
+    """Helper function to get the name of the modifier the word abbreviates, if only one"""
+    names = [name for name in FILTERS if name.startswith(word)]
+    return names[0] if len(names) == 1 else None
+
+
+def parse_pipes(line: str) -> Tuple[str, List[Tuple[Callable, Optional[Pattern]]]]:
+    """
+    Function to split the modifiers off the command line, returns the
+    command and the list of modifier functions with their compiled
+    patterns. Pipes not followed by a modifier are part of the pattern
+    of the previous modifier, e.g. ``| include up|down``, or of the
+    command if there is no previous modifier, in which case the line is
+    returned as is with no modifiers.
+
+    :param line: command line entered
+    """
+    command, *parts = line.split("|")
+    if not parts:
+        return line, []
+    segments: List[List[str]] = []  # [modifier name, pattern]
+    for part in parts:
+        words = part.split(None, 1)
+        name = _filter_name(words[0]) if words else None
+        pattern = words[1].strip() if len(words) > 1 else ""
+        if name is not None and (pattern or not FILTERS[name][1]):
+            segments.append([name, pattern])
+        elif segments:
+            segments[-1][1] = (segments[-1][1] + "|" + part).strip()
+        else:
+            return line, []
+    filters = [(FILTERS[name][0], compile_pattern(pattern) if pattern else None) for name, pattern in segments]
+    return command.strip(), filters
+
+
+def apply_filters(lines: Iterable[str], filters: List[Tuple[Callable, Optional[Pattern]]]) -> Iterable[str]:
+    """
+    Function to chain the modifiers over the lines of the output.
+
+    :param lines: lines of the output
+    :param filters: modifiers returned by ``parse_pipes``
+    """
+    for function, pattern in filters:
+        lines = function(lines, pattern)
+    return lines
@@ -7,6 +7,7 @@ import logging
 import os
 
 from fakenos import FakeNOS
+from fakenos.core.coordinator import DEFAULT_AGENT_ADDRESS, DEFAULT_CONTROL_PORT, run_agent
 
 __version__ = "1.0.0"
 
@@ -50,6 +51,20 @@ opts.add_argument(
     help="Dev mode: Reload commands",
 )
 
+opts.add_argument(
+    "-a",
+    "--agent",
+    action="store",
+    dest="AGENT",
+    default=None,
+    type=str,
+    metavar="[ADDRESS:]PORT",
+    help=(
+        f"Run as a distributed lab agent listening on ADDRESS:PORT, ADDRESS is {DEFAULT_AGENT_ADDRESS} "
+        "if omitted, the shared secret is taken from the FAKENOS_AUTHKEY environment variable"
+    ),
+)
+
 args = argparser.parse_args()
 
 logging.basicConfig(level=args.LOG_LEVEL.upper())
@@ -60,6 +75,9 @@ if args.RELOAD_COMMANDS:
 
 def run_cli():
     """Function to start FakeNOS CLI"""
+    if args.AGENT:
+        run_agent_cli()
+        return
     fakenet = FakeNOS(inventory=args.INVENTORY)
     log.info("Initiating FakeNOS")
     fakenet.start()
@@ -74,5 +92,21 @@ def run_cli():
             os.environ.pop("FAKENOS_RELOAD_COMMANDS")
 
 
+def run_agent_cli():
+    """
+    Function to run a FakeNOS agent controlled by a coordinator,
+    the shared secret is taken from FAKENOS_AUTHKEY environment variable,
+    the agent does not start without it.
+    """
+    authkey = os.environ.get("FAKENOS_AUTHKEY", "").encode()
+    if not authkey:
+        argparser.error("FAKENOS_AUTHKEY environment variable must be set to run an agent")
+    address, _, port = args.AGENT.rpartition(":")
+    if not address and not port.isdigit():  # ADDRESS alone
+        address, port = port, ""
+    log.info("Initiating FakeNOS agent on %s:%s", address or DEFAULT_AGENT_ADDRESS, port or DEFAULT_CONTROL_PORT)
+    run_agent(address or DEFAULT_AGENT_ADDRESS, int(port or DEFAULT_CONTROL_PORT), authkey)
+
+
 if __name__ == "__main__":
     run_cli()
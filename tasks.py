@@ -298,3 +298,162 @@ def netmiko_check(ctx, device_type: str):
 
     print("Everything is OK! ✅")
     print(f"Time spent: {time.time()-init_time:.2f}s")
+
+
+# pylint: disable=unused-argument,too-many-locals
+@task(
+    help={
+        "handshakes": "Number of SSH handshakes to time for each profile.",
+        "size": "Size in MiB of the file downloaded to time the throughput.",
+    }
+)
+def benchmark_ssh_profiles(ctx, handshakes: int = 50, size: int = 16):
+    """
+    This is a task to compare the handshakes per second and the
+    throughput of the SSH performance profiles of ParamikoSshServer.
+    """
+    # pylint: disable=import-outside-toplevel
+    import paramiko
+    from fakenos.plugins.servers.ssh_server_paramiko import SSH_PROFILES
+
+    port = 6000
+    inventory = {
+        "hosts": {
+            f"bench_{profile}": {
+                "username": "user",
+                "password": "user",
+                "platform": "cisco_ios",
+                "port": port + index,
+                "server": {"plugin": "ParamikoSshServer", "configuration": {"ssh_profile": profile}},
+            }
+            for index, profile in enumerate(SSH_PROFILES)
+        }
+    }
+    data = os.urandom(1024 * 1024) * size
+
+    print(f"{'profile':<12}{'handshakes/s':>14}{'MiB/s':>10}  algorithms")
+    with FakeNOS(inventory=inventory) as net:
+        for index, profile in enumerate(SSH_PROFILES):
+            host = net.hosts[f"bench_{profile}"]
+            with host.flash.open("benchmark.bin", "wb") as f:
+                f.write(data)
+            window_size = SSH_PROFILES[profile].get("window_size", paramiko.common.DEFAULT_WINDOW_SIZE)
+            max_packet_size = SSH_PROFILES[profile].get("max_packet_size", paramiko.common.DEFAULT_MAX_PACKET_SIZE)
+
+            start = time.perf_counter()
+            for _ in range(handshakes):
+                transport = paramiko.Transport(("localhost", port + index))
+                transport.connect(username="user", password="user")
+                transport.close()
+            handshakes_rate = handshakes / (time.perf_counter() - start)
+
+            transport = paramiko.Transport(
+                ("localhost", port + index),
+                default_window_size=window_size,
+                default_max_packet_size=max_packet_size,
+            )
+            transport.use_compression(SSH_PROFILES[profile].get("compression", False))
+            transport.connect(username="user", password="user")
+            algorithms = f"{transport.host_key_type}, {transport.remote_cipher}, {transport.remote_compression}"
+            sftp = paramiko.SFTPClient.from_transport(transport, window_size, max_packet_size)
+            start = time.perf_counter()
+            with sftp.open("/benchmark.bin", "rb") as f:
+                f.prefetch()
+                received = len(f.read())
+            throughput = received / (1024 * 1024) / (time.perf_counter() - start)
+            transport.close()
+            os.remove(host.flash.path("benchmark.bin"))
+            print(f"{profile:<12}{handshakes_rate:>14.1f}{throughput:>10.1f}  {algorithms}")
+
+
+def _run_benchmark_host(port: int, thread_stack_size: int, stop_event) -> None:
+    """Helper function running the host of benchmark_sessions in its own process"""
+    inventory = {
+        "hosts": {
+            "bench": {
+                "username": "user",
+                "password": "user",
+                "platform": "cisco_ios",
+                "port": port,
+                "server": {"plugin": "ParamikoSshServer", "configuration": {"thread_stack_size": thread_stack_size}},
+            }
+        }
+    }
+    with FakeNOS(inventory=inventory):
+        stop_event.wait()
+
+
+def _process_status(pid: int) -> dict:
+    """Helper function to read the threads, the memory and the context switches of all the threads of the process"""
+    status = {"switches": 0}
+    for task_id in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task_id}/status", encoding="utf-8") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                if key in ("Threads", "VmRSS"):
+                    status[key] = int(value.split()[0])
+                elif key in ("voluntary_ctxt_switches", "nonvoluntary_ctxt_switches"):
+                    status["switches"] += int(value)
+    return status
+
+
+# pylint: disable=unused-argument,too-many-locals
+@task(
+    help={
+        "sessions": "Number of concurrent SSH shell sessions to open.",
+        "commands": "Number of commands to run on each session.",
+        "stack_size": "Thread stack size in KiB to compare with the default one.",
+    }
+)
+def benchmark_sessions(ctx, sessions: int = 50, commands: int = 20, stack_size: int = 256):
+    """
+    This is a task to measure the threads, the memory and the context
+    switches of ParamikoSshServer for every concurrent shell session,
+    with the default thread stack size and with a smaller one. The host
+    runs in its own process which is measured through /proc, Linux only.
+    """
+    # pylint: disable=import-outside-toplevel
+    import multiprocessing
+    import paramiko
+
+    print(f"{'stack size':<12}{'threads/session':>17}{'RSS KiB/session':>17}{'switches/command':>18}")
+    for index, thread_stack_size in enumerate((None, stack_size * 1024)):
+        port = 6000 + index
+        stop_event = multiprocessing.Event()
+        process = multiprocessing.Process(target=_run_benchmark_host, args=(port, thread_stack_size, stop_event))
+        process.start()
+        time.sleep(2)
+        before = _process_status(process.pid)
+
+        clients, channels = [], []
+        for _ in range(sessions):
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("localhost", port, username="user", password="user", look_for_keys=False)
+            channel = client.invoke_shell()
+            output = ""
+            while "bench>" not in output:
+                output += channel.recv(1024).decode()
+            clients.append(client)
+            channels.append(channel)
+        opened = _process_status(process.pid)
+
+        for _ in range(commands):
+            for channel in channels:
+                channel.send("show clock\n")
+            for channel in channels:
+                output = ""
+                while "bench>" not in output:
+                    output += channel.recv(1024).decode()
+        done = _process_status(process.pid)
+
+        for client in clients:
+            client.close()
+        stop_event.set()
+        process.join()
+
+        switches = (done["switches"] - opened["switches"]) / (sessions * commands)
+        threads = (opened["Threads"] - before["Threads"]) / sessions
+        memory = (opened["VmRSS"] - before["VmRSS"]) / sessions
+        label = f"{stack_size} KiB" if thread_stack_size else "default"
+        print(f"{label:<12}{threads:>17.1f}{memory:>17.1f}{switches:>18.1f}")
@@ -0,0 +1,130 @@
+"""
+Test module for fakenos.core.coordinator.
+The file can be found in fakenos/core/coordinator.py
+"""
+
+# pylint: disable=protected-access
+import socket
+import time
+
+import pytest
+import paramiko
+
+from fakenos.core.coordinator import DEFAULT_AGENT_ADDRESS, FakeNOSAgent, FakeNOSCoordinator
+from fakenos.core.fakenos import FakeNOS
+
+from tests.utils import get_free_port
+
+inventory = {
+    "hosts": {
+        "R": {"replicas": 3, "port": [5000, 5002], "platform": "cisco_ios"},
+        "SW1": {"port": 5003, "platform": "arista_eos"},
+    }
+}
+
+
+class TestFakeNOSCoordinator:
+    """
+    Test class for the FakeNOSCoordinator class.
+    """
+
+    def test_partition_assigns_addresses_and_ports(self):
+        """
+        Test that hosts are split in balanced chunks with
+        the agent address and a port from the agent range.
+        """
+        agents = [
+            {"address": "127.0.0.2", "ports": [7000, 7010]},
+            {"address": "127.0.0.3", "ports": [8000, 8010]},
+        ]
+        coordinator = FakeNOSCoordinator(inventory, agents)
+        assert [list(partition) for partition in coordinator.partitions] == [["R0", "R1"], ["R2", "SW1"]]
+        assert coordinator.partitions[0]["R1"]["port"] == 7001
+        assert coordinator.partitions[1]["SW1"]["port"] == 8001
+        assert coordinator.partitions[1]["SW1"]["server"]["configuration"]["address"] == "127.0.0.3"
+
+    def test_partition_address_range(self):
+        """
+        Test that replicas of hosts with an address range are
+        bound to their own address and pass the agents validation.
+        """
+        ranged_inventory = {"hosts": {"R": {"replicas": 3, "port": 6000, "address_range": "127.0.1.1/24"}}}
+        agents = [{"address": "127.0.0.2", "ports": [7000, 7010]}, {"address": "127.0.0.3", "ports": [8000, 8010]}]
+        coordinator = FakeNOSCoordinator(ranged_inventory, agents)
+        hosts = {name: host for partition in coordinator.partitions for name, host in partition.items()}
+        assert [host["server"]["configuration"]["address"] for host in hosts.values()] == [
+            "127.0.1.1",
+            "127.0.1.2",
+            "127.0.1.3",
+        ]
+        assert not any("address_range" in host or "replicas" in host for host in hosts.values())
+        for partition in coordinator.partitions:
+            net = FakeNOS(inventory={"default": coordinator.inventory["default"], "hosts": partition})
+            assert set(net.hosts) == set(partition)
+            assert net.hosts[next(iter(partition))].port in (7000, 8000)
+
+    def test_partition_ports_range_too_small(self):
+        """
+        Test that an error is raised if the hosts do
+        not fit in the agent ports range.
+        """
+        with pytest.raises(ValueError):
+            FakeNOSCoordinator(inventory, [{"address": "127.0.0.2", "ports": [7000, 7001]}])
+
+    def test_no_agents(self):
+        """Test that at least one agent is required."""
+        with pytest.raises(ValueError):
+            FakeNOSCoordinator(inventory, [])
+
+    def test_gateway_not_supported(self):
+        """Test that inventories with a gateway are rejected instead of dropping it."""
+        gateway_inventory = {**inventory, "gateway": {"plugin": "ParamikoSshGateway", "port": 7000}}
+        with pytest.raises(ValueError):
+            FakeNOSCoordinator(gateway_inventory, [{"address": "127.0.0.2"}])
+
+    def test_agent_requires_authkey(self):
+        """Test that agents refuse to start without a shared secret and bind to loopback by default."""
+        for authkey in (None, b""):
+            with pytest.raises(ValueError):
+                FakeNOSAgent(authkey=authkey)
+        assert FakeNOSAgent(authkey=b"secret").address == DEFAULT_AGENT_ADDRESS == "127.0.0.1"
+
+    def test_unknown_host(self):
+        """Test that unknown hosts are rejected."""
+        coordinator = FakeNOSCoordinator(inventory, [{"address": "127.0.0.2"}])
+        with pytest.raises(ValueError):
+            coordinator._group_by_agent(["R9"])
+
+    def test_local_agents_on_loopback_addresses(self):
+        """
+        Test that local agents bound to different loopback addresses
+        run their hosts and report them in the aggregated table.
+        """
+        control_port = get_free_port()
+        agents = [
+            {"address": "127.0.0.2", "control_port": control_port, "ports": [7000, 7010]},
+            {"address": "127.0.0.3", "control_port": control_port, "ports": [7000, 7010]},
+        ]
+        with FakeNOSCoordinator(inventory, agents) as lab:
+            hosts = lab.hosts
+            assert set(hosts) == {"R0", "R1", "R2", "SW1"}
+            assert all(host["running"] for host in hosts.values())
+            assert hosts["R2"]["address"] == "127.0.0.3"
+            assert hosts["R2"]["agent"] == f"127.0.0.3:{control_port}"
+
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.3", 7001, username="user", password="user", look_for_keys=False)
+            client.close()
+
+            lab.stop("SW1")
+            assert lab.hosts["SW1"]["running"] is False
+            with pytest.raises(socket.error):
+                socket.create_connection(("127.0.0.3", 7001), timeout=1)
+
+            lab.drain("R2", grace_period=5)
+            deadline = time.monotonic() + 5
+            while lab.hosts["R2"]["state"] != "stopped" and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert lab.hosts["R2"]["running"] is False
+            assert lab.hosts["R0"]["state"] == "running"
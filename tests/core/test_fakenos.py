@@ -4,9 +4,16 @@ The file can be found in fakenos/core/fakenos.py
 """
 
 # pylint: disable=protected-access
+import asyncio
+import os
 import platform
+import socket
+import stat
+import tempfile
 import threading
+import time
 from unittest.mock import patch
+import paramiko
 import pytest
 import detect
 import yaml
@@ -14,7 +21,7 @@ from fakenos.core.host import Host
 from fakenos.core.nos import available_platforms
 from fakenos.core.fakenos import FakeNOS, fakenos
 
-from tests.utils import get_platforms_from_md, get_running_hosts
+from tests.utils import get_free_port, get_platforms_from_md, get_running_hosts
 
 
 # pylint: disable=too-many-public-methods
@@ -232,6 +239,120 @@ class TestFakeNOS:
         net = FakeNOS(inventory=inventory)
         assert net.allocated_ports == {5000, 5001}
 
+    def test_address_range_replicas_share_port(self):
+        """
+        Test that replicas with an address range get
+        consecutive addresses and share the same port.
+        """
+        inventory = {
+            "hosts": {"R": {"port": 6022, "replicas": 3, "address_range": "127.0.1.254/16", "platform": "cisco_ios"}}
+        }
+        net = FakeNOS(inventory=inventory)
+        addresses = [net.hosts[f"R{i}"].server_inventory["configuration"]["address"] for i in range(3)]
+        assert addresses == ["127.0.1.254", "127.0.1.255", "127.0.2.0"]
+        assert {host.port for host in net.hosts.values()} == {6022}
+        assert net.allocated_addresses == {(address, 6022) for address in addresses}
+        assert not net.allocated_ports
+
+    def test_address_range_ipv6(self):
+        """
+        Test that replicas get their addresses from an IPv6 prefix.
+        """
+        inventory = {"hosts": {"R": {"port": 22, "replicas": 2, "address_range": "fd00::1/64"}}}
+        net = FakeNOS(inventory=inventory)
+        assert net.hosts["R1"].server_inventory["configuration"]["address"] == "fd00::2"
+
+    @pytest.mark.skipif(platform.system() != "Linux" or not socket.has_ipv6, reason="Linux IPv6 only")
+    def test_address_range_ipv6_binds(self):
+        """
+        Test that replicas bind the addresses of an IPv6 prefix
+        not configured on any interface of the host.
+        """
+        port = get_free_port()
+        inventory = {"hosts": {"R": {"port": port, "replicas": 2, "address_range": "fd00::1/64"}}}
+        with FakeNOS(inventory=inventory) as net:
+            for index, host in enumerate(net.hosts.values()):
+                assert host.server._socket.getsockname()[:2] == (f"fd00::{index + 1}", port)
+
+    def test_address_range_too_small(self):
+        """
+        Test that an error is raised if the address range
+        does not have enough addresses for the replicas.
+        """
+        inventory = {"hosts": {"R": {"port": 22, "replicas": 3, "address_range": "127.0.0.1/31"}}}
+        with pytest.raises(ValueError):
+            FakeNOS(inventory=inventory)
+
+    def test_address_range_without_replicas(self):
+        """
+        Test that an error is raised if the address range is set without replicas.
+        """
+        inventory = {"hosts": {"R": {"port": 22, "address_range": "127.0.1.0/24"}}}
+        with pytest.raises(ValueError):
+            FakeNOS(inventory=inventory)
+
+    def test_address_range_hosts_are_reachable(self):
+        """
+        Test that every replica listens on its own
+        address using the same port.
+        """
+        port = get_free_port()
+        inventory = {"hosts": {"R": {"port": port, "replicas": 3, "address_range": "127.0.1.1/24"}}}
+        with FakeNOS(inventory=inventory) as net:
+            for host in net.hosts.values():
+                address = host.server_inventory["configuration"]["address"]
+                with socket.create_connection((address, port), timeout=1):
+                    pass
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix-domain sockets are not supported")
+    def test_unix_socket_replicas(self):
+        """
+        Test that replicas served on Unix-domain sockets get a socket
+        each, braces other than {name} are kept in the socket path and
+        no TCP port is allocated for them.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            unix_socket = os.path.join(directory, "{lab}", "{name}.sock")
+            inventory = {
+                "hosts": {
+                    "R": {
+                        "port": [6000, 6001],
+                        "replicas": 3,
+                        "server": {"plugin": "ParamikoSshServer", "configuration": {"unix_socket": unix_socket}},
+                    }
+                }
+            }
+            with FakeNOS(inventory=inventory) as net:
+                assert not net.allocated_ports
+                assert not net.endpoints
+                for name in ("R0", "R1", "R2"):
+                    assert stat.S_ISSOCK(os.stat(os.path.join(directory, "{lab}", f"{name}.sock")).st_mode)
+                assert net.resolve_endpoint("R1", 0) is net.hosts["R1"]
+
+    def test_unix_socket_shared_path(self):
+        """
+        Test that an error is raised if hosts would be
+        served on the same Unix-domain socket path.
+        """
+        server = {"plugin": "ParamikoSshServer", "configuration": {"unix_socket": "/tmp/fakenos/lab.sock"}}
+        inventory = {"hosts": {"R": {"replicas": 2, "server": server}}}
+        with pytest.raises(ValueError):
+            FakeNOS(inventory=inventory)
+        server = {"plugin": "ParamikoSshServer", "configuration": {"unix_socket": "/tmp/fakenos/{name}.sock"}}
+        net = FakeNOS(inventory={"hosts": {"R": {"replicas": 2, "server": server}}})
+        assert net.allocated_unix_sockets == {os.path.abspath(f"/tmp/fakenos/R{i}.sock") for i in range(2)}
+        net.remove("R0")
+        assert net.allocated_unix_sockets == {os.path.abspath("/tmp/fakenos/R1.sock")}
+
+    @pytest.mark.parametrize("thread_stack_size", [1000, -1])
+    def test_thread_stack_size_too_small(self, thread_stack_size):
+        """
+        Test that an error is raised if the stack size of the server threads is below the minimum.
+        """
+        server = {"plugin": "TelnetServer", "configuration": {"thread_stack_size": thread_stack_size}}
+        with pytest.raises(ValueError):
+            FakeNOS(inventory={"hosts": {"R1": {"port": 6000, "server": server}}})
+
     def test_replicas_not_set_and_port_list(self):
         """
         Test that the function _check_ports_and_replicas_are_okey raises an exception
@@ -438,6 +559,124 @@ class TestFakeNOS:
         active_threads = threading.active_count()
         assert active_threads == 1
 
+    def test_add_and_remove_hosts(self):
+        """
+        Test that hosts can be added to and removed from
+        an existing FakeNOS object.
+        """
+        net = FakeNOS(inventory={"hosts": {"R1": {"port": 5001, "platform": "cisco_ios"}}})
+        net.add({"R2": {"port": 5002, "platform": "cisco_ios"}})
+        assert set(net.hosts) == {"R1", "R2"}
+        assert 5002 in net.allocated_ports
+        with pytest.raises(ValueError):
+            net.add({"R2": {"port": 5003, "platform": "cisco_ios"}})
+        net.remove("R2")
+        assert set(net.hosts) == {"R1"}
+        assert 5002 not in net.allocated_ports
+
+    def test_async_context_manager(self):
+        """
+        Test that the async with statement starts and stops the hosts.
+        """
+
+        async def run():
+            async with FakeNOS() as net:
+                assert all(get_running_hosts(net.hosts).values())
+                await net.async_stop("router_cisco_ios")
+                assert net.hosts["router_cisco_ios"].running is False
+            return net
+
+        net = asyncio.run(run())
+        assert not any(get_running_hosts(net.hosts).values())
+
+    def test_async_add_start_and_remove(self):
+        """
+        Test that hosts can be added, started and removed from async code.
+        """
+
+        async def run():
+            net = FakeNOS(inventory={"hosts": {"R1": {"port": 5001, "platform": "cisco_ios"}}})
+            await net.async_add({"SW": {"port": [5010, 5012], "replicas": 3, "platform": "cisco_ios"}})
+            await net.async_start()
+            assert len(net.hosts) == 4
+            assert all(get_running_hosts(net.hosts).values())
+            await net.async_remove(["SW0", "SW1", "SW2"])
+            assert set(net.hosts) == {"R1"}
+            await net.async_stop()
+            return net
+
+        net = asyncio.run(run())
+        assert not any(get_running_hosts(net.hosts).values())
+
+    def test_drain_hosts(self):
+        """
+        Test that drained hosts refuse new connections, let the
+        sessions in progress finish and stop once they are done.
+        """
+        port = get_free_port()
+        net = FakeNOS(inventory={"hosts": {"R1": {"port": port, "platform": "cisco_ios"}}})
+        net.start()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+        try:
+            net.drain(grace_period=30, wait=False)
+            status = net.status()["R1"]
+            assert status["state"] == "draining"
+            assert status["sessions"] == 1
+            assert 0 < status["grace_remaining"] <= 30
+            with pytest.raises(ConnectionRefusedError):
+                socket.create_connection(("127.0.0.1", port), timeout=5).close()
+            _, stdout, _ = client.exec_command("show clock")
+            assert stdout.channel.recv_exit_status() == 0
+        finally:
+            client.close()
+        assert net.hosts["R1"].wait_drained(10)
+        assert net.status() == {"R1": {"state": "stopped", "sessions": 0, "grace_remaining": None}}
+        net.stop()
+
+    def test_render_cache_stats(self):
+        """
+        Test that the outputs of cached commands are rendered once per
+        device state and the render cache statistics of the hosts.
+        """
+        port = get_free_port()
+        net = FakeNOS(inventory={"hosts": {"R1": {"port": port, "platform": "cisco_ios"}}})
+        net.start()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+        try:
+            outputs = []
+            for _ in range(2):
+                _, stdout, _ = client.exec_command("enable\nshow version")
+                outputs.append(stdout.read())
+        finally:
+            client.close()
+            net.stop()
+        assert outputs[0] == outputs[1]
+        stats = net.render_cache_stats()["R1"]
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_drain_grace_period_expired(self):
+        """
+        Test that sessions still open when the grace period expires are closed.
+        """
+        port = get_free_port()
+        net = FakeNOS(inventory={"hosts": {"R1": {"port": port, "platform": "cisco_ios"}}})
+        net.start()
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+        client.invoke_shell()
+        net.drain(grace_period=0.5)
+        assert net.hosts["R1"].running is False
+        deadline = time.monotonic() + 5
+        while client.get_transport().is_active() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not client.get_transport().is_active()
+        client.close()
+
     def test_nos_load_inventory_from_py_and_yaml(self):
         """
         Test cisco_ios NOS loaded correctly as it has both
@@ -0,0 +1,56 @@
+"""
+Test cases for the virtual flash filesystem of the hosts.
+"""
+
+import hashlib
+import os
+import tempfile
+import unittest
+
+from fakenos.core.flash import CHUNK_SIZE, VirtualFlash
+
+
+class VirtualFlashTest(unittest.TestCase):
+    """
+    Test cases for the VirtualFlash class.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.flash = VirtualFlash(os.path.join(self.directory.name, "R1"), size=10**6)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_path_with_filesystem_name(self):
+        """Check that the filesystem name prefix is optional."""
+        self.assertEqual(self.flash.path("flash:/image.bin"), self.flash.path("image.bin"))
+        self.assertEqual(self.flash.path("flash:"), self.flash.directory)
+
+    def test_path_outside_of_flash(self):
+        """Check that paths can not escape the flash directory."""
+        with self.assertRaises(PermissionError):
+            self.flash.path("flash:/../R2/image.bin")
+
+    def test_write_list_and_md5(self):
+        """Check that written files are listed and hashed."""
+        data = os.urandom(CHUNK_SIZE * 2 + 10)
+        with self.flash.open("flash:/images/image.bin", "wb") as f:
+            f.write(data)
+        self.assertEqual([(name, is_dir) for name, is_dir, _ in self.flash.listdir()], [("images", True)])
+        ((name, is_dir, stat),) = self.flash.listdir("flash:/images/image.bin")
+        self.assertEqual((name, is_dir, stat.st_size), ("image.bin", False, len(data)))
+        self.assertEqual(self.flash.md5("images/image.bin"), hashlib.md5(data).hexdigest())
+        self.assertEqual(b"".join(bytes(chunk) for chunk in self.flash.chunks("images/image.bin")), data)
+        self.assertEqual(self.flash.free(), 10**6 - len(data))
+
+    def test_md5_of_empty_file(self):
+        """Check that empty files can be hashed."""
+        with self.flash.open("empty.txt", "wb"):
+            pass
+        self.assertEqual(self.flash.md5("empty.txt"), hashlib.md5(b"").hexdigest())
+
+    def test_missing_file(self):
+        """Check that missing files raise FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            self.flash.listdir("missing.bin")
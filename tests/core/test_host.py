@@ -3,6 +3,8 @@ Test module for the module fakenos.core.host
 under fakenos/core/host.py
 """
 
+import asyncio
+import threading
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
@@ -53,6 +55,28 @@ class TestHost:
         assert host.running
         host.server.start.assert_called_once()
 
+    def test_start_plugin_without_optional_arguments(self, host):
+        """
+        The test passes if server plugins not accepting the optional
+        arguments, like the name of the host, are still instantiated.
+        """
+        arguments = {}
+
+        class Server:  # pylint: disable=too-few-public-methods
+            """Server plugin with the arguments of the first plugins only"""
+
+            # pylint: disable=too-many-arguments
+            def __init__(self, shell, shell_configuration, nos, nos_inventory_config, port, username, password):
+                arguments.update(port=port, username=username)
+
+            def start(self):
+                """Start the server"""
+
+        host.fakenos.servers_plugins["server_plugin"] = Server
+        host.start()
+        assert host.running
+        assert arguments == {"port": 22, "username": "username"}
+
     def test_stop(self, host):
         """
         It test that when the host is called the stop,
@@ -67,6 +91,32 @@ class TestHost:
         mock_server.stop.assert_called_once()
         assert host.server is None
 
+    def test_async_start_and_stop(self, host):
+        """
+        The test passes if blocking servers are started and
+        stopped from a coroutine.
+        """
+        asyncio.run(host.async_start())
+        assert host.running
+        server = host.server
+        server.start.assert_called_once()
+        asyncio.run(host.async_stop())
+        assert not host.running
+        server.stop.assert_called_once()
+
+    def test_async_start_runs_in_executor(self, host):
+        """
+        The test passes if the blocking start and stop of the
+        server run outside of the event loop thread.
+        """
+        threads = []
+        server = host.fakenos.servers_plugins["server_plugin"].return_value
+        server.start.side_effect = server.stop.side_effect = lambda: threads.append(threading.current_thread())
+        asyncio.run(host.async_start())
+        asyncio.run(host.async_stop())
+        assert len(threads) == 2
+        assert threading.current_thread() not in threads
+
     def test_platform_is_wrong(self, host):
         """
         The test passes if the ValueError is raised when the platform is not supported.
@@ -0,0 +1,82 @@
+"""
+Test cases for the render cache of the devices.
+"""
+
+import unittest
+
+from fakenos.core.render_cache import RenderCache, StreamedOutput
+
+
+class RenderCacheTest(unittest.TestCase):
+    """
+    Test cases for the RenderCache class.
+    """
+
+    def test_get_and_put(self):
+        """Check that cached outputs are returned and hits and misses counted."""
+        cache = RenderCache()
+        self.assertIsNone(cache.get("show version"))
+        cache.put("show version", "Version 1.0")
+        self.assertEqual(cache.get("show version"), "Version 1.0")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual((stats["entries"], stats["size"]), (1, len("Version 1.0")))
+
+    def test_evict_least_recently_used(self):
+        """Check that the least recently used output is evicted past the maximum entries."""
+        cache = RenderCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_memory_cap(self):
+        """Check that the total size is capped and larger outputs are not cached."""
+        cache = RenderCache(max_size=10)
+        cache.put("a", "x" * 6)
+        cache.put("b", "y" * 6)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["size"], 6)
+        cache.put("c", "z" * 11)
+        self.assertIsNone(cache.get("c"))
+        self.assertEqual(cache.get("b"), "y" * 6)
+
+    def test_replace_entry(self):
+        """Check that replacing an output updates the size."""
+        cache = RenderCache()
+        cache.put("a", "12345")
+        cache.put("a", "12")
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_tee(self):
+        """Check that streamed outputs are cached once all the chunks are produced."""
+        cache = RenderCache()
+        chunks = cache.tee("a", iter(["line 1\n", "line 2\n"]))
+        self.assertEqual(next(chunks), "line 1\n")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(list(chunks), ["line 2\n"])
+        self.assertEqual(cache.get("a"), "line 1\nline 2\n")
+        self.assertIsInstance(cache.get("a"), StreamedOutput)
+
+    def test_tee_not_cached(self):
+        """Check that streamed outputs are not cached if too large or not produced to the end."""
+        cache = RenderCache(max_size=10)
+        self.assertEqual(list(cache.tee("a", ["x" * 6, "y" * 6])), ["x" * 6, "y" * 6])
+        chunks = cache.tee("b", ["x", "y"])
+        next(chunks)
+        chunks.close()
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_clear(self):
+        """Check that clearing drops the outputs but keeps the statistics."""
+        cache = RenderCache()
+        cache.put("a", "1")
+        cache.get("a")
+        cache.clear()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual((cache.stats()["entries"], cache.stats()["size"]), (0, 0))
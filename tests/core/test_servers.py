@@ -4,14 +4,19 @@ The file can be found under fakenos/core/servers.py
 """
 
 # pylint: disable=protected-access, attribute-defined-outside-init
+import os
 import socket
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from fakenos.core.servers import TCPServerBase
+from fakenos.core.servers import TCPServerBase, thread_stack
+from tests.utils import get_free_port
 
 
 class FakeServer(TCPServerBase):
@@ -103,6 +108,7 @@ class ServersTest(unittest.TestCase):
         mock_socket().setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_REUSEPORT, True)
         mock_socket().settimeout.assert_called_once_with(servers.timeout)
         mock_socket().bind.assert_called_once_with((servers.address, servers.port))
+        mock_socket().listen.assert_called_once()
 
     @patch("socket.socket")
     @patch("sys.platform", "darwin")
@@ -119,6 +125,7 @@ class ServersTest(unittest.TestCase):
         mock_socket().setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
         mock_socket().settimeout.assert_called_once_with(servers.timeout)
         mock_socket().bind.assert_called_once_with((servers.address, servers.port))
+        mock_socket().listen.assert_called_once()
 
     @patch("socket.socket")
     @patch("sys.platform", "win32")
@@ -135,6 +142,85 @@ class ServersTest(unittest.TestCase):
         mock_socket().setsockopt.assert_called_once_with(socket.SOL_SOCKET, socket.SO_REUSEADDR, True)
         mock_socket().settimeout.assert_called_once_with(servers.timeout)
         mock_socket().bind.assert_called_once_with((servers.address, servers.port))
+        mock_socket().listen.assert_called_once()
+
+    @patch("socket.socket")
+    def test_bind_sockets_ipv6(self, mock_socket):
+        """
+        It passes if IPv6 addresses are bound using
+        an IPv6 socket.
+        """
+        servers = FakeServer()
+        servers.address = "::1"
+        servers._bind_sockets()
+
+        mock_socket.assert_called_once_with(socket.AF_INET6, socket.SOCK_STREAM)
+        self.assertNotIn(
+            ((socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, False),),
+            mock_socket().setsockopt.call_args_list,
+        )
+        mock_socket().bind.assert_called_once_with(("::1", servers.port))
+
+    @patch("socket.socket")
+    def test_start_bind_error(self, mock_socket):
+        """
+        It passes if a server failing to bind is left stopped,
+        so it can be started again.
+        """
+        mock_socket().bind.side_effect = OSError(99, "Cannot assign requested address")
+        servers = FakeServer()
+        with self.assertRaises(OSError):
+            servers.start()
+        self.assertFalse(servers._is_running.is_set())
+        mock_socket().close.assert_called()
+
+    @patch("socket.socket")
+    def test_bind_sockets_ipv6_dual_stack(self, mock_socket):
+        """
+        It passes if the IPv6 unspecified address is
+        bound as a dual-stack socket.
+        """
+        servers = FakeServer()
+        servers.address = "::"
+        servers._bind_sockets()
+
+        mock_socket.assert_called_once_with(socket.AF_INET6, socket.SOCK_STREAM)
+        mock_socket().setsockopt.assert_any_call(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, False)
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix-domain sockets are not supported")
+    def test_bind_unix_socket(self):
+        """
+        It passes if the Unix-domain socket is bound instead of the
+        TCP port, replacing stale socket files, and removed on stop.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            servers = FakeServer()
+            servers.unix_socket = os.path.join(directory, "fakenos", "R1.sock")
+            os.makedirs(os.path.dirname(servers.unix_socket))
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+                stale.bind(servers.unix_socket)
+            servers.start()
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(servers.unix_socket)
+            servers.stop()
+            self.assertEqual(servers._socket.family, socket.AF_UNIX)
+            self.assertFalse(os.path.exists(servers.unix_socket))
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix-domain sockets are not supported")
+    def test_bind_unix_socket_keeps_files(self):
+        """
+        It passes if files other than sockets at the Unix-domain
+        socket path are not removed and the server does not start.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            servers = FakeServer()
+            servers.unix_socket = os.path.join(directory, "R1.sock")
+            with open(servers.unix_socket, "w", encoding="utf-8") as file:
+                file.write("data")
+            with self.assertRaises(FileExistsError):
+                servers._bind_sockets()
+            with open(servers.unix_socket, encoding="utf-8") as file:
+                self.assertEqual(file.read(), "data")
 
     @patch("threading.Event")
     def test_stop_works_does_not_stop_if_not_running(self, mock_thread_event):
@@ -215,7 +301,7 @@ class ServersTest(unittest.TestCase):
         servers._socket.accept.return_value = (MagicMock(), MagicMock())
 
         servers._listen()
-        mock_socket().listen.assert_called_once()
+        mock_socket().listen.assert_not_called()
         mock_socket().accept.assert_called_once()
         mock_thread.assert_called_once_with(
             target=servers.connection_function, args=(mock_socket().accept.return_value[0], servers._is_running)
@@ -238,7 +324,7 @@ class ServersTest(unittest.TestCase):
         servers._socket.accept.side_effect = socket.timeout
 
         servers._listen()
-        mock_socket().listen.assert_called_once()
+        mock_socket().listen.assert_not_called()
         mock_socket().accept.assert_called_once()
         mock_thread.assert_not_called()
         self.assertEqual(len(servers._connection_threads), 0)
@@ -257,8 +343,144 @@ class ServersTest(unittest.TestCase):
         servers._socket = mock_socket()
         servers._socket.accept.return_value = (MagicMock(), MagicMock())
         servers._listen()
-        self.assertEqual(mock_socket().listen.call_count, 100)
+        self.assertEqual(mock_socket().listen.call_count, 0)
         self.assertEqual(mock_socket().accept.call_count, 100)
         self.assertEqual(mock_thread.call_count, 100)
         self.assertEqual(mock_thread().start.call_count, 100)
         self.assertEqual(len(servers._connection_threads), 100)
+
+    def test_active_connections_keeps_threads(self):
+        """
+        Test that counting the active connections does not change the list
+        of connection threads the listening thread appends to, so threads
+        accepted meanwhile are not lost, and that finished threads are
+        dropped when new connections are accepted.
+        """
+        servers = FakeServer()
+        finished, alive = MagicMock(), MagicMock()
+        finished.is_alive.return_value = False
+        alive.is_alive.return_value = True
+        threads = [finished, alive]
+        servers._connection_threads = threads
+        self.assertEqual(servers.active_connections, 1)
+        self.assertIs(servers._connection_threads, threads)
+        self.assertEqual(servers._connection_threads, [finished, alive])
+        servers._is_running = MagicMock()
+        servers._is_running.is_set.side_effect = [True, False]
+        servers._socket = MagicMock()
+        servers._socket.accept.return_value = (MagicMock(), MagicMock())
+        with patch("threading.Thread") as mock_thread:
+            servers._listen()
+        self.assertEqual(servers._connection_threads, [alive, mock_thread.return_value])
+
+
+class BlockingServer(TCPServerBase):
+    """
+    BlockingServer class serves connections until
+    the release event is set or the server stops.
+    """
+
+    def __init__(self, port):
+        super().__init__(address="127.0.0.1", port=port)
+        self.release = threading.Event()
+
+    def connection_function(self, client, is_running):
+        while is_running.is_set() and not self.release.wait(0.05):
+            pass
+        client.close()
+
+
+class DrainTest(unittest.TestCase):
+    """
+    Test class for draining the TCPServerBase servers.
+    """
+
+    def setUp(self):
+        self.port = get_free_port()
+        self.server = BlockingServer(self.port)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = socket.create_connection(("127.0.0.1", self.port))
+        self.addCleanup(self.client.close)
+        while not self.server.active_connections:
+            time.sleep(0.01)
+
+    def test_drain_waits_for_connections(self):
+        """
+        It passes if new connections are refused right away, the
+        connection in progress goes on and the server stops once done.
+        """
+        on_drained = MagicMock()
+        self.server.drain(on_drained=on_drained)
+        self.assertTrue(self.server.draining)
+        with self.assertRaises(ConnectionRefusedError):
+            socket.create_connection(("127.0.0.1", self.port)).close()
+        self.assertFalse(self.server.wait_drained(0.2))
+        self.assertEqual(self.server.active_connections, 1)
+        on_drained.assert_not_called()
+        self.server.release.set()
+        self.assertTrue(self.server.wait_drained(5))
+        self.assertFalse(self.server.draining)
+        self.assertEqual(self.server.active_connections, 0)
+        on_drained.assert_called_once()
+
+    def test_drain_grace_period(self):
+        """
+        It passes if the connections in progress are ended
+        once the grace period expires.
+        """
+        start = time.monotonic()
+        self.server.drain(grace_period=0.3)
+        self.assertTrue(self.server.wait_drained(5))
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(self.server.active_connections, 0)
+
+
+class NoDelayTest(unittest.TestCase):
+    """
+    Test class for the options of the accepted sockets.
+    """
+
+    def test_tcp_nodelay(self):
+        """It passes if accepted TCP sockets have Nagle's algorithm disabled."""
+        server = BlockingServer(get_free_port())
+        options = []
+        server.connection_function = lambda client, is_running: options.append(
+            client.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        )
+        server.start()
+        self.addCleanup(server.stop)
+        with socket.create_connection(("127.0.0.1", server.port)):
+            while not options:
+                time.sleep(0.01)
+        self.assertTrue(options[0])
+
+
+class ThreadStackTest(unittest.TestCase):
+    """
+    Test cases for the thread_stack context manager.
+    """
+
+    def test_thread_stack(self):
+        """Check that the stack size is set while starting threads and restored after."""
+        with thread_stack(262144):
+            self.assertEqual(threading.stack_size(), 262144)
+        self.assertEqual(threading.stack_size(), 0)
+
+    def test_thread_stack_default(self):
+        """Check that the default stack size is kept if no size is given."""
+        with thread_stack(None):
+            self.assertEqual(threading.stack_size(), 0)
+
+    def test_thread_stack_too_small(self):
+        """Check that stack sizes below the minimum raise ValueError."""
+        with self.assertRaises(ValueError):
+            with thread_stack(1024):
+                pass
+        self.assertEqual(threading.stack_size(), 0)
+
+    def test_server_stack_size_too_small(self):
+        """Check that servers refuse stack sizes below the minimum instead of failing to serve."""
+        with self.assertRaises(ValueError):
+            TCPServerBase.__init__(FakeServer(), thread_stack_size=1000)
+        TCPServerBase.__init__(FakeServer(), thread_stack_size=0)
@@ -0,0 +1,58 @@
+"""
+Test cases for the helpers of the core of FakeNOS.
+"""
+
+import os
+import stat
+import tempfile
+import unittest
+
+from fakenos.core.utils import private_directory
+
+
+class PrivateDirectoryTest(unittest.TestCase):
+    """
+    Test cases for the private_directory function.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_create(self):
+        """Check that the directory and its missing parents are created private."""
+        path = os.path.join(self.directory.name, "fakenos", "flash")
+        self.assertEqual(private_directory(path), path)
+        for directory in (path, os.path.dirname(path)):
+            self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+
+    @unittest.skipUnless(hasattr(os, "getuid"), "POSIX permissions")
+    def test_make_existing_private(self):
+        """Check that existing directories of the user are made private."""
+        path = os.path.join(self.directory.name, "flash")
+        os.mkdir(path, 0o777)
+        os.chmod(path, 0o777)
+        private_directory(path)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o700)
+
+    def test_symbolic_link(self):
+        """Check that symbolic links are rejected, also as parent directories."""
+        target = os.path.join(self.directory.name, "target")
+        os.mkdir(target)
+        link = os.path.join(self.directory.name, "link")
+        os.symlink(target, link)
+        with self.assertRaises(PermissionError):
+            private_directory(link)
+        with self.assertRaises(PermissionError):
+            private_directory(os.path.join(link, "flash"))
+
+    @unittest.skipUnless(hasattr(os, "geteuid") and os.geteuid() == 0, "changing the owner requires root")
+    def test_other_owner(self):
+        """Check that directories owned by other users are rejected."""
+        path = os.path.join(self.directory.name, "flash")
+        os.mkdir(path, 0o700)
+        os.chown(path, 12345, 12345)
+        with self.assertRaises(PermissionError):
+            private_directory(path)
@@ -0,0 +1,123 @@
+"""
+Test cases for the watchdog module.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from fakenos.core.watchdog import Watchdog, WatchedSession
+
+
+class WatchedSessionTest(unittest.TestCase):
+    """
+    Test cases for the WatchedSession class.
+    """
+
+    def test_check_alive(self):
+        """Check that alive sessions are checked again after the interval."""
+        session = WatchedSession("s", lambda: True, Mock(), interval=1)
+        self.assertEqual(session.check(session.started), (None, 1))
+
+    def test_check_dead(self):
+        """Check that dead sessions are closed."""
+        session = WatchedSession("s", lambda: False, Mock())
+        self.assertEqual(session.check(session.started), ("dead", None))
+
+    def test_check_idle_timeout(self):
+        """Check that the idle timeout counts from the last activity."""
+        session = WatchedSession("s", lambda: True, Mock(), interval=5, idle_timeout=2)
+        self.assertEqual(session.check(session.started + 1), (None, 1))
+        session.last_activity = session.started + 1
+        self.assertEqual(session.check(session.started + 2.5), (None, 0.5))
+        self.assertEqual(session.check(session.started + 3), ("idle timeout", None))
+
+    def test_check_absolute_timeout(self):
+        """Check that the absolute timeout ignores the activity."""
+        session = WatchedSession("s", lambda: True, Mock(), interval=5, absolute_timeout=2)
+        session.last_activity = session.started + 2
+        self.assertEqual(session.check(session.started + 2), ("absolute timeout", None))
+
+
+class WatchdogTest(unittest.TestCase):
+    """
+    Test cases for the Watchdog class.
+    """
+
+    def setUp(self):
+        self.watchdog = Watchdog(tick=0.01, slots=8)
+
+    def _wait(self, event: threading.Event, timeout: float = 2) -> bool:
+        """Helper method to wait for the event"""
+        return event.wait(timeout)
+
+    def test_dead_session_closed(self):
+        """Check that sessions are closed once they are dead."""
+        alive, closed = threading.Event(), threading.Event()
+        alive.set()
+        session = self.watchdog.watch("s", alive.is_set, closed.set, interval=0.02)
+        time.sleep(0.1)
+        self.assertFalse(closed.is_set())
+        alive.clear()
+        self.assertTrue(self._wait(closed))
+        self.assertEqual(session.closed_reason, "dead")
+
+    def test_idle_timeout(self):
+        """Check that sessions are closed once idle and kept while active."""
+        closed = threading.Event()
+        session = self.watchdog.watch("s", lambda: True, closed.set, interval=0.02, idle_timeout=0.2)
+        for _ in range(5):
+            time.sleep(0.05)
+            session.touch()
+        self.assertFalse(closed.is_set())
+        self.assertTrue(self._wait(closed))
+        self.assertEqual(session.closed_reason, "idle timeout")
+
+    def test_absolute_timeout(self):
+        """Check that sessions longer than the wheel are closed at the absolute timeout."""
+        closed = threading.Event()
+        session = self.watchdog.watch("s", lambda: True, closed.set, interval=1, absolute_timeout=0.3)
+        self.assertTrue(self._wait(closed))
+        self.assertGreaterEqual(time.monotonic() - session.started, 0.3)
+        self.assertEqual(session.closed_reason, "absolute timeout")
+
+    def test_cancel(self):
+        """Check that cancelled sessions are not checked anymore."""
+        is_alive, close = Mock(return_value=True), Mock()
+        session = self.watchdog.watch("s", is_alive, close, interval=0.02)
+        session.cancel()
+        time.sleep(0.1)
+        is_alive.assert_not_called()
+        close.assert_not_called()
+        self.assertEqual(len(self.watchdog.sessions), 0)
+
+    def test_no_timeouts(self):
+        """Check that sessions with the interval and the timeouts disabled are not supervised."""
+        is_alive, close = Mock(return_value=False), Mock()
+        for timeout in (0, None):
+            session = self.watchdog.watch("s", is_alive, close, interval=0, idle_timeout=timeout, absolute_timeout=0)
+            session.touch()
+            session.cancel()
+        time.sleep(0.05)
+        is_alive.assert_not_called()
+        close.assert_not_called()
+        self.assertEqual(len(self.watchdog.sessions), 0)
+        self.assertIsNone(self.watchdog._thread)  # pylint: disable=protected-access
+
+    def test_check_error(self):
+        """Check that sessions failing to be checked are closed and the watchdog keeps running."""
+        closed = threading.Event()
+        self.watchdog.watch("bad", Mock(side_effect=RuntimeError), Mock(side_effect=RuntimeError), interval=0.02)
+        self.watchdog.watch("good", lambda: False, closed.set, interval=0.02)
+        self.assertTrue(self._wait(closed))
+
+    def test_single_thread(self):
+        """Check that one thread supervises all the sessions and ends with the last one."""
+        threads = threading.active_count()
+        sessions = [self.watchdog.watch(f"s{i}", lambda: True, Mock(), interval=0.05) for i in range(50)]
+        self.assertEqual(threading.active_count(), threads + 1)
+        for session in sessions:
+            session.cancel()
+        time.sleep(0.1)
+        self.assertEqual(threading.active_count(), threads)
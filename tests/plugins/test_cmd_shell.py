@@ -2,6 +2,7 @@
 Module to test the cmd_shell plugin.
 """
 
+import io
 import os
 import shutil
 import threading
@@ -18,6 +19,7 @@ import pytest
 
 from fakenos.core.fakenos import FakeNOS, fakenos
 from fakenos.core.nos import Nos
+from fakenos.plugins.nos.platforms_py.base_template import BaseDevice
 from fakenos.plugins.shell.cmd_shell import CMDShell
 
 
@@ -299,6 +301,396 @@ class TestCmdShell(TestCase):
         shell = CMDShell(**self.arguments)
         self.assertTrue(shell.default("exit"))
 
+    def test_static_outputs_shared(self):
+        """Test that static outputs are formatted and encoded once and shared by the shells of the NOS."""
+        shell = CMDShell(**self.arguments)
+        other_shell = CMDShell(**self.arguments)
+        self.assertIs(shell.static_outputs, other_shell.static_outputs)
+        static_output = shell.static_outputs["*21:01:33.000 AET 01 01 01 2022"]
+        self.assertEqual(static_output.data, b"*21:01:33.000 AET 01 01 01 2022\r\n")
+        self.assertIsNot(CMDShell(**self.arguments, newline="\n").static_outputs, shell.static_outputs)
+
+    def test_default_brace_heavy_output(self):
+        """Test that outputs with literal braces are compiled once and rendered with their slots."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        self.arguments["nos_inventory_config"] = {
+            "commands": {
+                "show json": {"output": '{"hostname": "{base_prompt}"}'},
+                "show interface {ifname}": {"output": "interfaces {\n    {ifname};\n}"},
+            }
+        }
+        shell = CMDShell(**self.arguments)
+        self.assertEqual(shell.static_outputs['{"hostname": "{base_prompt}"}'], '{"hostname": "test"}')
+        self.assertEqual(shell.output_templates["interfaces {\n    {ifname};\n}"].names, {"ifname"})
+        shell.default("show json")
+        shell.default("show interface Gi0/1")
+        self.assertEqual(
+            self.arguments["stdout"].getvalue(),
+            '{"hostname": "test"}\r\ninterfaces {\r\n    Gi0/1;\r\n}\r\n',
+        )
+
+    def test_default_static_output_bytes(self):
+        """Test that static outputs are written as bytes if stdout supports it."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = Mock(spec=["write", "write_bytes"])
+        shell = CMDShell(**self.arguments)
+        shell.default("show clock")
+        self.arguments["stdout"].write_bytes.assert_called_once_with(b"*21:01:33.000 AET 01 01 01 2022\r\n")
+        self.arguments["stdout"].write.assert_not_called()
+
+    def test_prompt_tables_built_once(self):
+        """Test that the commands and help of a prompt are built once and reused."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        # pylint: disable=protected-access
+        table = shell._prompt_table()
+        self.assertIn("show clock", table["commands"])
+        self.assertNotIn("show version", table["commands"])
+        shell.default("enable")
+        enable_table = shell._prompt_table()
+        self.assertIn("show version", enable_table["commands"])
+        shell.prompt = "test>"
+        self.assertIs(shell._prompt_table(), table)
+        shell.do_help("")
+        shell.writeline.assert_called_with(table["help"])
+
+    def test_prompt_tables_invalidated_on_reload(self):
+        """Test that the prompt tables are built again once the commands are reloaded."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("show new")
+        shell.writeline.assert_called_once_with("% Invalid input detected at '^' marker.")
+        shell.nos.from_file = Mock()
+        shell.nos.commands = {"show new": {"output": "new output", "help": "new command"}}
+        shell.reload_commands(["nos.yaml"])
+        shell.default("show new")
+        shell.writeline.assert_called_with("new output")
+
+    def test_default_alias_not_changed(self):
+        """Test that running an alias does not change the alias command."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("sh clock")
+        shell.default("sh clock")
+        self.assertEqual(shell.commands["sh clock"], {"alias": "show clock"})
+        self.assertEqual(shell.writeline.call_count, 2)
+        shell.writeline.assert_called_with("*21:01:33.000 AET 01 01 01 2022")
+
+    def test_default_command_abbreviated(self):
+        """Test that unique abbreviations of the commands run them."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("sho cl")
+        shell.writeline.assert_called_once_with("*21:01:33.000 AET 01 01 01 2022")
+        self.assertEqual(shell.exit_status, 0)
+
+    def test_default_command_ambiguous(self):
+        """Test that ambiguous abbreviations are reported."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("s clock")
+        shell.writeline.assert_called_once_with('% Ambiguous command:  "s clock"')
+        self.assertEqual(shell.exit_status, 1)
+
+    def test_default_context_help(self):
+        """Test that lines ending with ? list the words that can follow them."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("sh?")
+        shell.writeline.assert_called_with("sh\r\nshow")
+        shell.default("terminal ?")
+        shell.writeline.assert_called_with("width\r\nlength")
+
+    def test_complete_line(self):
+        """Test that the shell completes the lines of stdins supporting it."""
+        self.arguments["stdin"] = Mock(completer=None)
+        shell = CMDShell(**self.arguments)
+        self.assertEqual(self.arguments["stdin"].completer, shell.complete_line)
+        self.assertEqual(shell.complete_line("terminal w"), "idth ")
+
+    def test_prompt_tables_shared(self):
+        """Test that the shells of the same NOS share the prompt tables until they reload commands."""
+        shell = CMDShell(**self.arguments)
+        other_shell = CMDShell(**self.arguments)
+        # pylint: disable=protected-access
+        self.assertIs(shell._prompt_table(), other_shell._prompt_table())
+        other_shell.invalidate_command_tables()
+        self.assertIsNot(shell._prompt_table(), other_shell._prompt_table())
+
+    def test_prompt_tables_per_inventory_commands(self):
+        """Test that hosts sharing a NOS with different inventory commands do not share the prompt tables."""
+        self.arguments["is_running"].set()
+        self.arguments["nos_inventory_config"] = {"commands": {"show inventory": {"output": "R1 inventory"}}}
+        shell = CMDShell(**self.arguments)
+        self.arguments["nos_inventory_config"] = {"commands": {"show interfaces": {"output": "R2 interfaces"}}}
+        other_shell = CMDShell(**self.arguments)
+        shell.writeline, other_shell.writeline = Mock(), Mock()
+        shell.default("show inventory")
+        other_shell.default("show inventory")
+        other_shell.default("show interfaces")
+        shell.writeline.assert_called_once_with("R1 inventory")
+        self.assertEqual(
+            [call.args[0] for call in other_shell.writeline.call_args_list],
+            ["% Invalid input detected at '^' marker.", "R2 interfaces"],
+        )
+
+    def test_prompt_tables_reload_drops_shared_tables(self):
+        """Test that reloading the commands drops the tables shared with the next sessions."""
+        self.arguments["is_running"].set()
+        shell = CMDShell(**self.arguments)
+        # pylint: disable=protected-access
+        table = shell._prompt_table()
+        shell.nos.from_file = Mock()
+        shell.nos.commands = {**shell.nos.commands, "show new": {"output": "new output"}}
+        shell.reload_commands(["nos.yaml"])
+        other_shell = CMDShell(**self.arguments)
+        other_shell.writeline = Mock()
+        self.assertIsNot(other_shell._prompt_table(), table)
+        other_shell.default("show new")
+        other_shell.writeline.assert_called_once_with("new output")
+
+    def test_default_command_with_parameters(self):
+        """Test that the parameters of the commands are passed to the outputs."""
+        self.arguments["is_running"].set()
+        self.arguments["nos_inventory_config"] = {
+            "commands": {
+                "show interface {ifname}": {"output": "{base_prompt} {ifname} is up"},
+                "ping {ip:ipv4} repeat {count:int}": {
+                    "output": lambda device, count, **kwargs: "!" * count,
+                },
+            }
+        }
+        shell = CMDShell(**self.arguments)
+        shell.writeline = Mock()
+        shell.default("sh int Gi0/1")
+        shell.writeline.assert_called_with("test Gi0/1 is up")
+        shell.default("ping 10.0.0.1 repeat 3")
+        shell.writeline.assert_called_with("!!!")
+
+    def test_default_command_with_modifiers(self):
+        """Test that the output modifiers filter the outputs, static or callable."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        self.arguments["nos_inventory_config"] = {
+            "commands": {"show log": {"output": lambda device, **kwargs: "ERR one\nINFO two\nERR three"}}
+        }
+        shell = CMDShell(**self.arguments)
+        shell.execute("enable\nshow run | i ^hostname|^boot\nshow log | exc ERR\nshow run | foo")
+        self.assertEqual(
+            self.arguments["stdout"].getvalue(),
+            "hostname test\r\nboot-start-marker\r\nboot-end-marker\r\nINFO two\r\n"
+            "% Invalid input detected at '^' marker.\r\n",
+        )
+
+    def test_default_invalid_command_with_modifiers(self):
+        """Test that the errors of unknown, unavailable and ambiguous commands are not filtered."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        shell = CMDShell(**self.arguments)
+        shell.execute("show foo | include x\nshow version | include Version\ns clock | include x")
+        self.assertEqual(
+            self.arguments["stdout"].getvalue(),
+            "% Invalid input detected at '^' marker.\r\n% Invalid input detected at '^' marker.\r\n"
+            '% Ambiguous command:  "s clock"\r\n',
+        )
+
+    def test_default_command_generator(self):
+        """Test that the chunks of callables returning generators are written line by line."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = Mock(spec=["write"])
+
+        def make_lines(device, **kwargs):
+            for index in range(3):
+                yield f"line {index}\nline"
+                yield f" {index} end\n"
+
+        self.arguments["nos_inventory_config"] = {"commands": {"show lines": {"output": make_lines}}}
+        shell = CMDShell(**self.arguments)
+        shell.default("show lines")
+        shell.default("show lines | include 1")
+        self.assertEqual(
+            [call.args[0] for call in self.arguments["stdout"].write.call_args_list],
+            [line for index in range(3) for line in (f"line {index}\r\n", f"line {index} end\r\n")]
+            + ["line 1\r\n", "line 1 end\r\n"],
+        )
+
+    def test_default_command_generator_error(self):
+        """Test that errors of generators are reported after the lines written so far."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+
+        def make_lines(device, **kwargs):
+            yield "first line\n"
+            raise RuntimeError("render failed")
+
+        self.arguments["nos_inventory_config"] = {"commands": {"show lines": {"output": make_lines}}}
+        shell = CMDShell(**self.arguments)
+        shell.default("show lines")
+        self.assertTrue(self.arguments["stdout"].getvalue().startswith("first line\r\nTraceback"))
+        self.assertIn("RuntimeError: render failed", self.arguments["stdout"].getvalue())
+
+    def test_default_command_render_cache(self):
+        """Test that outputs of cached commands are rendered once per device state."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        self.arguments["nos"].device = BaseDevice(configuration_file="")
+        calls = []
+
+        def make_version(device, **kwargs):
+            calls.append(kwargs["command"])
+            return f"Version {len(calls)}"
+
+        def make_lines(device, **kwargs):
+            calls.append(kwargs["command"])
+            yield "line 1\n"
+            yield "line 2\n"
+
+        self.arguments["nos_inventory_config"] = {
+            "commands": {
+                "show version": {"output": make_version, "cache": True},
+                "show lines": {"output": make_lines, "cache": True},
+                "show clock": {"output": make_version},
+            }
+        }
+        shell = CMDShell(**self.arguments)
+        for line in ("show version", "sh ver", "show lines", "show lines", "show clock", "show clock"):
+            shell.default(line)
+        self.assertEqual(calls, ["show version", "show lines", "show clock", "show clock"])
+        self.arguments["nos"].device.bump_state_version()
+        shell.default("show version")
+        self.assertEqual(
+            self.arguments["stdout"].getvalue(),
+            "Version 1\r\nVersion 1\r\n" + "line 1\r\nline 2\r\n" * 2 + "Version 3\r\nVersion 4\r\nVersion 5\r\n",
+        )
+        stats = self.arguments["nos"].device.render_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (2, 3, 3))
+
+    def test_default_command_render_cache_stream(self):
+        """Test that cached streamed outputs are written back as they were streamed, without rendering."""
+        self.arguments["is_running"].set()
+        self.arguments["nos"] = Nos(filename="fakenos/plugins/nos/platforms_py/cisco_ios.py")
+        self.arguments["nos"].device.render_stream = Mock(
+            side_effect=lambda template, **kwargs: iter(['{"hostname": "{base_prompt}"}\n', "{0} {}\n"])
+        )
+        outputs = []
+        for _ in range(2):
+            self.arguments["stdout"] = io.StringIO()
+            shell = CMDShell(**self.arguments)
+            shell.execute("enable\nshow running-config")
+            outputs.append(self.arguments["stdout"].getvalue())
+        self.assertEqual(outputs[0], '{"hostname": "{base_prompt}"}\r\n{0} {}\r\n')
+        self.assertEqual(outputs[1], outputs[0])
+        self.arguments["nos"].device.render_stream.assert_called_once()
+        # the running configuration rendered from the template of the platform
+        self.arguments["nos"] = Nos(filename="fakenos/plugins/nos/platforms_py/cisco_ios.py")
+        self.arguments["stdout"] = io.StringIO()
+        shell = CMDShell(**self.arguments)
+        shell.execute("enable\nshow running-config")
+        first = self.arguments["stdout"].getvalue()
+        shell.execute("show running-config")
+        self.assertIn("hostname test\r\n", first)
+        self.assertEqual(self.arguments["stdout"].getvalue(), first * 2)
+        self.assertEqual(self.arguments["nos"].device.render_cache.stats()["hits"], 1)
+
+    def test_paging(self):
+        """Test that outputs are paged lazily once the terminal length is set."""
+        self.arguments["is_running"].set()
+        self.arguments["stdin"] = Mock(spec=["read_key"])
+        self.arguments["stdin"].read_key.side_effect = [" ", "\r", "q"]
+        self.arguments["stdout"] = io.StringIO()
+        produced = []
+
+        def make_lines(device, **kwargs):
+            for index in range(20):
+                produced.append(index)
+                yield f"line {index}\n"
+
+        self.arguments["nos_inventory_config"] = {"commands": {"show lines": {"output": make_lines}}}
+        shell = CMDShell(**self.arguments, terminal_length=4)
+        shell.default("show lines")
+        erase = "\b" * 10 + " " * 10 + "\b" * 10
+        self.assertEqual(
+            self.arguments["stdout"].getvalue(),
+            "line 0\r\nline 1\r\nline 2\r\n --More-- "
+            + erase
+            + "line 3\r\nline 4\r\nline 5\r\n --More-- "
+            + erase
+            + "line 6\r\n --More-- "
+            + erase,
+        )
+        self.assertEqual(len(produced), 8)
+
+    def test_paging_width(self):
+        """Test that lines longer than the terminal width count as several lines."""
+        self.arguments["is_running"].set()
+        self.arguments["stdin"] = Mock(spec=["read_key"])
+        self.arguments["stdin"].read_key.return_value = "q"
+        self.arguments["stdout"] = io.StringIO()
+        shell = CMDShell(**self.arguments, terminal_length=3, terminal_width=10)
+        shell.writeline("x" * 15 + "\n" + "y")
+        self.assertEqual(self.arguments["stdout"].getvalue().split("\r\n")[0], "x" * 15)
+        self.assertIn("--More--", self.arguments["stdout"].getvalue())
+        self.assertNotIn("y", self.arguments["stdout"].getvalue())
+
+    def test_terminal_settings(self):
+        """Test that the terminal commands of the platforms change the terminal length and width."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        self.arguments["nos_inventory_config"] = {
+            "commands": {"terminal length {lines:int}": {"output": ""}, "screen-length disable": {"output": ""}}
+        }
+        shell = CMDShell(**self.arguments)
+        shell.execute("term len 24\nterminal width 511")
+        self.assertEqual((shell.terminal_length, shell.terminal_width), (24, 511))
+        shell.execute("screen-length disable")
+        self.assertEqual(shell.terminal_length, 0)
+        shell.execute("terminal length 30\nshow version")
+        self.assertEqual(shell.terminal_length, 30)
+
+    def test_terminal_settings_stock_platform(self):
+        """Test that the shell handles the terminal commands the stock platforms do not define."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        self.arguments["nos"] = Nos(filename="fakenos/plugins/nos/platforms_py/cisco_ios.py")
+        shell = CMDShell(**self.arguments)
+        self.assertEqual(shell.execute("terminal length 24\nterm width 80"), 0)
+        self.assertEqual((shell.terminal_length, shell.terminal_width), (24, 80))
+        self.assertEqual(shell.execute("terminal length 0"), 0)
+        self.assertEqual(shell.terminal_length, 0)
+        self.assertEqual(self.arguments["stdout"].getvalue(), "")
+
+    def test__match_command_with_arguments(self):
+        """Test that commands with arguments match the lines starting with them."""
+        shell = CMDShell(**self.arguments)
+        shell.commands["dir"] = {"output": "listing", "arguments": True}
+        # pylint: disable=protected-access
+        self.assertEqual(shell._match_command("dir flash:/image.bin"), "dir")
+        self.assertEqual(shell._match_command("show clock now"), "show clock now")
+
+    def test_execute(self):
+        """Test that the execute method runs the commands and returns the exit status."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        shell = CMDShell(**self.arguments)
+        self.assertEqual(shell.execute("enable\nshow running-config"), 0)
+        self.assertIn("hostname test\r\n", self.arguments["stdout"].getvalue())
+        self.assertEqual(shell.prompt, "test#")
+
+    def test_execute_unknown_command(self):
+        """Test that the execute method returns 1 if the command is not found."""
+        self.arguments["is_running"].set()
+        self.arguments["stdout"] = io.StringIO()
+        shell = CMDShell(**self.arguments)
+        self.assertEqual(shell.execute("show running-config"), 1)
+        self.assertEqual(self.arguments["stdout"].getvalue(), "% Invalid input detected at '^' marker.\r\n")
+
 
 class HotReloadTest(TestCase):
     """
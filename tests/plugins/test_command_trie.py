@@ -0,0 +1,132 @@
+"""
+Module to test the command trie of the shell.
+"""
+
+import unittest
+
+from fakenos.plugins.shell.command_trie import CommandTrie
+
+
+class CommandTrieTest(unittest.TestCase):
+    """
+    Test cases for the CommandTrie class.
+    """
+
+    def setUp(self):
+        self.trie = CommandTrie(
+            {
+                "_default_": {"output": "error"},
+                "show ip interface brief": {"output": "", "help": "Brief summary of IP status"},
+                "show ip route": {"output": "", "help": "IP routing table"},
+                "show interfaces": {"output": "", "help": "Interface status"},
+                "show clock": {"output": "", "help": "Display the system clock"},
+                "sh clock": {"alias": "show clock"},
+                "ping": {"output": "", "help": "Send echo messages", "arguments": True},
+                "dir": {"output": "", "arguments": True},
+                "dir all": {"output": ""},
+            }
+        )
+
+    def test_match_exact(self):
+        """Check that whole commands match."""
+        self.assertEqual(self.trie.match("show ip route"), ("show ip route", {}, False))
+
+    def test_match_abbreviated(self):
+        """Check that unique prefixes of the words match."""
+        self.assertEqual(self.trie.match("sho ip int br"), ("show ip interface brief", {}, False))
+        self.assertEqual(self.trie.match("show  ip  r"), ("show ip route", {}, False))
+
+    def test_match_whole_word_preferred(self):
+        """Check that whole words match first, then as the prefix of the only longer word."""
+        self.assertEqual(self.trie.match("sh clock"), ("sh clock", {}, False))
+        self.assertEqual(self.trie.match("sh ip route"), ("show ip route", {}, False))
+
+    def test_match_ambiguous(self):
+        """Check that prefixes of several words are ambiguous."""
+        self.assertEqual(self.trie.match("s clock"), (None, {}, True))
+        self.assertEqual(self.trie.match("show i"), (None, {}, True))
+
+    def test_match_unknown(self):
+        """Check that unknown and incomplete commands do not match."""
+        self.assertEqual(self.trie.match("show version"), (None, {}, False))
+        self.assertEqual(self.trie.match("show ip"), (None, {}, False))
+        self.assertEqual(self.trie.match("_default_"), (None, {}, False))
+
+    def test_match_arguments(self):
+        """Check that the words following commands with arguments are their arguments."""
+        self.assertEqual(self.trie.match("pi 10.0.0.1 repeat 5"), ("ping", {}, False))
+        self.assertEqual(self.trie.match("dir all"), ("dir all", {}, False))
+        self.assertEqual(self.trie.match("dir all flash:"), ("dir", {}, False))
+
+    def test_complete(self):
+        """Check that the last word is completed up to the next ambiguous character."""
+        self.assertEqual(self.trie.complete("show ip int"), "erface ")
+        self.assertEqual(self.trie.complete("sho"), "w ")
+        self.assertEqual(self.trie.complete("show ip r"), "oute ")
+        self.assertEqual(self.trie.complete("show i"), "")
+        self.assertEqual(self.trie.complete("show in"), "terfaces ")
+        self.assertEqual(self.trie.complete("show "), "")
+        self.assertEqual(self.trie.complete("show xyz"), "")
+
+    def test_help(self):
+        """Check that the help lists the words that can follow the line."""
+        self.assertEqual(
+            self.trie.help("sho ip "),
+            [("interface", ""), ("route", "IP routing table")],
+        )
+        self.assertEqual(self.trie.help("show ip r"), [("route", "IP routing table")])
+        self.assertEqual(self.trie.help("show clock "), [("<cr>", "")])
+        self.assertEqual(self.trie.help("show xyz "), [])
+
+
+class CommandTrieParametersTest(unittest.TestCase):
+    """
+    Test cases for the CommandTrie parameters.
+    """
+
+    def setUp(self):
+        self.trie = CommandTrie(
+            {
+                "show interface {ifname}": {"output": "", "help": "Interface status"},
+                "show interface status": {"output": ""},
+                "show interface summary": {"output": ""},
+                "ping {ip:ipv4}": {"output": "", "help": "Ping an IPv4 address"},
+                "ping {ip:ipv6}": {"output": ""},
+                "ping {host}": {"output": ""},
+                "ping {ip:ipv4} repeat {count:int}": {"output": ""},
+                "show {name:mac}": {"output": ""},
+                "show {command}": {"output": ""},
+            }
+        )
+
+    def test_match_parameters(self):
+        """Check that parameters match the words of their type and capture them."""
+        self.assertEqual(
+            self.trie.match("sh int GigabitEthernet0/1"),
+            ("show interface {ifname}", {"ifname": "GigabitEthernet0/1"}, False),
+        )
+        self.assertEqual(self.trie.match("ping 10.0.0.1"), ("ping {ip:ipv4}", {"ip": "10.0.0.1"}, False))
+        self.assertEqual(self.trie.match("ping ::1"), ("ping {ip:ipv6}", {"ip": "::1"}, False))
+        self.assertEqual(self.trie.match("ping router1"), ("ping {host}", {"host": "router1"}, False))
+        self.assertEqual(
+            self.trie.match("ping 10.0.0.1 rep 5"),
+            ("ping {ip:ipv4} repeat {count:int}", {"ip": "10.0.0.1", "count": 5}, False),
+        )
+        self.assertEqual(self.trie.match("ping 10.0.0.1 repeat five"), (None, {}, False))
+
+    def test_match_words_preferred(self):
+        """Check that command words are preferred to parameters and ambiguous words are not parameters."""
+        self.assertEqual(self.trie.match("show interface stat"), ("show interface status", {}, False))
+        self.assertEqual(self.trie.match("show interface s"), (None, {}, True))
+
+    def test_invalid_parameters_skipped(self):
+        """Check that commands with unknown parameter types or reserved names are not added."""
+        self.assertEqual(self.trie.root.children["show"].parameters, {})
+
+    def test_help_parameters(self):
+        """Check that the help lists the parameters."""
+        self.assertEqual(
+            self.trie.help("ping "),
+            [("<ip>", "Ping an IPv4 address"), ("<ip>", ""), ("<host>", "")],
+        )
+        self.assertEqual(self.trie.help("ping 10.0.0.1 "), [("repeat", ""), ("<cr>", "")])
@@ -0,0 +1,111 @@
+"""
+Test cases for the SFTP subsystem and the SCP command of the paramiko SSH server.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import paramiko
+from netmiko import ConnectHandler, file_transfer
+from scp import SCPClient
+
+from fakenos import FakeNOS
+from fakenos.core.flash import VirtualFlash
+from fakenos.plugins.servers.file_transfer_paramiko import serve_scp
+from tests.utils import get_free_port
+
+
+class FileTransferTest(unittest.TestCase):
+    """
+    Test cases for transferring files to and from the flash of the hosts.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.port = get_free_port()
+        self.inventory = {
+            "default": {"flash_directory": os.path.join(self.directory.name, "flash")},
+            "hosts": {"R1": {"port": self.port, "platform": "cisco_ios"}},
+        }
+        self.data = os.urandom(100000)
+        self.source = os.path.join(self.directory.name, "image.bin")
+        with open(self.source, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _connect(self) -> paramiko.SSHClient:
+        """Helper method to connect to the host"""
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", self.port, username="user", password="user", look_for_keys=False)
+        return client
+
+    def test_sftp_put_and_get(self):
+        """Check that files are uploaded to and downloaded from the flash with SFTP."""
+        with FakeNOS(inventory=self.inventory) as net:
+            client = self._connect()
+            sftp = client.open_sftp()
+            sftp.put(self.source, "image.bin")
+            self.assertEqual(sftp.listdir("/"), ["image.bin"])
+            self.assertEqual(net.hosts["R1"].flash.md5("image.bin"), hashlib.md5(self.data).hexdigest())
+            with sftp.open("image.bin", "rb") as f:
+                self.assertEqual(f.read(), self.data)
+            with self.assertRaises(IOError):
+                sftp.stat("../image.bin")
+            sftp.close()
+            client.close()
+
+    def test_scp_put_and_get(self):
+        """Check that files are uploaded to and downloaded from the flash with SCP."""
+        destination = os.path.join(self.directory.name, "copy.bin")
+        with FakeNOS(inventory=self.inventory) as net:
+            client = self._connect()
+            with SCPClient(client.get_transport()) as scp:
+                scp.put(self.source, "flash:/image.bin")
+                scp.get("flash:/image.bin", destination)
+            client.close()
+            self.assertEqual(net.hosts["R1"].flash.stat("image.bin").st_size, len(self.data))
+        with open(destination, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_scp_aborted_upload(self):
+        """Check that uploads aborted by the client return an error and leave no partial file."""
+        flash = VirtualFlash(os.path.join(self.directory.name, "flash"))
+        channel = Mock()
+        channel.makefile.return_value = io.BytesIO(b"C0644 100 image.bin\n" + self.data[:10])
+        self.assertEqual(serve_scp(channel, flash, "scp -t flash:/image.bin"), 1)
+        self.assertEqual(flash.listdir(), [])
+
+    def test_scp_aborted_download(self):
+        """Check that downloads to clients gone during the transfer return an error without raising."""
+        flash = VirtualFlash(os.path.join(self.directory.name, "flash"))
+        with flash.open("image.bin", "wb") as f:
+            f.write(self.data)
+        channel = Mock()
+        channel.makefile.return_value = io.BytesIO(b"\x00\x00")
+        channel.sendall.side_effect = [None, EOFError]
+        self.assertEqual(serve_scp(channel, flash, "scp -f flash:/image.bin"), 1)
+
+    def test_netmiko_file_transfer(self):
+        """Check that Netmiko verifies the space and the MD5 checksum of transferred files."""
+        with FakeNOS(inventory=self.inventory):
+            device = {
+                "device_type": "cisco_ios",
+                "host": "127.0.0.1",
+                "port": self.port,
+                "username": "user",
+                "password": "user",
+            }
+            with ConnectHandler(**device) as conn:
+                conn.enable()
+                result = file_transfer(
+                    conn, source_file=self.source, dest_file="image.bin", file_system="flash:", direction="put"
+                )
+                self.assertEqual(result, {"file_exists": True, "file_transferred": True, "file_verified": True})
+                self.assertIn("image.bin", conn.send_command("dir flash:"))
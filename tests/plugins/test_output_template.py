@@ -0,0 +1,50 @@
+"""
+Module to test the compiled output templates of the shell.
+"""
+
+import unittest
+
+from fakenos.plugins.shell.output_template import OutputTemplate, compile_output
+
+
+class OutputTemplateTest(unittest.TestCase):
+    """Test the OutputTemplate class."""
+
+    def test_static_output(self):
+        """Test that outputs without slots are static, with doubled braces read as by str.format."""
+        template = OutputTemplate("policy {{\n  from Trust;\n}}")
+        self.assertTrue(template.static)
+        self.assertEqual(template.render(base_prompt="R1"), "policy {\n  from Trust;\n}")
+
+    def test_format_output(self):
+        """Test that format strings are rendered as by str.format."""
+        output = "hostname {base_prompt}\n{{literal}} {count:>3} {name!r}"
+        template = OutputTemplate(output)
+        self.assertFalse(template.static)
+        self.assertEqual(template.names, frozenset({"base_prompt", "count", "name"}))
+        values = {"base_prompt": "R1", "count": 7, "name": "Gi0/1"}
+        self.assertEqual(template.render(**values), output.format(**values))
+
+    def test_brace_heavy_output(self):
+        """Test that only the named words of outputs which are not format strings are slots."""
+        template = OutputTemplate('{"hostname": "{base_prompt}", "interfaces": {"Gi0/1": {}}}')
+        self.assertEqual(template.names, frozenset({"base_prompt"}))
+        self.assertEqual(template.render(base_prompt="R1"), '{"hostname": "R1", "interfaces": {"Gi0/1": {}}}')
+        template = OutputTemplate("system {\n    host-name {base_prompt};\n}")
+        self.assertEqual(template.render(base_prompt="R1"), "system {\n    host-name R1;\n}")
+
+    def test_positional_fields(self):
+        """Test that positional fields are literal text."""
+        template = OutputTemplate("{} {0}")
+        self.assertTrue(template.static)
+        self.assertEqual(template.render(), "{} {0}")
+
+    def test_missing_values(self):
+        """Test that slots with no value or a value not fitting their format are left as is."""
+        template = OutputTemplate("{base_prompt} {count:d}")
+        self.assertEqual(template.render(base_prompt="R1"), "R1 {count:d}")
+        self.assertEqual(template.render(base_prompt="R1", count="many"), "R1 {count:d}")
+
+    def test_compile_output_cached(self):
+        """Test that outputs are compiled once."""
+        self.assertIs(compile_output("uptime {base_prompt}"), compile_output("uptime {base_prompt}"))
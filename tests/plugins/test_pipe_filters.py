@@ -0,0 +1,114 @@
+"""
+Module to test the output modifiers of the shell.
+"""
+
+import unittest
+
+from fakenos.plugins.shell.pipe_filters import (
+    apply_filters,
+    begin,
+    compile_pattern,
+    count,
+    exclude,
+    include,
+    iter_lines,
+    parse_pipes,
+    section,
+)
+
+CONFIG = """hostname R1
+interface Gi0/1
+ ip address 10.0.0.1 255.255.255.0
+ no shutdown
+router bgp 65000
+ neighbor 10.0.0.2 remote-as 65001
+ address-family ipv4
+  network 10.0.0.0
+!
+line vty 0 4"""
+
+
+class PipeFiltersTest(unittest.TestCase):
+    """
+    Test cases for the output modifiers.
+    """
+
+    def _filter(self, line: str) -> list:
+        """Helper method to filter the configuration with the modifiers of the line"""
+        _, filters = parse_pipes(line)
+        return list(apply_filters(iter_lines(CONFIG), filters))
+
+    def test_iter_lines(self):
+        """Check that the lines are split on any newline."""
+        self.assertEqual(list(iter_lines("a\r\nb\nc\rd\n")), ["a", "b", "c", "d"])
+        self.assertEqual(list(iter_lines("")), [])
+
+    def test_iter_lines_chunks(self):
+        """Check that the lines are taken from the chunks as they are produced, even split."""
+        chunks = iter(["host", "name R1\r", "\n!\ninterface Gi0/1\r", "\n", "", " no shut"])
+        lines = iter_lines(chunks)
+        self.assertEqual(next(lines), "hostname R1")
+        self.assertEqual(next(chunks), "\n")
+        self.assertEqual(list(lines), ["!", "interface Gi0/1", " no shut"])
+        self.assertEqual(list(iter_lines(["a\r", "\nb\r"])), ["a", "b"])
+        self.assertEqual(list(iter_lines(["a\n\r", "\r"])), ["a", "", ""])
+
+    def test_iter_lines_small_chunks(self):
+        """Check that long lines streamed in small chunks are split as the whole text is."""
+        text = ("x" * 100000 + "\r\n") * 2 + "a\rb\n\nc"
+        self.assertEqual(list(iter_lines(iter(text))), list(iter_lines(text)))
+
+    def test_parse_pipes(self):
+        """Check that the modifiers are split off the command."""
+        command, filters = parse_pipes("show run | inc up|down | ex admin")
+        self.assertEqual(command, "show run")
+        self.assertEqual(filters, [(include, compile_pattern("up|down")), (exclude, compile_pattern("admin"))])
+        self.assertEqual(parse_pipes("show log | count"), ("show log", [(count, None)]))
+
+    def test_parse_pipes_no_modifiers(self):
+        """Check that lines with pipes not followed by a modifier are left as is."""
+        self.assertEqual(parse_pipes("show run | foo bar"), ("show run | foo bar", []))
+        self.assertEqual(parse_pipes("show run | include"), ("show run | include", []))
+        self.assertEqual(parse_pipes("show run"), ("show run", []))
+
+    def test_compile_pattern_cached(self):
+        """Check that patterns are compiled once and invalid ones match as text."""
+        self.assertIs(compile_pattern("^interface"), compile_pattern("^interface"))
+        self.assertTrue(compile_pattern("Gi0/1 (").search("interface Gi0/1 ("))
+
+    def test_include_exclude(self):
+        """Check that lines are kept or dropped if they match."""
+        self.assertEqual(
+            self._filter("x | include 10\\.0\\.0\\.[12] "),
+            [" ip address 10.0.0.1 255.255.255.0", " neighbor 10.0.0.2 remote-as 65001"],
+        )
+        self.assertEqual(len(self._filter("x | exclude ^\\s")), 5)
+
+    def test_begin(self):
+        """Check that lines are kept from the first matching line."""
+        self.assertEqual(self._filter("x | begin ^!"), ["!", "line vty 0 4"])
+
+    def test_section(self):
+        """Check that matching lines are kept with the lines indented below them."""
+        self.assertEqual(
+            self._filter("x | section bgp"),
+            [
+                "router bgp 65000",
+                " neighbor 10.0.0.2 remote-as 65001",
+                " address-family ipv4",
+                "  network 10.0.0.0",
+            ],
+        )
+
+    def test_count(self):
+        """Check that matching lines are counted."""
+        self.assertEqual(self._filter("x | count ^\\s"), ["Number of lines which match regexp = 5"])
+        self.assertEqual(self._filter("x | count"), ["Number of lines which match regexp = 10"])
+
+    def test_filters_are_lazy(self):
+        """Check that the lines are filtered as they are produced."""
+        lines = iter(["a", "b", "a"] + ["c"] * 10)
+        filtered = begin(include(lines, compile_pattern("a|b")), compile_pattern("b"))
+        self.assertEqual(next(filtered), "b")
+        self.assertEqual(next(lines), "a")
+        self.assertEqual(list(section(iter([]), compile_pattern("x"))), [])
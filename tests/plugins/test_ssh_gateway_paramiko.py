@@ -0,0 +1,131 @@
+"""
+Test cases for the ssh_gateway_paramiko plugin.
+"""
+
+import time
+import unittest
+from unittest.mock import Mock
+
+import paramiko
+
+from fakenos import FakeNOS
+from fakenos.plugins.servers.ssh_gateway_paramiko import ParamikoSshGatewayInterface
+
+from tests.utils import get_free_port
+
+
+def read_until(channel: paramiko.Channel, pattern: str, timeout: int = 5) -> str:
+    """Read from the channel until the pattern is found"""
+    output = ""
+    deadline = time.time() + timeout
+    while pattern not in output and time.time() < deadline:
+        if channel.recv_ready():
+            output += channel.recv(1024).decode()
+        else:
+            time.sleep(0.01)
+    return output
+
+
+class ParamikoSshGatewayInterfaceTest(unittest.TestCase):
+    """
+    Test cases for the ParamikoSshGatewayInterface class.
+    """
+
+    def setUp(self):
+        """Set up the hosts the gateway routes to."""
+        self.hosts = {
+            "R1": Mock(username="fakenos", password="fakenos", running=True),
+            "R2": Mock(username="fakenos", password="fakenos", running=False),
+        }
+        self.gateway = ParamikoSshGatewayInterface(resolve_host=self.hosts.get, username="gw", password="gw")
+
+    def test_auth_with_host_credentials(self):
+        """Check that the username selects the host and its credentials are used."""
+        self.assertEqual(self.gateway.check_auth_password("fakenos@R1", "fakenos"), paramiko.AUTH_SUCCESSFUL)
+        self.assertEqual(self.gateway.target, self.hosts["R1"])
+
+    def test_auth_with_wrong_host_credentials(self):
+        """Check that the authentication fails with wrong host credentials."""
+        self.assertEqual(self.gateway.check_auth_password("fakenos@R1", "wrong"), paramiko.AUTH_FAILED)
+        self.assertIsNone(self.gateway.target)
+
+    def test_auth_host_not_running(self):
+        """Check that the authentication fails if the host is not running."""
+        self.assertEqual(self.gateway.check_auth_password("fakenos@R2", "fakenos"), paramiko.AUTH_FAILED)
+        self.assertEqual(self.gateway.check_auth_password("fakenos@R3", "fakenos"), paramiko.AUTH_FAILED)
+
+    def test_auth_with_gateway_credentials(self):
+        """Check that plain usernames authenticate against the gateway credentials."""
+        self.assertEqual(self.gateway.check_auth_password("gw", "gw"), paramiko.AUTH_SUCCESSFUL)
+        self.assertIsNone(self.gateway.target)
+
+    def test_env_request_selects_host(self):
+        """Check that the environment variable routes the session to the host."""
+        channel = Mock(get_id=Mock(return_value=1))
+        self.assertTrue(self.gateway.check_channel_env_request(channel, b"FAKENOS_HOST", b"R1"))
+        self.assertEqual(self.gateway.env_targets, {1: self.hosts["R1"]})
+        self.assertIsNone(self.gateway.target)
+        self.assertFalse(self.gateway.check_channel_env_request(channel, b"FAKENOS_HOST", b"R2"))
+        self.assertFalse(self.gateway.check_channel_env_request(channel, b"LANG", b"C"))
+
+
+class ParamikoSshGatewayTest(unittest.TestCase):
+    """
+    Test cases for the ParamikoSshGateway class running in FakeNOS.
+    """
+
+    def setUp(self):
+        """Set up the inventory with hosts without listeners."""
+        self.port = get_free_port()
+        self.inventory = {
+            "gateway": {
+                "plugin": "ParamikoSshGateway",
+                "port": self.port,
+                "configuration": {"username": "gw", "password": "gw"},
+            },
+            "default": {"listen": False, "username": "fakenos", "password": "fakenos"},
+            "hosts": {"R1": {"platform": "cisco_ios"}, "R2": {"platform": "arista_eos"}},
+        }
+
+    def _connect(self, username: str, password: str) -> paramiko.SSHClient:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", self.port, username=username, password=password, look_for_keys=False)
+        return client
+
+    def test_route_by_username(self):
+        """Check that sessions are routed to the host in the username."""
+        with FakeNOS(inventory=self.inventory) as net:
+            assert net.hosts["R1"].server is None
+            for host in ["R1", "R2"]:
+                client = self._connect(f"fakenos@{host}", "fakenos")
+                channel = client.invoke_shell()
+                self.assertIn(f"{host}>", read_until(channel, f"{host}>"))
+                client.close()
+
+    def test_route_by_environment_variable(self):
+        """Check that sessions are routed to the host in the environment variable."""
+        with FakeNOS(inventory=self.inventory):
+            client = self._connect("gw", "gw")
+            channel = client.get_transport().open_session()
+            channel.set_environment_variable("FAKENOS_HOST", "R2")
+            channel.get_pty()
+            channel.invoke_shell()
+            self.assertIn("R2>", read_until(channel, "R2>"))
+            client.close()
+
+    def test_route_channels_by_environment_variable(self):
+        """Check that channels of the same transport are routed to the hosts in their own environment variable."""
+        with FakeNOS(inventory=self.inventory):
+            client = self._connect("fakenos@R1", "fakenos")
+            channels = {}
+            for host in ["R2", "R1"]:
+                channel = client.get_transport().open_session()
+                channel.set_environment_variable("FAKENOS_HOST", host)
+                channels[host] = channel
+            for host, channel in channels.items():
+                channel.get_pty()
+                channel.invoke_shell()
+            for host, channel in channels.items():
+                self.assertIn(f"{host}>", read_until(channel, f"{host}>"))
+            client.close()
@@ -0,0 +1,132 @@
+"""
+Test cases for the ssh_keys_paramiko module.
+"""
+
+import io
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import paramiko
+import pytest
+from netmiko import ConnectHandler
+
+from fakenos import FakeNOS
+from fakenos.plugins.servers.ssh_keys_paramiko import DEFAULT_SSH_KEY, SshKeyStore
+from tests.utils import get_free_port
+
+
+class SshKeyStoreTest(unittest.TestCase):
+    """
+    Test cases for the SshKeyStore class.
+    """
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        self.key_store = SshKeyStore(self.cache_directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory, ignore_errors=True)
+
+    def test_get_key_default(self):
+        """Check that the default key is parsed once and shared."""
+        key = self.key_store.get_key()
+        self.assertEqual(key, paramiko.RSAKey(file_obj=io.StringIO(DEFAULT_SSH_KEY)))
+        self.assertIs(self.key_store.get_key(), key)
+
+    def test_get_key_file(self):
+        """Check that a key file is parsed once and shared."""
+        key = self.key_store.get_key("tests/assets/ssh_host_rsa_key_with_password", "password")
+        self.assertEqual(
+            key, paramiko.RSAKey(filename="tests/assets/ssh_host_rsa_key_with_password", password="password")
+        )
+        self.assertIs(self.key_store.get_key("tests/assets/ssh_host_rsa_key_with_password", "password"), key)
+
+    def test_get_host_key_generates_and_saves(self):
+        """Check that host keys are generated once per host and saved."""
+        for key_type, key_name in (("ed25519", "ssh-ed25519"), ("ecdsa", "ecdsa-sha2-nistp256")):
+            key = self.key_store.get_host_key("R1", key_type)
+            self.assertEqual(key.get_name(), key_name)
+            self.assertIs(self.key_store.get_host_key("R1", key_type), key)
+            self.assertNotEqual(self.key_store.get_host_key("R2", key_type), key)
+            key_file = self.key_store.key_file("R1", key_type)
+            self.assertEqual(stat.S_IMODE(os.stat(key_file).st_mode), 0o600)
+
+    def test_get_host_key_warm_start(self):
+        """Check that saved host keys are loaded instead of generated."""
+        ed25519_key = self.key_store.get_host_key("R1", "ed25519")
+        ecdsa_key = self.key_store.get_host_key("R1", "ecdsa")
+        key_store = SshKeyStore(self.cache_directory)
+        self.assertEqual(key_store.get_host_key("R1", "ed25519"), ed25519_key)
+        self.assertEqual(key_store.get_host_key("R1", "ecdsa"), ecdsa_key)
+
+    def test_get_host_key_corrupted_file(self):
+        """Check that a corrupted saved key is replaced by a new one."""
+        with open(self.key_store.key_file("R1", "ed25519"), "w", encoding="utf-8") as f:
+            f.write("not a key")
+        key = self.key_store.get_host_key("R1", "ed25519")
+        self.assertEqual(SshKeyStore(self.cache_directory).get_host_key("R1", "ed25519"), key)
+
+    def test_get_host_key_symbolic_link(self):
+        """Check that a symbolic link planted as the key file is not followed."""
+        planted = os.path.join(self.cache_directory, "planted_key")
+        with open(planted, "w", encoding="utf-8") as f:
+            f.write(DEFAULT_SSH_KEY)
+        key_file = self.key_store.key_file("R1", "ed25519")
+        os.symlink(planted, key_file)
+        self.assertEqual(self.key_store.get_host_key("R1", "ed25519").get_name(), "ssh-ed25519")
+        self.assertFalse(os.path.islink(key_file))
+        with open(planted, encoding="utf-8") as f:
+            self.assertEqual(f.read(), DEFAULT_SSH_KEY)
+
+    @unittest.skipUnless(hasattr(os, "geteuid") and os.geteuid() == 0, "changing the owner requires root")
+    def test_get_host_key_other_owner(self):
+        """Check that keys owned by other users are replaced, not loaded."""
+        key = self.key_store.get_host_key("R1", "ed25519")
+        os.chown(self.key_store.key_file("R1", "ed25519"), 12345, 12345)
+        self.assertNotEqual(SshKeyStore(self.cache_directory).get_host_key("R1", "ed25519"), key)
+        self.assertEqual(os.stat(self.key_store.key_file("R1", "ed25519")).st_uid, os.geteuid())
+
+    def test_cache_directory_private(self):
+        """Check that the cache directory is created private to the user."""
+        cache_directory = os.path.join(self.cache_directory, "ssh_keys")
+        SshKeyStore(cache_directory).get_host_key("R1", "ed25519")
+        self.assertEqual(stat.S_IMODE(os.stat(cache_directory).st_mode), 0o700)
+        self.assertEqual(os.listdir(cache_directory), ["R1_ed25519_key"])
+
+    def test_get_host_key_unsupported_type(self):
+        """Check that unsupported key types raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.key_store.get_host_key("R1", "dsa")
+
+
+@pytest.mark.timeout(60)
+class HostKeyTypeTest(unittest.TestCase):
+    """
+    Test cases for the servers using per-host generated keys.
+    """
+
+    def test_ssh_key_type(self):
+        """Check that clients connect to hosts using Ed25519 keys."""
+        port = get_free_port()
+        inventory = {
+            "hosts": {
+                "R1": {
+                    "username": "user",
+                    "password": "user",
+                    "port": port,
+                    "platform": "cisco_ios",
+                    "server": {"plugin": "ParamikoSshServer", "configuration": {"ssh_key_type": "ed25519"}},
+                }
+            }
+        }
+        with FakeNOS(inventory=inventory) as net:
+            # the key is generated by the first session, not when the host starts
+            self.assertIsNone(net.hosts["R1"].server._ssh_host_key)
+            self.assertEqual(net.hosts["R1"].server._ssh_server_key.get_name(), "ssh-ed25519")
+            with ConnectHandler(
+                device_type="cisco_ios", host="localhost", port=port, username="user", password="user"
+            ) as conn:
+                self.assertNotIn("Invalid input", conn.send_command("show clock"))
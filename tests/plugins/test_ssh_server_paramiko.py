@@ -3,7 +3,11 @@ Test cases for the ssh_server_paramiko plugin.
 """
 
 import io
+import os
+import socket
+import tempfile
 import threading
+import time
 from typing import Dict
 import unittest
 from unittest import mock
@@ -11,15 +15,17 @@ from unittest.mock import MagicMock, Mock
 
 import paramiko
 
+from fakenos import FakeNOS
 from fakenos.plugins.servers.ssh_server_paramiko import (
     ParamikoSshServerInterface,
     ParamikoSshServer,
-    TapIO,
-    channel_to_shell_tap,
-    shell_to_channel_tap,
+    ChannelIO,
     DEFAULT_SSH_KEY,
+    SSH_PROFILES,
 )
 
+from tests.utils import get_free_port
+
 
 class ParamikoSSHServerInterfaceTest(unittest.TestCase):
     """
@@ -119,303 +125,439 @@ class ParamikoSSHServerInterfaceTest(unittest.TestCase):
             paramiko_server.check_auth_password(username="username", password="password"), paramiko.AUTH_SUCCESSFUL
         )
 
+    def test_check_channel_direct_tcpip_request_to_running_host(self):
+        """Check that direct-tcpip channels to running hosts are accepted."""
+        host = Mock(running=True, username="user", password="user")
+        paramiko_server: ParamikoSshServerInterface = ParamikoSshServerInterface(
+            username="user",
+            password="user",
+            resolve_endpoint=lambda address, port: host if (address, port) == ("127.0.0.1", 6001) else None,
+        )
+        paramiko_server.check_auth_password("user", "user")
+        self.assertEqual(
+            paramiko_server.check_channel_direct_tcpip_request(3, ("127.0.0.1", 50000), ("127.0.0.1", 6001)),
+            paramiko.OPEN_SUCCEEDED,
+        )
+        self.assertEqual(paramiko_server.channel_targets, {3: host})
+        self.assertEqual(
+            paramiko_server.check_channel_direct_tcpip_request(4, ("127.0.0.1", 50000), ("127.0.0.1", 6002)),
+            paramiko.OPEN_FAILED_CONNECT_FAILED,
+        )
+
+    def test_check_channel_direct_tcpip_request_other_credentials(self):
+        """Check that direct-tcpip channels to hosts with other credentials are rejected."""
+        host = Mock(running=True, username="admin", password="secret")
+        paramiko_server: ParamikoSshServerInterface = ParamikoSshServerInterface(
+            username="user", password="user", resolve_endpoint=lambda address, port: host
+        )
+        paramiko_server.check_auth_password("user", "user")
+        self.assertEqual(
+            paramiko_server.check_channel_direct_tcpip_request(3, ("127.0.0.1", 50000), ("R2", 22)),
+            paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED,
+        )
+        self.assertEqual(paramiko_server.channel_targets, {})
+
+    def test_check_channel_direct_tcpip_request_without_resolver(self):
+        """Check that direct-tcpip channels are rejected if hosts cannot be resolved."""
+        paramiko_server: ParamikoSshServerInterface = ParamikoSshServerInterface()
+        self.assertEqual(
+            paramiko_server.check_channel_direct_tcpip_request(3, ("127.0.0.1", 50000), ("127.0.0.1", 6001)),
+            paramiko.OPEN_FAILED_CONNECT_FAILED,
+        )
+
+    def test_check_channel_exec_request(self):
+        """Check that the exec request records the command of the channel."""
+        paramiko_server: ParamikoSshServerInterface = ParamikoSshServerInterface()
+        self.assertTrue(paramiko_server.check_channel_exec_request(1, b"show version"))
+        self.assertEqual(paramiko_server.exec_commands[1], "show version")
+        self.assertTrue(paramiko_server.get_channel_request(1).is_set())
+
     def test_get_banner(self):
         """Check that the banner is returned."""
         paramiko_server: ParamikoSshServerInterface = ParamikoSshServerInterface("banner")
         self.assertEqual(paramiko_server.get_banner(), ("banner\r\n", "en-US"))
 
 
-class TapIOTest(unittest.TestCase):
+class DirectTcpipTest(unittest.TestCase):
     """
-    Test cases for the TapIO class.
+    Test cases for reaching several hosts through one SSH transport.
     """
 
-    def test_init(self):
-        """Check that the TapIO object is initialized correctly."""
-        run_srv: threading.Event = threading.Event()
-        run_srv.set()
-        tap_io: TapIO = TapIO(run_srv=run_srv)
-        self.assertTrue(tap_io.run_srv)
-        self.assertEqual(tap_io.lines, [])
-        self.assertEqual(tap_io.closed, False)
-        run_srv.clear()
+    def test_direct_tcpip_channels_to_hosts(self):
+        """Check that one transport reaches other hosts by address and port or by name."""
+        ports = [get_free_port(), get_free_port()]
+        inventory = {
+            "hosts": {
+                "R1": {"port": ports[0], "platform": "cisco_ios"},
+                "R2": {"port": ports[1], "platform": "arista_eos"},
+                "R3": {"listen": False, "platform": "cisco_ios"},
+                "R4": {"listen": False, "platform": "cisco_ios", "password": "secret"},
+            }
+        }
+        with FakeNOS(inventory=inventory):
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.1", ports[0], username="user", password="user", look_for_keys=False)
+            transport = client.get_transport()
+            for destination, prompt in [(("127.0.0.1", ports[1]), "R2>"), (("R3", 22), "R3>")]:
+                channel = transport.open_channel("direct-tcpip", destination, ("127.0.0.1", 0))
+                output = ""
+                while prompt not in output:
+                    output += channel.recv(1024).decode()
+                channel.close()
+            with self.assertRaises(paramiko.ChannelException):
+                transport.open_channel("direct-tcpip", ("127.0.0.1", 1), ("127.0.0.1", 0))
+            with self.assertRaises(paramiko.ChannelException):
+                transport.open_channel("direct-tcpip", ("R4", 22), ("127.0.0.1", 0))
+            client.close()
+
+
+class SessionChannelsTest(unittest.TestCase):
+    """
+    Test cases for serving several session channels over one SSH transport.
+    """
 
-    def test_readline(self):
-        """Check that the readline method returns the correct line."""
-        mock_run_srv: Mock = Mock()
-        mock_run_srv.is_set.side_effect = [True] * 10 + [False]
-        tap_io: TapIO = TapIO(run_srv=mock_run_srv)
-        tap_io.lines = ["line1", "line2"]
+    def test_concurrent_session_channels(self):
+        """Check that shells of the same transport run concurrently."""
+        port = get_free_port()
+        with FakeNOS(inventory={"hosts": {"R1": {"port": port, "platform": "cisco_ios"}}}):
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+            channels = [client.invoke_shell(), client.invoke_shell()]
+            for channel in channels:
+                output = ""
+                while "R1>" not in output:
+                    output += channel.recv(1024).decode()
+            channels[0].close()
+            channels[1].send("show clock\r\n")
+            output = ""
+            while output.count("R1>") < 1:
+                output += channels[1].recv(1024).decode()
+            self.assertIn("show clock", output)
+            self.assertTrue(client.get_transport().is_active())
+            client.close()
+
+
+@unittest.skipIf(not hasattr(socket, "AF_UNIX"), "Unix-domain sockets are not supported")
+class UnixSocketTest(unittest.TestCase):
+    """
+    Test cases for serving SSH over Unix-domain sockets.
+    """
 
-        self.assertEqual(tap_io.readline(), "line2")
-        self.assertEqual(tap_io.readline(), "line1")
-        self.assertEqual(tap_io.readline(), None)
+    def test_ssh_over_unix_socket(self):
+        """Check that paramiko clients connect to the host using a socket object."""
+        port = get_free_port()
+        with tempfile.TemporaryDirectory() as directory:
+            inventory = {
+                "hosts": {
+                    "R": {
+                        "replicas": 2,
+                        "port": [port, port + 1],
+                        "platform": "cisco_ios",
+                        "server": {
+                            "plugin": "ParamikoSshServer",
+                            "configuration": {"unix_socket": os.path.join(directory, "{name}.sock")},
+                        },
+                    }
+                }
+            }
+            with FakeNOS(inventory=inventory):
+                for name in ["R0", "R1"]:
+                    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                        sock.connect(os.path.join(directory, f"{name}.sock"))
+                        client = paramiko.SSHClient()
+                        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                        client.connect(name, sock=sock, username="user", password="user", look_for_keys=False)
+                        _, stdout, _ = client.exec_command("show clock")
+                        self.assertEqual(stdout.channel.recv_exit_status(), 0)
+                        client.close()
+
+
+class ExecCommandTest(unittest.TestCase):
+    """
+    Test cases for running commands over SSH exec channels.
+    """
 
-        self.assertEqual(mock_run_srv.is_set.call_count, 11)
+    def test_exec_command(self):
+        """Check that exec requests return the command output and the exit status."""
+        port = get_free_port()
+        with FakeNOS(inventory={"hosts": {"R1": {"port": port, "platform": "cisco_ios"}}}):
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+            for command, exit_status in [("show clock", 0), ("show foo", 1)]:
+                _, stdout, _ = client.exec_command(command)
+                output = stdout.read().decode()
+                self.assertEqual(stdout.channel.recv_exit_status(), exit_status)
+                self.assertNotIn("R1>", output)
+                self.assertTrue(output.endswith("\r\n"))
+            client.close()
+
+
+class SshProfileTest(unittest.TestCase):
+    """
+    Test cases for the SSH transport performance profiles.
+    """
 
-    def test_write(self):
-        """Check that the write method appends the line to the lines list."""
-        tap_io: TapIO = TapIO(run_srv=threading.Event())
-        tap_io.write("line1")
-        self.assertEqual(tap_io.lines, ["line1"])
+    def test_make_transport_fast_profile(self):
+        """Check that the profile algorithms and window sizes are applied to the transport."""
+        paramiko_server: ParamikoSshServer = ParamikoSshServer(
+            shell=MagicMock(),
+            nos=MagicMock(),
+            nos_inventory_config={},
+            port=6000,
+            username="user",
+            password="user",
+            ssh_profile="fast",
+        )
+        self.assertEqual(paramiko_server._ssh_server_key.get_name(), "ssh-ed25519")
+        with socket.socket() as sock:
+            session = paramiko_server._make_transport(sock)
+            self.assertEqual(session.get_security_options().kex[0], "curve25519-sha256@libssh.org")
+            self.assertEqual(session.get_security_options().ciphers[0], "aes128-gcm@openssh.com")
+            self.assertNotIn("3des-cbc", session.get_security_options().ciphers)
+            self.assertEqual(session.default_window_size, SSH_PROFILES["fast"]["window_size"])
+            self.assertEqual(session.default_max_packet_size, SSH_PROFILES["fast"]["max_packet_size"])
+            session.close()
+
+    def test_unsupported_profile(self):
+        """Check that unsupported profiles raise ValueError."""
+        with self.assertRaises(ValueError):
+            ParamikoSshServer(
+                shell=MagicMock(),
+                nos=MagicMock(),
+                nos_inventory_config={},
+                port=6000,
+                username="user",
+                password="user",
+                ssh_profile="turbo",
+            )
 
+    def test_compressed_profile(self):
+        """Check that clients negotiate compression with the compressed profile."""
+        port = get_free_port()
+        inventory = {
+            "hosts": {
+                "R1": {
+                    "port": port,
+                    "platform": "cisco_ios",
+                    "server": {"plugin": "ParamikoSshServer", "configuration": {"ssh_profile": "compressed"}},
+                }
+            }
+        }
+        with FakeNOS(inventory=inventory):
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False, compress=True)
+            _, stdout, _ = client.exec_command("show clock")
+            self.assertEqual(stdout.channel.recv_exit_status(), 0)
+            self.assertEqual(client.get_transport().remote_compression, "zlib@openssh.com")
+            client.close()
 
-class ChannelToShellTapTest(unittest.TestCase):
+
+class SessionTimeoutTest(unittest.TestCase):
     """
-    Test cases for the ChannelToShellTap class.
+    Test cases for the idle and absolute session timeouts.
     """
 
-    def setUp(self):
-        """Set up the ChannelToShellTap object."""
-        self.mock_channel_stdio: Mock = Mock()
-        self.mock_channel_stdio.read.return_value = b"b"
-        self.mock_shell_stdin: Mock = Mock()
-        self.mock_shell_replied_event: Mock = Mock()
-        self.mock_run_srv: Mock = Mock()
-
-    def test_channel_to_shell_tap_received_byte(self):
-        """Check that the ChannelToShellTap object receives a byte."""
-        self.mock_run_srv.is_set.side_effect = [True] * 10 + [False]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_channel_stdio.read.assert_called_with(1)
-
-    def test_channel_to_shell_tap_shell_replied_event_wait(self):
-        """Check that the ChannelToShellTap object waits for the shell_replied_event."""
-        self.mock_run_srv.is_set.side_effect = [True] * 10 + [False]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_shell_replied_event.wait.assert_called_with(10)
-
-    def test_channel_to_shell_tap_break_loop_when_channel_stdio_not_active(self):
-        """Check that the ChannelToShellTap object breaks the loop when the channel_stdio is not active."""
-        self.mock_channel_stdio.read.return_value = b""
-        self.mock_channel_stdio.channel.active = False
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.assertEqual(self.mock_run_srv.is_set.call_count, 1)
-
-    def test_channel_to_shell_tap_break_loop_if_os_error(self):
-        """Check that the ChannelToShellTap object breaks the loop if an OSError occurs."""
-        self.mock_channel_stdio.write.side_effect = OSError
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.assertEqual(self.mock_run_srv.is_set.call_count, 1)
-
-    def test_channel_to_shell_tap_break_loop_if_eof_error(self):
-        """Check that the ChannelToShellTap object breaks the loop if an EOFError occurs."""
-        self.mock_channel_stdio.write.side_effect = EOFError
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.assertEqual(self.mock_run_srv.is_set.call_count, 1)
-
-    def test_channel_to_shell_tap_byte_return_character(self):
-        """Check that the ChannelToShellTap object returns a character."""
-        self.mock_run_srv.is_set.side_effect = [True] * 2 + [False]
-        self.mock_channel_stdio.read.side_effect = [b"\r", b"\n"]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_channel_stdio.write.assert_called_with(b"\r\n")
-        self.assertEqual(self.mock_channel_stdio.write.call_count, 2)
-
-        self.mock_shell_stdin.write.assert_called_with("\n")
-        self.assertEqual(self.mock_shell_stdin.write.call_count, 2)
-
-        self.assertEqual(self.mock_shell_replied_event.clear.call_count, 2)
-
-    def test_channel_to_shell_tap_byte_return_x00_or_empty(self):
-        """Check that the ChannelToShellTap object returns a character."""
-        self.mock_run_srv.is_set.side_effect = [True] * 3 + [False]
-        self.mock_channel_stdio.read.side_effect = [b"\x00", b"", b"\n"]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_channel_stdio.write.assert_any_call(b"\x00")
-        self.mock_channel_stdio.write.assert_any_call(b"")
-        self.assertEqual(self.mock_channel_stdio.write.call_count, 3)
-
-        self.assertEqual(self.mock_channel_stdio.write.call_count, 3)
-        self.mock_shell_stdin.write.assert_called_with("\n")
-
-    def test_channel_to_shell_tap_byte_return_other(self):
-        """Check that the ChannelToShellTap object returns a character."""
-        self.mock_run_srv.is_set.side_effect = [True] * 3 + [False]
-        self.mock_channel_stdio.read.side_effect = [b"b", b"c", b"\n"]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_channel_stdio.write.assert_any_call(b"b")
-        self.mock_channel_stdio.write.assert_any_call(b"c")
-        self.assertEqual(self.mock_channel_stdio.write.call_count, 3)
-
-        self.assertEqual(self.mock_shell_stdin.write.call_count, 1)
-
-    def test_channel_to_shell_tap_exit_run_srv(self):
-        """Check that the ChannelToShellTap object exits the run_srv."""
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_channel_stdio.read.side_effect = [b"\x00"]
-        channel_to_shell_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdin=self.mock_shell_stdin,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.assertEqual(self.mock_run_srv.is_set.call_count, 2)
-        self.assertEqual(self.mock_channel_stdio.read.call_count, 1)
-
-
-class ShellToChannelTapTest(unittest.TestCase):
+    def _connect(self, configuration: Dict) -> paramiko.SSHClient:
+        """Helper method to connect to a host with the given server configuration"""
+        port = get_free_port()
+        inventory = {
+            "hosts": {
+                "R1": {
+                    "port": port,
+                    "platform": "cisco_ios",
+                    "server": {"plugin": "ParamikoSshServer", "configuration": configuration},
+                }
+            }
+        }
+        net = FakeNOS(inventory=inventory)
+        net.start()
+        self.addCleanup(net.stop)
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+        self.addCleanup(client.close)
+        return client
+
+    def _wait_closed(self, transport: paramiko.Transport, timeout: float) -> bool:
+        """Helper method to wait for the transport to be closed"""
+        deadline = time.monotonic() + timeout
+        while transport.is_active() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not transport.is_active()
+
+    def test_idle_timeout(self):
+        """Check that idle sessions are closed and active ones are kept."""
+        client = self._connect({"idle_timeout": 1})
+        channel = client.invoke_shell()
+        for _ in range(3):
+            time.sleep(0.5)
+            channel.send("\r\n")
+        self.assertTrue(client.get_transport().is_active())
+        self.assertTrue(self._wait_closed(client.get_transport(), 3))
+
+    def test_absolute_timeout(self):
+        """Check that sessions are closed after the absolute timeout regardless of activity."""
+        client = self._connect({"absolute_timeout": 1})
+        channel = client.invoke_shell()
+        deadline = time.monotonic() + 3
+        while time.monotonic() < deadline:
+            try:
+                channel.send("\r\n")
+            except (OSError, EOFError):
+                break
+            time.sleep(0.1)
+        self.assertTrue(self._wait_closed(client.get_transport(), 1))
+
+
+class ChannelIOTest(unittest.TestCase):
     """
-    Test cases for the ShellToChannelTap class.
+    Test cases for the ChannelIO class.
     """
 
     def setUp(self):
-        """Set up the ShellToChannelTap object."""
-        self.mock_channel_stdio: Mock = Mock()
-        self.mock_channel_stdio.closed = False
-        self.mock_shell_stdout: Mock = Mock()
-        self.mock_shell_replied_event: Mock = Mock()
-        self.mock_run_srv: Mock = Mock()
-
-    def test_shell_to_channel_tap_channel_stdio_closed(self):
-        """Check that the ShellToChannelTap object closes the channel_stdio."""
-        self.mock_channel_stdio.closed = True
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_run_srv.is_set.assert_called_once()
+        """Set up the ChannelIO object over a mocked channel."""
+        self.channel: Mock = Mock(out_max_packet_size=16)
+        self.channel.send.side_effect = len
+        self.is_running, self.session_running = threading.Event(), threading.Event()
+        self.is_running.set()
+        self.session_running.set()
+        self.activity: Mock = Mock()
+        self.channel_io = ChannelIO(self.channel, self.is_running, self.session_running, self.activity)
+
+    def _sent(self) -> bytes:
+        """Helper method to get the data sent to the channel"""
+        return b"".join(call.args[0] for call in self.channel.send.call_args_list)
 
-    def test_shell_to_channel_tap_shell_stdout_readline_return_none(self):
-        """
-        Check that the ShellToChannelTap object reads a line
-        from the shell_stdout that is None.
-        """
-        self.mock_shell_stdout.readline.return_value = None
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
+    def test_readline(self):
+        """Check that lines are read, echoed at once and ended by CR, LF or CRLF."""
+        self.channel.recv.side_effect = [b"show clock\r\nshow ver", b"sion\r\x00", b"\n"]
+        self.assertEqual(self.channel_io.readline(), "show clock\n")
+        self.assertEqual(self.channel_io.readline(), "show version\n")
+        self.assertEqual(self.channel.send.call_args_list[0].args[0], b"show clock\r\n")
+        self.assertEqual(self._sent(), b"show clock\r\nshow version\r\n")
+        self.assertEqual(self.activity.call_count, 2)
+
+    def test_readline_backspace(self):
+        """Check that backspaces remove the last character."""
+        self.channel.recv.side_effect = [b"shox\x7fw\n"]
+        self.assertEqual(self.channel_io.readline(), "show\n")
+        self.assertEqual(self._sent(), b"shox\b \bw\r\n")
+
+    def test_readline_tab_completion(self):
+        """Check that tab appends and echoes the completion of the line."""
+        self.channel_io.completer = Mock(return_value="ow ")
+        self.channel.recv.side_effect = [b"sh\tclock\n"]
+        self.assertEqual(self.channel_io.readline(), "show clock\n")
+        self.channel_io.completer.assert_called_once_with("sh")
+        self.assertEqual(self._sent(), b"show clock\r\n")
+
+    def test_read_key(self):
+        """Check that single keys are read without echo and CRLF counts as one key."""
+        self.channel.recv.side_effect = [b" \r\nq"]
+        self.assertEqual(
+            [self.channel_io.read_key(), self.channel_io.read_key(), self.channel_io.read_key()], [" ", "\r", "q"]
         )
-        self.mock_shell_stdout.readline.assert_called_once()
-        self.mock_run_srv.is_set.assert_called_once()
+        self.channel.send.assert_not_called()
 
-    def test_shell_to_channel_tap_shell_stdout_readline_return_carry_return(self):
-        """
-        Check that the ShellToChannelTap object reads a line
-        from the shell_stdout that is a carriage return and newline.
-        """
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_shell_stdout.readline.return_value = "\r\n"
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_shell_stdout.readline.assert_called_once()
-        self.mock_channel_stdio.write.assert_called_once_with(b"\r\n")
+    def test_readline_timeout(self):
+        """Check that reads keep waiting for the channel on timeout."""
+        self.channel.recv.side_effect = [socket.timeout, b"show clock\n"]
+        self.assertEqual(self.channel_io.readline(), "show clock\n")
 
-    def test_shell_to_channel_tap_shell_stdout_readline_return_newline(self):
-        """
-        Check that the ShellToChannelTap object reads a line
-        from the shell_stdout that is a newline.
-        """
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_shell_stdout.readline.return_value = "\n"
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_shell_stdout.readline.assert_called_once()
-        self.mock_channel_stdio.write.assert_called_once_with(b"\r\n")
+    def test_readline_channel_closed(self):
+        """Check that an empty line is returned and the session stopped once the channel is closed."""
+        self.channel.recv.side_effect = [b""]
+        self.assertEqual(self.channel_io.readline(), "")
+        self.assertFalse(self.session_running.is_set())
 
-    def test_shell_to_channel_tap_shell_stdout_readline_return_other(self):
-        """
-        Check that the ShellToChannelTap object reads a line
-        from the shell_stdout that is a character.
-        """
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_shell_stdout.readline.return_value = "b"
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_shell_stdout.readline.assert_called_once()
-        self.mock_channel_stdio.write.assert_called_once_with(b"b")
-
-    def test_shell_to_channel_tap_socket_error(self):
-        """Check that the ShellToChannelTap object breaks the loop if a socket error occurs."""
-        self.mock_shell_stdout.readline.return_value = "b"
-        self.mock_channel_stdio.write.side_effect = OSError(104, "Connection reset by peer")
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_run_srv.is_set.assert_called_once()
-
-    def test_shell_to_channel_tap_set_replied_flag(self):
-        """Check that the ShellToChannelTap object sets the replied flag."""
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_shell_stdout.readline.return_value = "b"
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.mock_shell_replied_event.set.assert_called_once()
-
-    def test_shell_to_channel_tap_exit_run_srv(self):
-        """Check that the ShellToChannelTap object exits the run_srv."""
-        self.mock_run_srv.is_set.side_effect = [True, False]
-        self.mock_shell_stdout.readline.return_value = "b"
-        shell_to_channel_tap(
-            channel_stdio=self.mock_channel_stdio,
-            shell_stdout=self.mock_shell_stdout,
-            shell_replied_event=self.mock_shell_replied_event,
-            run_srv=self.mock_run_srv,
-        )
-        self.assertEqual(self.mock_run_srv.is_set.call_count, 2)
+    def test_readline_server_stopped(self):
+        """Check that an empty line is returned once the server stops."""
+        self.is_running.clear()
+        self.assertEqual(self.channel_io.readline(), "")
+        self.channel.recv.assert_not_called()
+        self.assertFalse(self.session_running.is_set())
+
+    def test_write(self):
+        """Check that new lines are sent as CRLF."""
+        self.channel_io.write("line1\nline2\n")
+        self.channel_io.write("line3\r\n")
+        self.channel_io.flush()
+        self.assertEqual(self._sent(), b"line1\r\nline2\r\nline3\r\n")
+
+    def test_write_bytes(self):
+        """Check that encoded data is sent as is unless lines end with LF only."""
+        self.channel_io.write_bytes(b"line1\r\nline2\r\n")
+        self.channel_io.write_bytes(b"line3\n")
+        self.channel_io.flush()
+        self.assertEqual(self._sent(), b"line1\r\nline2\r\nline3\r\n")
+
+    def test_write_coalescing(self):
+        """Check that writes are coalesced up to the packet size and flushed before reading."""
+        for _ in range(3):
+            self.channel_io.write("line\n")
+        self.assertEqual([call.args[0] for call in self.channel.send.call_args_list], [b"line\r\nline\r\n"])
+        self.channel_io.write_bytes(b"x" * 20)
+        self.assertEqual(self.channel.send.call_count, 3)
+        self.channel.recv.side_effect = [b"\n"]
+        self.channel_io.write("R1>")
+        self.channel_io.readline()
+        self.assertEqual(self.channel.send.call_args_list[3].args[0], b"R1>")
+        self.assertEqual(self._sent(), b"line\r\n" * 3 + b"x" * 20 + b"R1>\r\n")
+
+    def test_write_partial_send(self):
+        """Check that data is sent until the end when the window is full."""
+        self.channel.send.side_effect = [2, socket.timeout, 4]
+        self.channel_io.write("line\n")
+        self.channel_io.flush()
+        self.assertEqual(self.channel.send.call_args_list[-1].args[0], b"ne\r\n")
+
+    def test_write_error(self):
+        """Check that the session is stopped on channel errors."""
+        self.channel.send.side_effect = OSError(104, "Connection reset by peer")
+        self.channel_io.write("line\n")
+        self.channel_io.flush()
+        self.assertFalse(self.session_running.is_set())
+        self.channel_io.write("line\n")
+        self.channel_io.flush()
+        self.channel.send.assert_called_once()
+
+
+class SessionThreadsTest(unittest.TestCase):
+    """
+    Test cases for the threads serving the SSH sessions.
+    """
+
+    def test_one_worker_per_shell(self):
+        """Check that each shell session adds the transport, the connection and one worker thread."""
+        port = get_free_port()
+        inventory = {
+            "hosts": {
+                "R1": {
+                    "port": port,
+                    "platform": "cisco_ios",
+                    "server": {"plugin": "ParamikoSshServer", "configuration": {"thread_stack_size": 262144}},
+                }
+            }
+        }
+        with FakeNOS(inventory=inventory):
+            threads = set(threading.enumerate())
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect("127.0.0.1", port, username="user", password="user", look_for_keys=False)
+            channel = client.invoke_shell()
+            output = ""
+            while "R1>" not in output:
+                output += channel.recv(1024).decode()
+            # the client transport thread and the server ones, the
+            # watchdog thread is shared by all the sessions
+            new_threads = [thread for thread in set(threading.enumerate()) - threads if thread.name != "fakenos-watchdog"]
+            self.assertEqual(len(new_threads), 1 + 3)
+            self.assertEqual(threading.stack_size(), 0)
+            client.close()
 
 
 class ParamikoSshServerTest(unittest.TestCase):
@@ -646,66 +788,37 @@ class ParamikoSshServerTest(unittest.TestCase):
         # pylint: disable=protected-access
         self.assertEqual(paramiko_server._ssh_server_key, paramiko.RSAKey(file_obj=io.StringIO(DEFAULT_SSH_KEY)))
 
-    def test_watchdog_run_srv_loop(self):
-        """Check that the watchdog run_srv loop is executed."""
-        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments, watchdog_interval=0.01)
-        mock_is_running: Mock = Mock()
-        mock_run_srv: Mock = Mock()
-        mock_session: Mock = Mock()
-        mock_shell: Mock = Mock()
-        mock_run_srv.is_set.side_effect = [True, False]
-        paramiko_server.watchdog(mock_is_running, mock_run_srv, mock_session, mock_shell)
-        self.assertEqual(mock_run_srv.is_set.call_count, 2)
-
-    def test_watchdog_session_is_not_alive(self):
-        """Check that the watchdog session is not alive."""
-        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments, watchdog_interval=0.01)
-        mock_is_running: Mock = Mock()
-        mock_run_srv: Mock = Mock()
-        mock_session: Mock = Mock()
-        mock_shell: Mock = Mock()
-        mock_session.is_alive.return_value = False
-        paramiko_server.watchdog(mock_is_running, mock_run_srv, mock_session, mock_shell)
-        mock_session.is_alive.assert_called_once()
-        mock_run_srv.is_set.assert_called_once()
-        mock_shell.stop.assert_called_once()
-
-    def test_watchdog_shell_stop_when_is_running_false(self):
-        """Check that the watchdog shell is stopped when is_running is False."""
-        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments, watchdog_interval=0.01)
-        mock_is_running: Mock = Mock()
-        mock_run_srv: Mock = Mock()
-        mock_session: Mock = Mock()
-        mock_shell: Mock = Mock()
-        mock_run_srv.is_set.side_effect = [True] * 2 + [False]
-        mock_is_running.is_set.side_effect = [True] * 1 + [False]
-        paramiko_server.watchdog(mock_is_running, mock_run_srv, mock_session, mock_shell)
-        mock_shell.stop.assert_called_once()
-
-    def test_watchdog_shell_stop_when_session_is_alive_false(self):
-        """Check that the watchdog shell is stopped when the session is alive is False."""
-        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments, watchdog_interval=0.01)
-        mock_is_running: Mock = Mock()
-        mock_run_srv: Mock = Mock()
-        mock_session: Mock = Mock()
-        mock_shell: Mock = Mock()
-        mock_session.is_alive.side_effect = [True] * 1 + [False]
-        paramiko_server.watchdog(mock_is_running, mock_run_srv, mock_session, mock_shell)
-        mock_shell.stop.assert_called_once()
-
-    # pylint: disable=unused-argument
-    @mock.patch("fakenos.plugins.servers.ssh_server_paramiko.channel_to_shell_tap")
-    @mock.patch("fakenos.plugins.servers.ssh_server_paramiko.shell_to_channel_tap")
     @mock.patch("paramiko.Transport")
-    def test_connection_function(
-        self, mock_transport: MagicMock, mock_shell_to_channel_tap: MagicMock, mock_channel_to_shell_tap: MagicMock
-    ):
+    def test_connection_function(self, mock_transport: MagicMock):
         """Check that the connection function is executed correctly."""
         mock_client: MagicMock = MagicMock()
         mock_is_running = Mock()
+        mock_transport.return_value.start_server.side_effect = lambda event, server: event.set()
+        mock_transport.return_value.is_active.side_effect = [True, True, False]
+        mock_transport.return_value.accept.return_value = None
         paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments)
         paramiko_server.connection_function(mock_client, mock_is_running)
 
         mock_transport.assert_called_once()
-        mock_shell_to_channel_tap.assert_called_once()
-        mock_channel_to_shell_tap.assert_called_once()
+        mock_transport.return_value.start_server.assert_called_once()
+        mock_transport.return_value.accept.assert_called_once()
+        mock_transport.return_value.close.assert_called_once()
+
+    def test_send_exit_status_client_gone(self):
+        """Check that the exit status and the close of channels whose client is gone do not raise."""
+        channel = Mock()
+        channel.send_exit_status.side_effect = EOFError
+        channel.close.side_effect = paramiko.SSHException("Transport is not active")
+        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments)
+        paramiko_server._send_exit_status(channel, 0)
+        channel.close.assert_called_once()
+
+    @mock.patch("paramiko.Transport")
+    def test_connection_function_negotiation_failed(self, mock_transport: MagicMock):
+        """Check that the connection function closes the transport of a failed negotiation without raising."""
+        mock_transport.return_value.is_active.return_value = False
+        mock_transport.return_value.get_exception.return_value = paramiko.SSHException("Error reading SSH banner")
+        paramiko_server: ParamikoSshServer = ParamikoSshServer(**self.arguments)
+        paramiko_server.connection_function(MagicMock(), Mock())
+        mock_transport.return_value.close.assert_called_once()
+        mock_transport.return_value.accept.assert_not_called()
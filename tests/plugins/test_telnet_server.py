@@ -0,0 +1,163 @@
+"""
+Test cases for the telnet_server plugin.
+"""
+
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from netmiko import ConnectHandler
+
+from fakenos import FakeNOS
+from fakenos.plugins.servers.telnet_server import IAC, DO, ECHO, WILL, WONT, SB, SE, TelnetIO
+from tests.utils import get_free_port
+
+
+class TelnetIOTest(unittest.TestCase):
+    """
+    Test cases for the TelnetIO class.
+    """
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.is_running = threading.Event()
+        self.is_running.set()
+        self.session_running = threading.Event()
+        self.session_running.set()
+        self.telnet_io = TelnetIO(self.client, self.is_running, self.session_running)
+
+    def test_readline_strips_telnet_commands(self):
+        """Check that Telnet commands are removed from the lines."""
+        self.client.recv.side_effect = [bytes([IAC, DO, 24]) + b"sh", bytes([IAC, SB, 24, 1, IAC, SE]) + b"ow\r\x00"]
+        self.assertEqual(self.telnet_io.readline(), "show\n")
+        self.client.sendall.assert_any_call(bytes([IAC, WONT, 24]))
+
+    def test_readline_echo_and_backspace(self):
+        """Check that the input is echoed and backspaces remove characters."""
+        self.client.recv.side_effect = [b"shx\x7fow\r\n"]
+        self.assertEqual(self.telnet_io.readline(), "show\n")
+        echoed = b"".join(call.args[0] for call in self.client.sendall.call_args_list)
+        self.assertEqual(echoed, b"shx\b \bow\r\n")
+
+    def test_readline_tab_completion(self):
+        """Check that tab appends and echoes the completion of the line."""
+        self.telnet_io.completer = MagicMock(return_value="ow ")
+        self.client.recv.side_effect = [b"sh\tclock\r\n"]
+        self.assertEqual(self.telnet_io.readline(), "show clock\n")
+        echoed = b"".join(call.args[0] for call in self.client.sendall.call_args_list)
+        self.assertEqual(echoed, b"show clock\r\n")
+
+    def test_read_key(self):
+        """Check that single keys are read without echo and CRLF counts as one key."""
+        self.client.recv.side_effect = [b"\r\n q"]
+        self.assertEqual(
+            [self.telnet_io.read_key(), self.telnet_io.read_key(), self.telnet_io.read_key()], ["\r", " ", "q"]
+        )
+        self.client.sendall.assert_not_called()
+
+    def test_readline_without_echo(self):
+        """Check that the input is not echoed when echo is off."""
+        self.telnet_io.echo = False
+        self.client.recv.side_effect = [b"secret\n"]
+        self.assertEqual(self.telnet_io.readline(), "secret\n")
+        self.client.sendall.assert_not_called()
+
+    def test_readline_client_disconnected(self):
+        """Check that an empty string is returned once the client disconnects."""
+        self.client.recv.side_effect = [b""]
+        self.assertEqual(self.telnet_io.readline(), "")
+        self.assertFalse(self.session_running.is_set())
+
+    def test_readline_server_stopped(self):
+        """Check that an empty string is returned once the server stops."""
+        self.client.recv.side_effect = socket.timeout
+        self.is_running.clear()
+        self.assertEqual(self.telnet_io.readline(), "")
+
+    def test_write_coalescing(self):
+        """Check that writes are buffered and sent before waiting for input."""
+        self.telnet_io.write("line1\r\n")
+        self.telnet_io.write_bytes(b"line2\r\n")
+        self.telnet_io.write("R1>")
+        self.client.sendall.assert_not_called()
+        self.client.recv.side_effect = [b"\n"]
+        self.telnet_io.readline()
+        self.assertEqual(self.client.sendall.call_args_list[0].args[0], b"line1\r\nline2\r\nR1>")
+
+    def test_write_escapes_iac(self):
+        """Check that data bytes equal to IAC are doubled in the output."""
+        self.telnet_io.write_bytes(bytes([1, IAC, 2]))
+        self.telnet_io.flush()
+        self.client.sendall.assert_called_once_with(bytes([1, IAC, IAC, 2]))
+
+    def test_readline_long_input(self):
+        """Check that long input received in one read is split into lines with escaped IAC kept as data."""
+        self.telnet_io.echo = False
+        lines = 10000
+        self.client.recv.side_effect = [b"show clock\r\n" * lines + bytes([IAC, IAC]) + b"\n"]
+        self.assertEqual([self.telnet_io.readline() for _ in range(lines)], ["show clock\n"] * lines)
+        self.assertEqual(self.telnet_io.readline(), "\ufffd\n")
+
+    def test_negotiate(self):
+        """Check that the server offers to echo and suppress go-ahead."""
+        self.telnet_io.negotiate()
+        self.client.sendall.assert_called_once_with(bytes([IAC, WILL, ECHO, IAC, WILL, 3]))
+
+
+class TelnetServerTest(unittest.TestCase):
+    """
+    Test cases for the TelnetServer class running in FakeNOS.
+    """
+
+    def setUp(self):
+        self.port = get_free_port()
+        self.inventory = {
+            "hosts": {
+                "R1": {
+                    "port": self.port,
+                    "platform": "cisco_ios",
+                    "server": {"plugin": "TelnetServer", "configuration": {"address": "127.0.0.1"}},
+                }
+            }
+        }
+
+    def test_netmiko_telnet(self):
+        """Check that Netmiko logs in and runs commands over Telnet."""
+        with FakeNOS(inventory=self.inventory):
+            device = {
+                "device_type": "cisco_ios_telnet",
+                "host": "127.0.0.1",
+                "port": self.port,
+                "username": "user",
+                "password": "user",
+            }
+            with ConnectHandler(**device) as conn:
+                self.assertEqual(conn.find_prompt(), "R1>")
+                conn.enable()
+                self.assertIn("hostname R1", conn.send_command("show running-config"))
+
+    def test_authentication_failed(self):
+        """Check that the connection is closed after the failed login attempts."""
+        with FakeNOS(inventory=self.inventory):
+            with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+                client.sendall(b"user\r\nwrong\r\n" * 3)
+                output = b""
+                while True:
+                    data = client.recv(4096)
+                    if not data:
+                        break
+                    output += data
+            self.assertEqual(output.count(b"% Authentication failed"), 3)
+
+    def test_idle_timeout(self):
+        """Check that the session is closed once the client is idle for too long."""
+        self.inventory["hosts"]["R1"]["server"]["configuration"]["idle_timeout"] = 1
+        with FakeNOS(inventory=self.inventory):
+            with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+                client.sendall(b"user\r\nuser\r\n")
+                start = time.monotonic()
+                while client.recv(4096):
+                    pass
+                self.assertLess(time.monotonic() - start, 4)